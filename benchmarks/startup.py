@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Startup benchmark
+
+Measure the time taken by `python -c "import fiabilipy"` (and by a few other
+statements), each run being done in a fresh interpreter, and tell which of
+the heavy dependencies have been loaded.
+
+    $ python benchmarks/startup.py --runs 20 --max 0.5
+
+exits with a non zero status if the median time of `import fiabilipy` is
+greater than 0.5 second.
+"""
+from __future__ import print_function
+
+import argparse
+import subprocess
+import sys
+import time
+
+STATEMENTS = (
+    'import fiabilipy',
+    'from fiabilipy import Component',
+    'from fiabilipy import System',
+    'from fiabilipy import System; System()',
+)
+
+HEAVY = ('sympy', 'scipy', 'networkx')
+
+PROBE = ('import sys; print(" ".join(m for m in %r if m in sys.modules))'
+         % (HEAVY,))
+
+
+def measure(statement, runs):
+    r""" Run `statement` in `runs` fresh interpreters and return the sorted
+        wall-clock times
+    """
+    times = []
+    for _ in range(runs):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', statement])
+        times.append(time.time() - start)
+    return sorted(times)
+
+
+def loaded(statement):
+    r""" Return the heavy dependencies loaded by `statement` """
+    output = subprocess.check_output([sys.executable, '-c',
+                                      '%s; %s' % (statement, PROBE)])
+    return output.decode().split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='number of interpreters started per statement')
+    parser.add_argument('--max', type=float, default=None,
+                        help='fail if `import fiabilipy` takes longer '
+                             '(median, in seconds)')
+    args = parser.parse_args()
+
+    baseline = measure('pass', args.runs)[args.runs // 2]
+    print('interpreter alone: %.3fs' % baseline)
+    medians = {}
+    for statement in STATEMENTS:
+        times = measure(statement, args.runs)
+        medians[statement] = times[args.runs // 2]
+        print('%-40s min %.3fs  median %.3fs  loads: %s'
+              % (statement, times[0], medians[statement],
+                 ', '.join(loaded(statement)) or '-'))
+
+    if args.max is not None and medians['import fiabilipy'] > args.max:
+        print('import fiabilipy is too slow (%.3fs > %.3fs)'
+              % (medians['import fiabilipy'], args.max))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
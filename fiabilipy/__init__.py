@@ -17,10 +17,41 @@
 #with this program; if not, write to the Free Software Foundation, Inc.,
 #51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-from fiabilipy.component import Component
-from fiabilipy.voter import Voter
-from fiabilipy.system import System
-from fiabilipy.markov import Markovprocess
+import sys
 
 __version__ = '2.7'
-__all__ = ['System', 'Component', 'Voter', 'Markovprocess']
+__all__ = ['System', 'Component', 'Voter', 'Markovprocess', 'setnumeric',
+           'setcache']
+
+#the module defining each public name
+_MODULES = {
+    'Component': 'component',
+    'setnumeric': 'component',
+    'Voter': 'voter',
+    'System': 'system',
+    'Markovprocess': 'markov',
+    'setcache': 'cache',
+}
+
+if sys.version_info >= (3, 7):
+    #the modules (and sympy, scipy and networkx behind them) are only
+    #imported when one of their names is used for the first time
+    def __getattr__(name):
+        try:
+            module = _MODULES[name]
+        except KeyError:
+            raise AttributeError('module %r has no attribute %r'
+                                 % (__name__, name))
+        from importlib import import_module
+        value = getattr(import_module('fiabilipy.' + module), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+else:
+    from fiabilipy.component import Component, setnumeric
+    from fiabilipy.voter import Voter
+    from fiabilipy.system import System
+    from fiabilipy.markov import Markovprocess
+    from fiabilipy.cache import setcache
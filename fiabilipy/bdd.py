@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Binary decision diagrams
+
+This module gives a small shared reduced ordered binary decision diagram
+(ROBDD) implementation, used to compile the structure function of a system.
+Once compiled, the probability of the structure function is evaluated by a
+single pass over the diagram.
+
+"""
+from builtins import range
+from builtins import object
+
+__all__ = ['BDD', 'ordering']
+
+FALSE, TRUE = 0, 1
+
+
+def ordering(paths):
+    r""" Compute a variable ordering for a list of paths
+
+        Variables are ranked by their earliest position in a path (that is,
+        roughly, by their distance to the start of the diagram), then by the
+        number of paths they belong to. Variables close to each other in the
+        reliability diagram therefore end up close to each other in the
+        ordering, which keeps the diagram small.
+
+        Parameters
+        ----------
+        paths : list of lists of int
+            each path is given as the list of its variables
+
+        Returns
+        -------
+        out : list of int
+            the variables, in the order they must be tested
+
+        Examples
+        --------
+        >>> ordering([[0, 2], [1, 2]])
+        [0, 1, 2]
+    """
+    position, frequency = {}, {}
+    for path in paths:
+        for i, var in enumerate(path):
+            position[var] = min(position.get(var, i), i)
+            frequency[var] = frequency.get(var, 0) + 1
+    return sorted(position, key=lambda v: (position[v], -frequency[v], v))
+
+
+class BDD(object):
+    r""" A shared reduced ordered binary decision diagram.
+
+        Nodes are identified by integers. `0` and `1` are the terminal nodes
+        (respectively `False` and `True`). Every other node tests a variable
+        and has a `high` child (the variable is true) and a `low` child (the
+        variable is false). Nodes are shared through a unique table, so two
+        equivalent functions are always represented by the same node.
+
+        Parameters
+        ----------
+        order : list of int
+            the variables, in the order they are tested from the root
+
+        Examples
+        --------
+        >>> bdd = BDD([0, 1])
+        >>> root = bdd.disjunction([bdd.conjunction([0]), bdd.conjunction([1])])
+        >>> bdd.probability(root, [0.5, 0.5])
+        0.75
+    """
+
+    def __init__(self, order):
+        self.order = list(order)
+        self._level = dict((var, lvl) for lvl, var in enumerate(self.order))
+        #(level, high, low) for each node, the terminal nodes first
+        self._nodes = [(len(self.order), None, None)] * 2
+        self._unique = {}
+        self._computed = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def node(self, u):
+        r""" Return the `(variable, high, low)` triplet describing `u` """
+        level, high, low = self._nodes[u]
+        return self.order[level], high, low
+
+    def _mk(self, level, high, low):
+        if high == low:
+            return high
+        key = (level, high, low)
+        try:
+            return self._unique[key]
+        except KeyError:
+            self._nodes.append(key)
+            self._unique[key] = len(self._nodes) - 1
+            return self._unique[key]
+
+    def var(self, var):
+        r""" Return the node representing the single variable `var` """
+        return self._mk(self._level[var], TRUE, FALSE)
+
+    @staticmethod
+    def _terminal(op, u, v):
+        r""" Return `u op v` if it is known without expanding the nodes,
+            `None` otherwise
+        """
+        if op == 'and':
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE:
+                return v
+            if v == TRUE or u == v:
+                return u
+        else:
+            if u == TRUE or v == TRUE:
+                return TRUE
+            if u == FALSE:
+                return v
+            if v == FALSE or u == v:
+                return u
+        return None
+
+    def apply(self, op, u, v):
+        r""" Combine two nodes with a boolean operator
+
+            The pairs of nodes to combine are kept in an explicit stack, so
+            long diagrams do not exhaust the Python stack.
+
+            Parameters
+            ----------
+            op : str
+                either 'and' or 'or'
+            u, v : int
+                the nodes to combine
+
+            Returns
+            -------
+            out : int
+                the node representing `u op v`
+        """
+        if op not in ('and', 'or'):
+            raise ValueError(u'unknown operator %s' % op)
+
+        #a pair `(u, v)` is to be combined, a triplet `(key, level, None)`
+        #builds the node of `key` from the two last results
+        stack, results = [(u, v)], []
+        while stack:
+            item = stack.pop()
+            if len(item) == 3:
+                key, level, _ = item
+                low, high = results.pop(), results.pop()
+                result = self._mk(level, high, low)
+                self._computed[key] = result
+                results.append(result)
+                continue
+
+            u, v = item
+            result = self._terminal(op, u, v)
+            if result is not None:
+                results.append(result)
+                continue
+            if u > v: #both operators are commutative
+                u, v = v, u
+            key = (op, u, v)
+            try:
+                results.append(self._computed[key])
+                continue
+            except KeyError:
+                pass
+
+            lu, hu, ou = self._nodes[u]
+            lv, hv, ov = self._nodes[v]
+            level = min(lu, lv)
+            if lu == level:
+                uhigh, ulow = hu, ou
+            else:
+                uhigh = ulow = u
+            if lv == level:
+                vhigh, vlow = hv, ov
+            else:
+                vhigh = vlow = v
+            #the high pair is combined first
+            stack.append((key, level, None))
+            stack.append((ulow, vlow))
+            stack.append((uhigh, vhigh))
+        return results[0]
+
+    def conjunction(self, variables):
+        r""" Return the node representing the conjunction of `variables` """
+        node = TRUE
+        for level in sorted(set(self._level[v] for v in variables),
+                            reverse=True):
+            node = self._mk(level, node, FALSE)
+        return node
+
+    def disjunction(self, nodes):
+        r""" Return the node representing the disjunction of `nodes` """
+        nodes = list(nodes)
+        if not nodes:
+            return FALSE
+        #combine the nodes pairwise, it keeps the intermediate diagrams
+        #smaller than a left fold.
+        while len(nodes) > 1:
+            pairs = [self.apply('or', nodes[i], nodes[i+1])
+                     for i in range(0, len(nodes) - 1, 2)]
+            if len(nodes) % 2:
+                pairs.append(nodes[-1])
+            nodes = pairs
+        return nodes[0]
+
+    def reachable(self, root):
+        r""" List the internal nodes reachable from `root`, children first """
+        seen, stack = set(), [root]
+        while stack:
+            u = stack.pop()
+            if u in seen or u in (FALSE, TRUE):
+                continue
+            seen.add(u)
+            _, high, low = self._nodes[u]
+            stack.extend((high, low))
+        #children are always created before their parents
+        return sorted(seen)
+
+    def probability(self, root, values):
+        r""" Compute the probability of the function represented by `root`
+
+            Each node is visited once, so the cost is linear with the size of
+            the diagram.
+
+            Parameters
+            ----------
+            root : int
+                the node to evaluate
+            values : list
+                `values[i]` is the probability of the variable `i` to be true.
+                It may be a float, a numpy array or a symbolic expression.
+
+            Returns
+            -------
+            out : float, array or symbolic expression
+                the probability of the function to be true
+        """
+        prob = {FALSE: 0, TRUE: 1}
+        for u in self.reachable(root):
+            level, high, low = self._nodes[u]
+            p = values[self.order[level]]
+            if low == FALSE:
+                prob[u] = p * prob[high]
+            elif high == TRUE:
+                prob[u] = p + (1 - p) * prob[low]
+            else:
+                prob[u] = p * prob[high] + (1 - p) * prob[low]
+        return prob[root]
+
+    def derivatives(self, root, values):
+        r""" Compute the probability of the function represented by `root`,
+            and its partial derivatives with respect to the probability of
+            each variable.
+
+            The probabilities are computed from the leaves to the root, then
+            the probability of reaching each node is propagated from the root
+            to the leaves. The derivative with respect to the variable `v` is
+            the sum, over the nodes testing `v`, of the probability of
+            reaching the node times the difference between the probabilities
+            of its children. Both passes are linear with the size of the
+            diagram.
+
+            Parameters
+            ----------
+            root : int
+                the node to evaluate
+            values : list
+                `values[i]` is the probability of the variable `i` to be true.
+                It may be a float or a numpy array.
+
+            Returns
+            -------
+            out : tuple
+                the probability of the function to be true, and a dictionnary
+                giving the derivative with respect to each variable the
+                function depends on.
+
+            Examples
+            --------
+            >>> bdd = BDD([0, 1])
+            >>> root = bdd.disjunction([bdd.conjunction([0]),
+            ...                         bdd.conjunction([1])])
+            >>> bdd.derivatives(root, [0.5, 0.25])
+            (0.625, {0: 0.75, 1: 0.5})
+        """
+        nodes = self.reachable(root)
+        prob = {FALSE: 0, TRUE: 1}
+        for u in nodes:
+            level, high, low = self._nodes[u]
+            p = values[self.order[level]]
+            prob[u] = p * prob[high] + (1 - p) * prob[low]
+
+        reach = dict((u, 0) for u in nodes)
+        reach[root] = 1
+        derivatives = {}
+        #parents are always created after their children
+        for u in reversed(nodes):
+            level, high, low = self._nodes[u]
+            var = self.order[level]
+            p = values[var]
+            derivatives[var] = derivatives.get(var, 0) \
+                               + reach[u] * (prob[high] - prob[low])
+            if high in reach:
+                reach[high] = reach[high] + reach[u] * p
+            if low in reach:
+                reach[low] = reach[low] + reach[u] * (1 - p)
+        return prob[root], derivatives
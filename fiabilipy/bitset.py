@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Sets of components as bitmasks
+
+A set of components (a path, a cut, …) is stored as an integer, the bit `i`
+being set if the `i`-th component belongs to the set. Unions, intersections
+and inclusion tests are then single integer operations.
+
+"""
+__all__ = ['tomask', 'indices', 'popcount', 'issubset']
+
+
+def tomask(items):
+    r""" Build the bitmask of a list of indices
+
+        >>> tomask([0, 2])
+        5
+    """
+    mask = 0
+    for i in items:
+        mask |= 1 << i
+    return mask
+
+
+def indices(mask):
+    r""" List the indices set in a bitmask
+
+        >>> indices(5)
+        [0, 2]
+    """
+    result, i = [], 0
+    while mask:
+        if mask & 1:
+            result.append(i)
+        mask >>= 1
+        i += 1
+    return result
+
+
+def popcount(mask):
+    r""" Count the bits set in a bitmask
+
+        >>> popcount(5)
+        2
+    """
+    return bin(mask).count('1')
+
+
+def issubset(a, b):
+    r""" Check if the set `a` is included in the set `b`
+
+        >>> issubset(1, 5), issubset(2, 5)
+        (True, False)
+    """
+    return a & b == a
+
@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Bounds of the probability of a system to fail
+
+The system fails when all the components of one of its minimal cuts fail,
+and works when all the components of one of its success paths work. Let
+:math:`Q_C` be the probability of the components of the cut :math:`C` to
+all fail, and :math:`R_P` the one of the components of the path :math:`P`
+to all work. The probability :math:`Q` of the system to fail is bounded by:
+
+* Esary-Proschan: :math:`\prod_P (1 - R_P) \le Q \le 1 - \prod_C (1 - Q_C)`,
+  the upper bound being the min-cut upper bound,
+* the minimal cuts only: :math:`\max_C Q_C \le Q \le 1 - \prod_C (1 - Q_C)`,
+* the rare-event approximation :math:`Q \approx \sum_C Q_C`, which is an
+  upper bound as well,
+* Bonferroni: the inclusion-exclusion expansion of the union of the cuts,
+  truncated after the terms of `order` cuts, is alternately an upper and a
+  lower bound.
+
+Each bound only costs a product of the incidence matrix of the paths or of
+the cuts with the logarithms of the probabilities of the components, for
+all the times at once. Bonferroni bounds expand all the unions of at most
+`order` cuts.
+
+The probabilities of the components to fail are given, rather than to work,
+so the tiny probabilities of failure of reliable systems are never computed
+as differences of numbers close to one. The bounds are widened by
+:py:data:`ROUNDING` to cover the rounding errors of these computations.
+
+"""
+from __future__ import division
+
+from collections import namedtuple
+from itertools import combinations
+
+from numpy import asarray, zeros, exp, log, log1p, expm1, errstate, \
+                  minimum, maximum, where
+
+from fiabilipy.bitset import indices
+
+__all__ = ['Bounds', 'METHODS', 'ROUNDING', 'allfail', 'anyfail',
+           'esaryproschan', 'mincut', 'rareevent', 'bonferroni']
+
+#The ways of bounding the probability of failure
+METHODS = ('esary-proschan', 'mincut', 'rare-event', 'bonferroni')
+
+#The relative rounding error the bounds are widened by
+ROUNDING = 1e-10
+
+
+class Bounds(namedtuple('Bounds', ['value', 'low', 'high'])):
+    r""" Bounds of a probability
+
+        Attributes
+        ----------
+        value : float or array
+            the approximated probability (the middle of the bounds, or the
+            rare-event approximation)
+        low, high : float or array
+            the guaranteed lower and upper bounds
+    """
+    __slots__ = ()
+
+    @property
+    def error(self):
+        r""" The largest difference between `value` and the probability """
+        value = asarray(self.value)
+        error = maximum(asarray(self.high) - value, value - asarray(self.low))
+        return error if error.shape else float(error)
+
+    def complement(self):
+        r""" Return the bounds of one minus the probability """
+        return Bounds(1 - self.value, 1 - self.high, 1 - self.low)
+
+
+def _incidence(masks, size):
+    r""" The matrix whose row `k` tells which components are in `masks[k]` """
+    matrix = zeros((len(masks), size))
+    for k, mask in enumerate(masks):
+        matrix[k, indices(mask)] = 1
+    return matrix
+
+
+def allfail(masks, q):
+    r""" Compute the probability of the components of each set to all fail
+
+        Parameters
+        ----------
+        masks : list of int
+            the sets of components, as bitmasks
+        q : array
+            `q[i]` is the probability of the component `i` to fail, at each
+            time
+
+        Returns
+        -------
+        out : array
+            `out[k]` is the probability of the components of `masks[k]` to all
+            fail, at each time
+
+        Examples
+        --------
+        >>> allfail([0b011, 0b110], [0.5, 0.1, 0.0])
+        array([0.05, 0.  ])
+    """
+    q = asarray(q, dtype=float)
+    matrix = _incidence(masks, len(q))
+    with errstate(divide='ignore'):
+        logq = where(q > 0, log(where(q > 0, q, 1)), 0)
+    impossible = matrix.dot(q <= 0) > 0
+    return where(impossible, 0, exp(matrix.dot(logq)))
+
+
+def anyfail(masks, q):
+    r""" Compute the probability of at least one component of each set to
+        fail
+
+        Parameters
+        ----------
+        masks : list of int
+            the sets of components, as bitmasks
+        q : array
+            `q[i]` is the probability of the component `i` to fail, at each
+            time
+
+        Returns
+        -------
+        out : array
+            `out[k]` is one minus the probability of the components of
+            `masks[k]` to all work, at each time
+
+        Examples
+        --------
+        >>> anyfail([0b001, 0b110], [1e-20, 0.5, 1.0])
+        array([1.e-20, 1.e+00])
+    """
+    q = asarray(q, dtype=float)
+    matrix = _incidence(masks, len(q))
+    logp = where(q < 1, log1p(-where(q < 1, q, 0)), 0)
+    certain = matrix.dot(q >= 1) > 0
+    return where(certain, 1, -expm1(matrix.dot(logp)))
+
+
+def _widened(low, high, magnitude=None):
+    r""" The bounds `low` and `high`, widened by the rounding errors of the
+        computation of numbers of the order of `magnitude`
+    """
+    if magnitude is None:
+        magnitude = high
+    margin = ROUNDING * magnitude
+    return maximum(low - margin, 0), minimum(high + margin, 1)
+
+
+def _middle(low, high, magnitude=None):
+    low, high = _widened(low, high, magnitude)
+    return Bounds((low + high) / 2, low, high)
+
+
+def mincut(cuts, q):
+    r""" Bound the probability of failure from the minimal cuts
+
+        Parameters
+        ----------
+        cuts : list of int
+            the minimal cuts, as bitmasks
+        q : array
+            `q[i]` is the probability of the component `i` to fail, at each
+            time
+
+        Returns
+        -------
+        out : Bounds
+            :math:`\max_C Q_C \le Q \le 1 - \prod_C (1 - Q_C)`
+
+        Examples
+        --------
+        >>> bounds = mincut([0b01, 0b10], [0.1, 0.2])
+        >>> print('%.2f %.2f' % (bounds.low, bounds.high))
+        0.20 0.28
+    """
+    q = asarray(q, dtype=float)
+    cutfails = allfail(cuts, q)
+    if not len(cuts):
+        return _middle(zeros(q.shape[1:]), zeros(q.shape[1:]))
+    high = -expm1(log1p(-cutfails).sum(axis=0))
+    return _middle(cutfails.max(axis=0), high)
+
+
+def esaryproschan(paths, cuts, q):
+    r""" Compute the Esary-Proschan bounds of the probability of failure
+
+        Parameters
+        ----------
+        paths, cuts : list of int
+            the success paths and the minimal cuts, as bitmasks
+        q : array
+            `q[i]` is the probability of the component `i` to fail, at each
+            time
+
+        Returns
+        -------
+        out : Bounds
+            :math:`\prod_P (1 - R_P) \le Q \le 1 - \prod_C (1 - Q_C)`
+
+        Examples
+        --------
+        >>> bounds = esaryproschan([0b01, 0b10], [0b11], [0.1, 0.2])
+        >>> print('%.2f %.2f' % (bounds.low, bounds.high))
+        0.02 0.02
+    """
+    q = asarray(q, dtype=float)
+    cutfails = allfail(cuts, q)
+    high = -expm1(log1p(-cutfails).sum(axis=0))
+    with errstate(divide='ignore'):
+        low = exp(log(anyfail(paths, q)).sum(axis=0))
+    return _middle(minimum(low, high), high)
+
+
+def rareevent(cuts, q):
+    r""" Compute the rare-event approximation of the probability of failure
+
+        The approximation :math:`\sum_C Q_C` is an upper bound, very close to
+        the probability when the cuts are unlikely.
+
+        Parameters
+        ----------
+        cuts : list of int
+            the minimal cuts, as bitmasks
+        q : array
+            `q[i]` is the probability of the component `i` to fail, at each
+            time
+
+        Returns
+        -------
+        out : Bounds
+            the approximation, bounded by :math:`\max_C Q_C` and
+            :math:`\min(1, \sum_C Q_C)`
+
+        Examples
+        --------
+        >>> bounds = rareevent([0b01, 0b10], [1e-3, 2e-3])
+        >>> print('%.2e' % bounds.value)
+        3.00e-03
+    """
+    q = asarray(q, dtype=float)
+    cutfails = allfail(cuts, q)
+    low = cutfails.max(axis=0) if len(cuts) else zeros(q.shape[1:])
+    value = minimum(cutfails.sum(axis=0), 1)
+    low, high = _widened(low, value)
+    return Bounds(value, low, high)
+
+
+def bonferroni(cuts, q, order=2):
+    r""" Bound the probability of failure by truncated inclusion-exclusion
+
+        Let :math:`S_k` be the sum, over the sets of `k` minimal cuts, of the
+        probability of all their components to fail. The partial sums
+        :math:`\sum_{j \le k} (-1)^{j+1} S_j` are upper bounds of the
+        probability for odd `k`, and lower bounds for even `k`. The unions
+        of the same components are only evaluated once.
+
+        Parameters
+        ----------
+        cuts : list of int
+            the minimal cuts, as bitmasks
+        q : array
+            `q[i]` is the probability of the component `i` to fail, at each
+            time
+        order : int, optional
+            the largest number of cuts whose union is expanded. The
+            :math:`\binom{m}{k}` unions of `k` of the `m` cuts are listed,
+            for each `k` up to `order`.
+
+        Returns
+        -------
+        out : Bounds
+            the tightest bounds of the partial sums, exact once `order`
+            reaches the number of cuts
+
+        Examples
+        --------
+        >>> cuts = [0b001, 0b110]
+        >>> bounds = bonferroni(cuts, [0.1, 0.2, 0.3], order=1)
+        >>> print('%.3f %.3f' % (bounds.low, bounds.high))
+        0.000 0.160
+        >>> bounds = bonferroni(cuts, [0.1, 0.2, 0.3], order=2)
+        >>> print('%.3f %.3f' % (bounds.low, bounds.high))
+        0.154 0.154
+    """
+    if order < 1:
+        raise ValueError(u'order must be at least 1')
+    q = asarray(q, dtype=float)
+    low, high = zeros(q.shape[1:]), zeros(q.shape[1:]) + 1
+    partial, magnitude = zeros(q.shape[1:]), zeros(q.shape[1:])
+    for k in range(1, min(order, len(cuts)) + 1):
+        unions = {}
+        for chosen in combinations(cuts, k):
+            union = 0
+            for cut in chosen:
+                union |= cut
+            unions[union] = unions.get(union, 0) + 1
+        masks = list(unions)
+        counts = asarray([unions[mask] for mask in masks], dtype=float)
+        term = counts.dot(allfail(masks, q))
+        partial = partial + (-1) ** (k + 1) * term
+        magnitude = magnitude + term
+        if k % 2:
+            high = minimum(high, partial)
+        else:
+            low = maximum(low, partial)
+    if order >= len(cuts): #the expansion is complete
+        low = high = minimum(maximum(partial, 0), 1)
+    return _middle(low, high, magnitude)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Caches of the structures of the systems
+
+What a system computes from its reliability diagram only (success paths,
+minimal cuts, compiled structure functions) does not depend on its
+components. These structures are computed in the canonical numbering of the
+components (see :mod:`fiabilipy.canonical`) and keyed by the shape of the
+diagram, so they are shared by all the systems having the same shape:
+
+* in memory, by the systems of the same process, once :py:func:`setshared`
+  is called,
+* when a persistent cache is set (see :py:func:`setcache`), through an
+  SQLite database, so a diagram built again (in another run, or by another
+  process) does not need to be compiled again.
+
+The structures are stored as pickles of plain python objects (bitmasks,
+binary decision diagrams, …), so loading them does not import sympy. As any
+pickle, the database must only be shared with trusted users.
+
+The cache can also be set through the environment variable
+`FIABILIPY_CACHE`, giving the path of the database.
+
+Without any cache, the canonical numbering, whose cost grows quadratically
+with the number of components, is not computed, and the structures are
+computed in the order of the components of each system.
+
+"""
+from builtins import object
+
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+
+__all__ = ['MemoryCache', 'DiskCache', 'setshared', 'setcache']
+
+#The version of the stored structures, changed when they can not be read
+#by older versions anymore
+VERSION = 2
+
+#The structures shared by the systems of the process, if any
+SHARED = None
+
+#The persistent cache used by the systems, if any
+CACHE = None
+
+
+class MemoryCache(object):
+    r""" A dictionnary keeping its `maxentries` most recently used entries
+
+        The values are not copied, the same object is given to every system
+        asking for it.
+
+        Parameters
+        ----------
+        maxentries : int
+            the maximal number of stored values
+
+        Examples
+        --------
+        >>> cache = MemoryCache(2)
+        >>> cache.put('paths', [5, 6])
+        >>> cache.put('cuts', [4, 3])
+        >>> cache.get('paths')
+        [5, 6]
+        >>> cache.put('bdd', None)
+        >>> cache.get('cuts') is None
+        True
+        >>> len(cache)
+        2
+    """
+
+    def __init__(self, maxentries):
+        self.maxentries = maxentries
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        r""" Return the value stored for `key`, or `default` """
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return default
+        self._entries[key] = value
+        return value
+
+    def put(self, key, value):
+        r""" Store `value` for `key`, removing the least recently used entry
+            if the cache is full
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        while len(self._entries) > self.maxentries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        r""" Remove all the stored values """
+        self._entries.clear()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache(object):
+    r""" A size-bounded persistent dictionnary, stored in an SQLite database
+
+        The least recently used entries are removed when the total size of
+        the stored values exceeds `maxsize`. The database can be used at the
+        same time by several processes.
+
+        Parameters
+        ----------
+        path : str
+            the path of the database, created if needed
+        maxsize : int, optional
+            the maximal size of the stored values, in bytes
+
+        Examples
+        --------
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+        >>> cache = DiskCache(path, maxsize=1000)
+        >>> cache.put('paths', [5, 6])
+        >>> cache.get('paths')
+        [5, 6]
+        >>> cache.get('cuts') is None
+        True
+    """
+
+    def __init__(self, path, maxsize=2**28):
+        self.path = path
+        self.maxsize = maxsize
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        #the connection is opened again by each process
+        return {'path': self.path, 'maxsize': self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['maxsize'])
+
+    def _connect(self):
+        #a connection must not be shared by several processes (after a fork)
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60,
+                                         isolation_level=None)
+            #readers do not block the writer, nor the writer the readers
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS entries '
+                               '(key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                               'size INTEGER NOT NULL, used REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS lru '
+                               'ON entries (used)')
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, key, default=None):
+        r""" Return the value stored for `key`, or `default` """
+        connection = self._connect()
+        row = connection.execute('SELECT value FROM entries WHERE key = ?',
+                                 (key,)).fetchone()
+        if row is None:
+            return default
+        try:
+            value = pickle.loads(bytes(row[0]))
+        except Exception: #written by an incompatible version
+            self.discard(key)
+            return default
+        connection.execute('UPDATE entries SET used = ? WHERE key = ?',
+                           (time.time(), key))
+        return value
+
+    def put(self, key, value):
+        r""" Store `value` for `key`, removing the least recently used
+            entries if the cache is full. A value larger than the whole cache
+            is not stored.
+        """
+        data = pickle.dumps(value, 2)
+        if len(data) > self.maxsize:
+            return
+        connection = self._connect()
+        #the writers are serialized, so the size is computed consistently
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('INSERT OR REPLACE INTO entries '
+                               'VALUES (?, ?, ?, ?)',
+                               (key, sqlite3.Binary(data), len(data),
+                                time.time()))
+            total, = connection.execute('SELECT SUM(size) FROM entries'
+                                        ).fetchone()
+            if total > self.maxsize:
+                oldest = connection.execute('SELECT key, size FROM entries '
+                                            'WHERE key != ? ORDER BY used',
+                                            (key,))
+                removed = []
+                for old, size in oldest:
+                    if total <= self.maxsize:
+                        break
+                    removed.append((old,))
+                    total -= size
+                connection.executemany('DELETE FROM entries WHERE key = ?',
+                                       removed)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def discard(self, key):
+        r""" Remove the value stored for `key`, if any """
+        self._connect().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def clear(self):
+        r""" Remove all the stored values """
+        self._connect().execute('DELETE FROM entries')
+
+    def __contains__(self, key):
+        row = self._connect().execute('SELECT 1 FROM entries WHERE key = ?',
+                                      (key,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM entries'
+                                       ).fetchone()[0]
+
+    @property
+    def size(self):
+        r""" The total size of the stored values, in bytes """
+        return self._connect().execute('SELECT COALESCE(SUM(size), 0) '
+                                       'FROM entries').fetchone()[0]
+
+
+def setshared(maxentries=4096):
+    r""" Set how many structures are shared in memory by the systems having
+        the same shape
+
+        Parameters
+        ----------
+        maxentries : int, optional
+            the maximal number of structures kept (a system keeps one for
+            each engine it used). If 0, nothing is shared.
+
+        Examples
+        --------
+        >>> setshared()
+        >>> setshared(0)
+    """
+    global SHARED
+    SHARED = MemoryCache(maxentries) if maxentries else None
+
+
+def setcache(path=None, maxsize=2**28):
+    r""" Set the persistent cache of the structures of the systems
+
+        Parameters
+        ----------
+        path : str, optional
+            the path of the SQLite database, created if needed. If not given,
+            no persistent cache is used anymore.
+        maxsize : int, optional
+            the maximal size of the stored structures, in bytes
+
+        Examples
+        --------
+        >>> import os, tempfile
+        >>> setcache(os.path.join(tempfile.mkdtemp(), 'cache.sqlite'))
+        >>> setcache(None)
+    """
+    global CACHE
+    CACHE = DiskCache(path, maxsize) if path is not None else None
+
+
+if os.environ.get('FIABILIPY_CACHE'):
+    setcache(os.environ['FIABILIPY_CACHE'])
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Canonical form of reliability diagrams
+
+Two diagrams having the same shape, whatever the names of their components
+and the order they were inserted in, are given the same canonical numbering
+of their components. What is compiled from the diagram (success paths,
+minimal cuts, structure functions) can then be computed once, in the
+canonical numbering, and shared by all the systems of the same shape.
+
+The numbering is found by refining the partition of the nodes according to
+the number of their predecessors and successors in each part, until every
+node is alone in its part. When the parts stop splitting, a node of the
+first part left is singled out (individualization-refinement, as done by
+graph isomorphism tools such as nauty, without their search tree).
+
+The canonical form is the list of the links of the renumbered diagram, so
+two systems with the same canonical form always have the same shape. For
+most diagrams met in practice (series-parallel arrangements, bridges, k-out-
+of-n voters, …) the converse is true too. A few highly symmetric diagrams
+may be given different canonical forms when their components are inserted
+in another order: they are then compiled again, as if their shapes differed.
+
+"""
+from builtins import object
+
+from collections import deque
+
+from fiabilipy.bitset import indices
+
+__all__ = ['canonicalorder', 'Relabeled']
+
+
+def _refine(cells, cellof, queue, successors, predecessors):
+    r""" Split the cells of a partition until it is equitable
+
+        Two nodes stay in the same cell if they have the same number of
+        successors and of predecessors in each cell. The cells are split in
+        the order of their keys, and the new cells are keyed after the
+        numbers they were split on, so the keys do not depend on the names
+        of the nodes. A cell is used to split the others only if it is not
+        the largest part of the cell it comes from (Hopcroft).
+    """
+    queued = set(queue)
+    while queue:
+        key = queue.popleft()
+        if key not in queued: #split while waiting, its parts are queued
+            continue
+        queued.discard(key)
+        splitter = cells[key]
+        for tag, links in enumerate((predecessors, successors)):
+            counts = {}
+            for v in splitter:
+                for u in links[v]:
+                    counts[u] = counts.get(u, 0) + 1
+            touched = set(cellof[u] for u in counts)
+            for old in sorted(touched):
+                members = cells[old]
+                if len(members) == 1:
+                    continue
+                groups = {}
+                for u in members:
+                    groups.setdefault(counts.get(u, 0), []).append(u)
+                if len(groups) == 1:
+                    continue
+                del cells[old]
+                fragments = [old + ((tag, n),) for n in sorted(groups)]
+                for new, n in zip(fragments, sorted(groups)):
+                    cells[new] = groups[n]
+                    for u in groups[n]:
+                        cellof[u] = new
+                if old in queued:
+                    queued.discard(old)
+                else:
+                    largest = max(fragments, key=lambda k: len(cells[k]))
+                    fragments.remove(largest)
+                for new in fragments:
+                    queue.append(new)
+                    queued.add(new)
+    return [cells[key] for key in sorted(cells)]
+
+
+def canonicalorder(successors):
+    r""" Number the nodes of a reliability diagram canonically
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram.
+
+        Returns
+        -------
+        out : tuple
+            `(order, form)`: `order` is the list of the nodes (except `'E'`
+            and `'S'`) in canonical order, and `form` the sorted tuple of the
+            links `(u, v)` of the diagram, `'E'` being numbered 0, the nodes
+            of `order` from 1, and `'S'` last.
+
+        Examples
+        --------
+        >>> order, form = canonicalorder({'E': ['a', 'b'], 'a': ['c'],
+        ...                               'b': ['S'], 'c': ['S']})
+        >>> order
+        ['c', 'a', 'b']
+        >>> form
+        ((0, 2), (0, 3), (1, 4), (2, 1), (3, 4))
+        >>> canonicalorder({'E': ['x', 'y'], 'x': ['S'], 'y': ['z'],
+        ...                 'z': ['S']})[1] == form
+        True
+    """
+    predecessors = dict((u, []) for u in successors)
+    for u, succ in successors.items():
+        for v in succ:
+            predecessors.setdefault(v, []).append(u)
+    links = dict((u, list(successors.get(u, ()))) for u in predecessors)
+
+    others = [u for u in links if u not in ('E', 'S')]
+    cells = [[u] for u in ('E',) if u in links] + [others] \
+          + [[u] for u in ('S',) if u in links]
+    cells = [cell for cell in cells if cell]
+    queue = list(range(len(cells)))
+    while True:
+        keyed = dict(((i,), cell) for i, cell in enumerate(cells))
+        cellof = dict((u, (i,)) for i, cell in enumerate(cells) for u in cell)
+        cells = _refine(keyed, cellof, deque((i,) for i in queue),
+                        links, predecessors)
+        split = next((i for i, cell in enumerate(cells) if len(cell) > 1),
+                     None)
+        if split is None:
+            break
+        #single out a node of the first cell left, the node being chosen by
+        #name only so the result is reproducible
+        cell = sorted(cells[split], key=repr)
+        cells[split:split + 1] = [cell[:1], cell[1:]]
+        queue = [split]
+
+    label = dict((cell[0], i) for i, cell in enumerate(cells))
+    order = [cell[0] for cell in cells if cell[0] not in ('E', 'S')]
+    form = tuple(sorted((label[u], label[v])
+                        for u in links for v in links[u]))
+    return order, form
+
+
+class Relabeled(object):
+    r""" A compiled structure function of the canonical diagram, used by a
+        system numbering its components in another order
+
+        Parameters
+        ----------
+        compiled : object
+            the compiled structure function, its `probability` method (and
+            `derivatives`, if any) taking the probabilities of the components
+            in canonical order as last argument
+        order : list
+            `order[k]` is the index, in the system, of the `k`-th component
+            in canonical order
+
+        Examples
+        --------
+        >>> from fiabilipy.sdp import SDP
+        >>> compiled = Relabeled(SDP([[0], [1, 2]]), [2, 0, 1])
+        >>> compiled.probability([0.0, 1.0, 0.0])
+        0.0
+        >>> compiled.probability([1.0, 0.0, 1.0])
+        1.0
+    """
+
+    def __init__(self, compiled, order):
+        self.compiled = compiled
+        self.order = list(order)
+
+    def __len__(self):
+        return len(self.compiled)
+
+    def _values(self, values):
+        return [values[i] for i in self.order]
+
+    def probability(self, *args):
+        r""" Compute the probability of the structure function, the last
+            argument being the probabilities of the components of the system
+        """
+        args = args[:-1] + (self._values(args[-1]),)
+        return self.compiled.probability(*args)
+
+    def derivatives(self, root, values):
+        r""" Compute the probability of the structure function and its
+            derivatives, with respect to the components of the system
+        """
+        prob, derivatives = self.compiled.derivatives(root,
+                                                      self._values(values))
+        return prob, dict((self.order[k], d) for k, d in derivatives.items())
+
+    def mask(self, mask):
+        r""" Convert a bitmask of canonical indices to the indices of the
+            system
+
+            >>> Relabeled(None, [2, 0, 1]).mask(0b011)
+            5
+        """
+        return sum(1 << self.order[k] for k in indices(mask))
@@ -27,9 +27,53 @@ from __future__ import division
 from builtins import object
 from past.utils import old_div
 
-from sympy import exp, Symbol, oo
+import sys
+
+from numpy import exp as npexp, expm1 as npexpm1, where, asarray, zeros
+
+from fiabilipy.expsum import ExpSum
+
+__all__ = ['Component', 'setnumeric']
+
+#Whether the components and the systems compute with numpy by default
+NUMERIC = False
+
+
+def setnumeric(numeric=True):
+    r""" Choose whether the components and the systems compute with numpy by
+        default
+
+        In numeric mode, the metrics of the components and of the systems are
+        floats (or numpy arrays), computed with numpy only. Sympy is only used
+        when a symbolic expression is explicitly asked for (`t` being a
+        Symbol). The mode of a component or a system may also be chosen when
+        it is built, through its `numeric` argument.
+
+        Parameters
+        ----------
+        numeric : bool, optional
+            the default mode
+
+        Examples
+        --------
+        >>> setnumeric()
+        >>> Component('M', 1e-4, 3e-2).reliability(1000)
+        0.9048374180359595
+        >>> setnumeric(False)
+    """
+    global NUMERIC
+    NUMERIC = bool(numeric)
+
+
+def _usenumpy(obj, t=None):
+    r""" Tell whether `obj` (a component or a system) must compute with numpy
+        at `t`
+    """
+    numeric = NUMERIC if obj.numeric is None else obj.numeric
+    #a symbolic `t` can only exist if sympy has been imported
+    sympy = sys.modules.get('sympy')
+    return numeric and not (sympy and isinstance(t, sympy.Basic))
 
-__all__ = ['Component']
 
 class Component(object):
     r""" Describe a component with a constant failure rate.
@@ -47,6 +91,9 @@ class Component(object):
             the constant maintainability rate of the component
         initialy_avaible : boolean, optional
             whether the component is avaible at t=0 or not
+        numeric : boolean, optional
+            whether the metrics are computed with numpy only (see
+            :py:func:`setnumeric`, which gives the default mode)
 
         Examples
         --------
@@ -55,12 +102,14 @@ class Component(object):
         0.0001
     """
 
-    def __init__(self, name, lambda_, mu=0, initialy_avaible=True):
+    def __init__(self, name, lambda_, mu=0, initialy_avaible=True,
+                 numeric=None):
         self.__dict__["_systems"] = set()
         self.lambda_ = lambda_
         self.mu = mu
         self.name = name
         self.initialy_avaible = initialy_avaible
+        self.numeric = numeric
 
     def __lt__(self,other):
         if(isinstance(other, str)):
@@ -69,9 +118,15 @@ class Component(object):
             return self.name < other.name
 
     def __setattr__(self, name, value):
-        for system in self._systems:
-            system._cache = {}
         self.__dict__[name] = value
+        self._invalidate()
+
+    def _invalidate(self):
+        r""" Tell the systems (and voters) using this component that its
+            parameters have changed.
+        """
+        for system in self._systems:
+            system._invalidate()
 
     def __repr__(self):
         return u'Component(%s)' % self.name
@@ -95,6 +150,7 @@ class Component(object):
 
             Examples
             --------
+            >>> from sympy import Symbol
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> t = Symbol('t', positive=True)
             >>> motor.reliability(t)
@@ -102,6 +158,9 @@ class Component(object):
             >>> motor.reliability(1000)
             0.904837418035960
         """
+        if _usenumpy(self, t):
+            return self._numeric('reliability', t)
+        from sympy import exp
         return exp(-self.lambda_ * t)
 
     def maintainability(self, t):
@@ -120,6 +179,7 @@ class Component(object):
 
             Examples
             --------
+            >>> from sympy import Symbol
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> t = Symbol('t', positive=True)
             >>> motor.maintainability(t)
@@ -127,6 +187,9 @@ class Component(object):
             >>> motor.maintainability(1000)
             0.999999999999906
         """
+        if _usenumpy(self, t):
+            return self._numeric('maintainability', t)
+        from sympy import exp
         return 1.0 - exp(-self.mu * t)
 
     def availability(self, t):
@@ -145,6 +208,7 @@ class Component(object):
 
             Examples
             --------
+            >>> from sympy import Symbol
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> t = Symbol('t', positive=True)
             >>> motor.availability(t)
@@ -152,6 +216,9 @@ class Component(object):
             >>> motor.availability(1000)
             0.996677740863788
         """
+        if _usenumpy(self, t):
+            return self._numeric('availability', t)
+        from sympy import exp
         if self.mu == self.lambda_ == 0:
             return 1
         a = old_div(self.mu, (self.mu + self.lambda_))
@@ -162,6 +229,90 @@ class Component(object):
 
         return a + b*exp(-(self.lambda_ + self.mu) * t)
 
+    def _expsum(self, method, exact=True):
+        r""" Return the `method` (reliability, availability or
+            maintainability) of the component as a sum of exponentials (see
+            :py:class:`fiabilipy.expsum.ExpSum`), exact or made of floats.
+        """
+        if method == 'reliability':
+            return ExpSum.exponential(self.lambda_, exact=exact)
+        elif method == 'maintainability':
+            return 1 - ExpSum.exponential(self.mu, exact=exact)
+        if self.mu == self.lambda_ == 0:
+            return ExpSum.coerce(1, exact)
+        total = self.mu + self.lambda_
+        if self.initialy_avaible:
+            b = old_div(self.lambda_, total)
+        else:
+            b = old_div(- self.mu, total)
+        return old_div(self.mu, total) + ExpSum.exponential(total, b, exact)
+
+    def _rates(self):
+        r""" Return the failure and maintainability rates used by
+            :py:meth:`_vectorized`, as floats
+        """
+        return float(self.lambda_), float(self.mu)
+
+    def _numeric(self, method, t):
+        r""" Compute the `method` (reliability, availability or
+            maintainability) of the component at `t` with numpy only. A float
+            is returned for a single time.
+        """
+        t = asarray(t, dtype=float)
+        value = self._vectorized(method, t, *self._rates()) + zeros(t.shape)
+        return value if value.shape else float(value)
+
+    def _vectorized(self, method, t, lambda_, mu):
+        r""" Compute the `method` (reliability, availability or
+            maintainability) of the component with numpy, for the failure rates
+            `lambda_` and the maintainability rates `mu` instead of the
+            component’s ones.
+
+            `t`, `lambda_` and `mu` are arrays broadcast against each other.
+        """
+        if method == 'reliability':
+            return npexp(-lambda_ * t)
+        elif method == 'maintainability':
+            return 1.0 - npexp(-mu * t)
+        total = lambda_ + mu
+        #a component which never fails nor gets repaired is always available
+        safe = where(total == 0, 1, total)
+        a = where(total == 0, 1, mu / safe)
+        if self.initialy_avaible:
+            b = lambda_ / safe
+        else:
+            b = - mu / safe
+        return a + b*npexp(-total * t)
+
+    def _numericfailure(self, method, t):
+        r""" Compute one minus the `method` (reliability, availability or
+            maintainability) of the component at `t` with numpy only, without
+            subtracting from one, so the tiny probabilities of failure stay
+            accurate. A float is returned for a single time.
+        """
+        t = asarray(t, dtype=float)
+        value = self._vectorizedfailure(method, t, *self._rates()) \
+              + zeros(t.shape)
+        return value if value.shape else float(value)
+
+    def _vectorizedfailure(self, method, t, lambda_, mu):
+        r""" Compute one minus the `method` (reliability, availability or
+            maintainability) of the component with numpy, as
+            :py:meth:`_vectorized` does for the `method` itself.
+        """
+        if method == 'reliability':
+            return -npexpm1(-lambda_ * t)
+        elif method == 'maintainability':
+            return npexp(-mu * t)
+        total = lambda_ + mu
+        #a component which never fails nor gets repaired is always available
+        safe = where(total == 0, 1, total)
+        if self.initialy_avaible:
+            failure = -lambda_ / safe * npexpm1(-total * t)
+        else:
+            failure = (lambda_ + mu * npexp(-total * t)) / safe
+        return where(total == 0, 0, failure)
+
     @property
     def mttf(self):
         r""" Compute the Mean-Time-To-Failure of the component
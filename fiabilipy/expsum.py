@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Sums of exponentials
+
+With constant failure and maintainability rates, the reliability, the
+availability and the maintainability of any system are sums of exponentials
+
+.. math::
+
+    f(t) = \sum_i c_i e^{-a_i t}
+
+so their integral from `0` to :math:`\infty` is simply
+:math:`\sum_i c_i / a_i`. This module handles such sums, which are closed
+under addition and multiplication, so the MTTF and the MTTR are computed
+without any symbolic integration.
+
+"""
+from builtins import range
+from builtins import object
+
+__all__ = ['ExpSum']
+
+
+#sympy is only needed by the exact sums, it is imported on first use
+def _exact(rate):
+    r""" Convert a rate to an exact number, so equal exponents are merged """
+    from sympy import sympify, Rational
+    if isinstance(rate, float):
+        return Rational(repr(rate))
+    return sympify(rate)
+
+
+class ExpSum(object):
+    r""" A sum of exponentials :math:`\sum_i c_i e^{-a_i t}`
+
+        Parameters
+        ----------
+        terms : dict, optional
+            `terms[a]` is the coefficient :math:`c` of :math:`e^{-a t}`
+        exact : bool, optional
+            if true (default), the exponents and the coefficients are sympy
+            numbers or expressions, the float rates being converted to
+            rationals. Otherwise, they are floats.
+
+        Examples
+        --------
+        >>> R = ExpSum.exponential(1e-4)
+        >>> R * R
+        ExpSum({1/5000: 1})
+        >>> (2*R - R*R).integral()
+        15000
+        >>> R = ExpSum.exponential(1e-4, exact=False)
+        >>> (2*R - R*R).integral()
+        15000.0
+    """
+
+    def __init__(self, terms=None, exact=True):
+        self.terms = {}
+        self.exact = exact
+        for exponent, coefficient in (terms or {}).items():
+            self._add(exponent, coefficient)
+
+    def _add(self, exponent, coefficient):
+        coefficient = self.terms.get(exponent, 0) + coefficient
+        if self.exact:
+            from sympy import sympify
+            coefficient = sympify(coefficient)
+            zero = coefficient.is_zero
+        else:
+            zero = coefficient == 0
+        if zero:
+            self.terms.pop(exponent, None)
+        else:
+            self.terms[exponent] = coefficient
+
+    @classmethod
+    def exponential(cls, rate, coefficient=1, exact=True):
+        r""" Build :math:`c e^{-a t}` from the rate `a` and the coefficient
+            `c`
+        """
+        if exact:
+            return cls({_exact(rate): coefficient})
+        return cls({float(rate): float(coefficient)}, exact=False)
+
+    @classmethod
+    def coerce(cls, value, exact=True):
+        r""" Convert a constant to a sum of exponentials """
+        if isinstance(value, cls):
+            return value
+        return cls.exponential(0, value, exact)
+
+    def __repr__(self):
+        return u'ExpSum(%s)' % self.terms
+
+    def __add__(self, other):
+        result = ExpSum(self.terms, self.exact)
+        for exponent, coefficient in self._coerce(other).terms.items():
+            result._add(exponent, coefficient)
+        return result
+
+    __radd__ = __add__
+
+    def _coerce(self, value):
+        return ExpSum.coerce(value, self.exact)
+
+    def __neg__(self):
+        return ExpSum(dict((a, -c) for a, c in self.terms.items()),
+                      self.exact)
+
+    def __sub__(self, other):
+        return self + (-self._coerce(other))
+
+    def __rsub__(self, other):
+        return self._coerce(other) + (-self)
+
+    def __mul__(self, other):
+        result = ExpSum(exact=self.exact)
+        for a, c in self.terms.items():
+            for b, d in self._coerce(other).terms.items():
+                result._add(a + b, c * d)
+        return result
+
+    __rmul__ = __mul__
+
+    def __pow__(self, n):
+        result = self._coerce(1)
+        for _ in range(n):
+            result = result * self
+        return result
+
+    def expression(self, t):
+        r""" Return the sum as a symbolic expression of `t` """
+        from sympy import exp
+        return sum(c * exp(-a * t) for a, c in self.terms.items())
+
+    def integral(self):
+        r""" Compute the integral of the sum from `0` to :math:`\infty`
+
+            Returns
+            -------
+            out : number or symbolic expression
+                :math:`\sum_i c_i / a_i`, infinite if the sum has a constant
+                term
+        """
+        if not self.exact:
+            if 0 in self.terms:
+                return float('inf')
+            return sum((c / a for a, c in self.terms.items()), 0.0)
+        from sympy import sympify, oo
+        if 0 in self.terms:
+            return oo
+        return sum((c / a for a, c in self.terms.items()), sympify(0))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Factoring (pivotal decomposition)
+
+This module computes the structure function of a diagram by conditioning on
+the state of a pivot node:
+
+.. math::
+
+    R(G) = p_u R(G | u \text{ works}) + (1 - p_u) R(G | u \text{ fails})
+
+When `u` works, it is contracted (its predecessors are directly linked to its
+successors). When it fails, it is deleted. Series-parallel reductions are
+applied at each step, and the subproblems are memoized, so a subdiagram met
+several times is only solved once.
+
+"""
+from builtins import object
+
+from fiabilipy.reduction import reduce_graph, blockprobability
+
+__all__ = ['Factoring']
+
+
+class Factoring(object):
+    r""" The structure function of a diagram, compiled by factoring.
+
+        The result is a decision diagram: each internal node conditions on a
+        block (a component, or a series-parallel block of components), the
+        leaves are blocks whose probability is computed directly.
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram,
+            every other node is a variable (an int).
+
+        Examples
+        --------
+        The bridge is the simplest diagram which is not series-parallel.
+
+        >>> bridge = {'E': [0, 1], 0: [2, 4], 1: [3], 4: [3], 2: ['S'],
+        ...           3: ['S']}
+        >>> f = Factoring(bridge)
+        >>> f.probability([0.5] * 5)
+        0.46875
+    """
+
+    def __init__(self, successors):
+        #each node is either a boolean, ('leaf', block) or
+        #('pivot', block, high, low), high and low being indices of nodes.
+        self._nodes = []
+        self._memo = {}
+        graph = dict((u, set(v)) for u, v in successors.items())
+        blocks = {}
+        for u, succ in graph.items():
+            blocks.update((v, ('var', v)) for v in set(succ) | set([u])
+                          if v not in ('E', 'S'))
+        self._root = self._factor(graph, blocks)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _add(self, node):
+        self._nodes.append(node)
+        return len(self._nodes) - 1
+
+    def _factor(self, graph, blocks):
+        reduce_graph(graph, blocks)
+
+        #two subproblems are the same if they link the same blocks the same
+        #way, whatever the names of the nodes holding them.
+        name = lambda u: blocks.get(u, u)
+        key = frozenset((name(u), frozenset(name(v) for v in succ))
+                        for u, succ in graph.items())
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+
+        if 'S' in graph.get('E', ()):
+            node = self._add(True)
+        elif not blocks:
+            node = self._add(False)
+        elif len(blocks) == 1:
+            node = self._add(('leaf', next(iter(blocks.values()))))
+        else:
+            degree = dict((u, len(graph[u])) for u in blocks)
+            for u in graph:
+                for v in graph[u]:
+                    if v in degree:
+                        degree[v] += 1
+            #pivoting next to `E` keeps the subproblems alike (they only
+            #differ around `E`), so the memoization is much more efficient.
+            pivot = min((u for u in graph['E'] if u in blocks),
+                        key=lambda u: (-degree[u], u))
+            predecessors = [u for u in graph if pivot in graph[u]]
+
+            #the pivot works: it is contracted
+            works = dict((u, set(v) - set([pivot]))
+                         for u, v in graph.items() if u != pivot)
+            for u in predecessors:
+                works[u] |= graph[pivot]
+            wblocks = dict((u, b) for u, b in blocks.items() if u != pivot)
+            high = self._factor(works, wblocks)
+
+            #the pivot fails: it is deleted
+            fails = dict((u, set(v) - set([pivot]))
+                         for u, v in graph.items() if u != pivot)
+            fblocks = dict((u, b) for u, b in blocks.items() if u != pivot)
+            low = self._factor(fails, fblocks)
+
+            node = self._add(('pivot', blocks[pivot], high, low))
+
+        self._memo[key] = node
+        return node
+
+    def probability(self, values):
+        r""" Compute the probability of the diagram to work
+
+            Each node of the decision diagram is evaluated once.
+
+            Parameters
+            ----------
+            values : list
+                `values[i]` is the probability of the variable `i` to be true.
+                It may be a float, a numpy array or a symbolic expression.
+
+            Returns
+            -------
+            out : float, array or symbolic expression
+                the probability of the diagram to work
+        """
+        prob = []
+        #children are always added before their parents
+        for node in self._nodes:
+            if node is True or node is False:
+                prob.append(int(node))
+            elif node[0] == 'leaf':
+                prob.append(blockprobability(node[1], values))
+            else:
+                _, block, high, low = node
+                p = blockprobability(block, values)
+                prob.append(p * prob[high] + (1 - p) * prob[low])
+        return prob[self._root]
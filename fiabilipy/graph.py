@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Compact directed graphs
+
+The reliability diagrams are stored with integer nodes: each node (the name
+of a component, `'E'` or `'S'`) is given an integer id when it is inserted,
+and the links are kept in two arrays of ids. When the graph is read, the
+links are sorted once into compressed sparse rows (CSR): the successors of
+the node `u` are `indices[indptr[u]:indptr[u + 1]]`.
+
+The nodes and the successors of each node keep their insertion order, as in
+a networkx graph, which can still be built by :py:meth:`Graph.tonetworkx`.
+
+"""
+from builtins import object
+
+from array import array
+from time import time
+
+from numpy import asarray, unique, argsort, bincount, cumsum, zeros, \
+                  concatenate, repeat, arange, diff, int64
+
+__all__ = ['Graph']
+
+
+class Graph(object):
+    r""" A directed graph, its nodes being interned to integer ids
+
+        Examples
+        --------
+        >>> graph = Graph()
+        >>> graph.addedges([('E', 'A'), ('E', 'B'), ('A', 'S'), ('B', 'S')])
+        >>> graph.successors('E')
+        ['A', 'B']
+        >>> list(graph.paths('E', 'S'))
+        [['E', 'A', 'S'], ['E', 'B', 'S']]
+        >>> graph.remove('A')
+        >>> list(graph), len(graph)
+        (['E', 'B', 'S'], 3)
+    """
+
+    def __init__(self):
+        self._ids = {}          #node -> id
+        self._nodes = []        #id -> node, None once removed
+        self._sources = array('l')
+        self._targets = array('l')
+        self._csr = None
+
+    def __contains__(self, node):
+        return node in self._ids
+
+    def __iter__(self):
+        return (node for node in self._nodes if node is not None)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, node):
+        r""" Insert `node`, if needed, and return its id """
+        try:
+            return self._ids[node]
+        except KeyError:
+            self._ids[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._csr = None
+            return self._ids[node]
+
+    def addedges(self, edges):
+        r""" Insert the links `(u, v)` of `edges`, and their nodes """
+        add = self.add
+        for u, v in edges:
+            self._sources.append(add(u))
+            self._targets.append(add(v))
+        self._csr = None
+
+    def remove(self, node):
+        r""" Remove `node` and its links """
+        i = self._ids.pop(node)
+        self._nodes[i] = None
+        sources, targets = self._arrays()
+        kept = (sources != i) & (targets != i)
+        self._sources = array('l', sources[kept].tolist())
+        self._targets = array('l', targets[kept].tolist())
+        self._csr = None
+
+    def copy(self):
+        r""" Return a copy of the graph """
+        graph = Graph()
+        graph._ids = self._ids.copy()
+        graph._nodes = list(self._nodes)
+        graph._sources = array('l', self._sources)
+        graph._targets = array('l', self._targets)
+        graph._csr = self._csr #never modified, only replaced
+        return graph
+
+    def _arrays(self):
+        return (asarray(self._sources, dtype=int64),
+                asarray(self._targets, dtype=int64))
+
+    def csr(self):
+        r""" Return the graph in compressed sparse rows
+
+            Returns
+            -------
+            out : tuple
+                `(indptr, indices)`, the successors of the node of id `u`
+                being `indices[indptr[u]:indptr[u + 1]]`, in insertion order.
+                The ids of the removed nodes have no successors.
+
+            Examples
+            --------
+            >>> graph = Graph()
+            >>> graph.addedges([('E', 'A'), ('A', 'S'), ('E', 'A')])
+            >>> indptr, indices = graph.csr()
+            >>> indptr.tolist(), indices.tolist()
+            ([0, 1, 2, 2], [1, 2])
+        """
+        if self._csr is None:
+            size = len(self._nodes)
+            sources, targets = self._arrays()
+            #a link inserted again is kept at its first place
+            _, first = unique(sources * size + targets, return_index=True)
+            first.sort()
+            if len(first) < len(sources):
+                sources, targets = sources[first], targets[first]
+                self._sources = array('l', sources.tolist())
+                self._targets = array('l', targets.tolist())
+            indices = targets[argsort(sources, kind='mergesort')]
+            indptr = concatenate([zeros(1, dtype=int64),
+                                  cumsum(bincount(sources, minlength=size))])
+            self._csr = (indptr, indices)
+        return self._csr
+
+    def ids(self):
+        r""" Return the dictionnary giving the id of each node """
+        return self._ids
+
+    def nodes(self):
+        r""" Return the list giving the node of each id, `None` for the
+            removed ones
+        """
+        return self._nodes
+
+    def successors(self, node):
+        r""" Return the list of the successors of `node` """
+        indptr, indices = self.csr()
+        u = self._ids[node]
+        return [self._nodes[v]
+                for v in indices[indptr[u]:indptr[u + 1]].tolist()]
+
+    def edges(self):
+        r""" Return the list of the links `(u, v)` of the graph """
+        indptr, indices = self.csr()
+        nodes = self._nodes
+        sources = repeat(arange(len(nodes)), diff(indptr))
+        return [(nodes[u], nodes[v])
+                for u, v in zip(sources.tolist(), indices.tolist())]
+
+    def paths(self, source, target, maxlength=None, deadline=None):
+        r""" Iterate over the simple paths from `source` to `target`
+
+            The paths are found by a depth-first search, the successors
+            being explored in insertion order. A path stops at `target`.
+            Only the current path is kept in memory.
+
+            Parameters
+            ----------
+            source, target : node
+                the ends of the paths
+            maxlength : int, optional
+                only the paths having at most `maxlength` nodes between
+                `source` and `target` are given
+            deadline : float, optional
+                the search stops when `time.time()` reaches `deadline`
+
+            Returns
+            -------
+            out : iterator
+                the paths, as lists of nodes
+        """
+        indptr, indices = self.csr()
+        indptr, indices = indptr.tolist(), indices.tolist()
+        nodes = self._nodes
+        s, t = self._ids[source], self._ids[target]
+        if maxlength is None:
+            maxlength = len(nodes)
+        onpath = [False] * len(nodes)
+        path, stack = [s], [indptr[s]]
+        onpath[s] = True
+        steps = 0
+        while stack:
+            steps += 1
+            if deadline is not None and not steps % 1024 \
+               and time() >= deadline:
+                return
+            u, i = path[-1], stack[-1]
+            if i == indptr[u + 1]:
+                stack.pop()
+                onpath[path.pop()] = False
+                continue
+            stack[-1] += 1
+            v = indices[i]
+            if onpath[v]:
+                continue
+            if v == t:
+                yield [nodes[w] for w in path] + [target]
+                continue
+            if len(path) > maxlength:
+                continue
+            path.append(v)
+            stack.append(indptr[v])
+            onpath[v] = True
+
+    def countpaths(self, source, target):
+        r""" Count the paths from `source` to `target` of an acyclic graph
+
+            Each node is visited once: the number of paths from a node is the
+            sum of the numbers of paths from its successors.
+
+            Parameters
+            ----------
+            source, target : node
+                the ends of the paths
+
+            Returns
+            -------
+            out : int or None
+                the number of paths, or `None` if a cycle can be reached
+                from `source` (counting the simple paths is then as hard as
+                enumerating them)
+
+            Examples
+            --------
+            >>> graph = Graph()
+            >>> links = [('E', 0), ('E', 1), (0, 2), (1, 2), (2, 3), (2, 4),
+            ...          (3, 'S'), (4, 'S')]
+            >>> graph.addedges(links)
+            >>> graph.countpaths('E', 'S')
+            4
+            >>> graph.addedges([(4, 2)])
+            >>> graph.countpaths('E', 'S') is None
+            True
+        """
+        indptr, indices = self.csr()
+        indptr, indices = indptr.tolist(), indices.tolist()
+        s, t = self._ids[source], self._ids[target]
+        if s == t:
+            return 1
+        #iterative depth-first search, the count of a node is known once
+        #all its successors are done
+        count = [None] * len(self._nodes)
+        count[t] = 1
+        active = [False] * len(self._nodes)
+        active[s] = True
+        path, stack, total = [s], [indptr[s]], [0]
+        while stack:
+            u, i = path[-1], stack[-1]
+            if i == indptr[u + 1]:
+                stack.pop()
+                path.pop()
+                active[u] = False
+                count[u] = total.pop()
+                if total:
+                    total[-1] += count[u]
+                continue
+            stack[-1] += 1
+            v = indices[i]
+            if count[v] is not None:
+                total[-1] += count[v]
+            elif active[v]: #a cycle
+                return None
+            else:
+                path.append(v)
+                stack.append(indptr[v])
+                total.append(0)
+                active[v] = True
+        return count[s]
+
+    def tonetworkx(self):
+        r""" Return the graph as a `networkx.DiGraph`
+
+            >>> graph = Graph()
+            >>> graph.addedges([('E', 'A'), ('A', 'S')])
+            >>> sorted(graph.tonetworkx().edges())
+            [('A', 'S'), ('E', 'A')]
+        """
+        import networkx as nx
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self)
+        graph.add_edges_from(self.edges())
+        return graph
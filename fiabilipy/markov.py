@@ -21,11 +21,70 @@ from __future__ import print_function
 from builtins import range
 from builtins import object
 
-from numpy import zeros, binary_repr, where, array
-from scipy.linalg import expm
+from numpy import (zeros, binary_repr, where, array, asarray, atleast_1d,
+                   argsort, searchsorted, isin, eye, inf, fill_diagonal)
+
+from fiabilipy import montecarlo
 
 __all__ = ['Markovprocess']
 
+
+class _Gillespie(object):
+    r""" Draw samples of the state of a markov process at some times
+
+        Each history jumps from state to state after exponential sojourn
+        times (Gillespie’s algorithm), all the histories of a batch being
+        simulated together.
+
+        Parameters
+        ----------
+        matrix : array
+            the transition rates matrix of the process
+        initstates : array
+            the initial probabilities of the states
+        t : array
+            the times when the process is observed
+        states : list, optional
+            the tracked states. If not given, each state is tracked.
+    """
+
+    def __init__(self, matrix, initstates, t, states=None):
+        rates = array(matrix, dtype=float)
+        fill_diagonal(rates, 0)
+        self.cumulative = rates.cumsum(axis=1)
+        self.exits = rates.sum(axis=1)
+        self.initial = asarray(initstates, dtype=float).cumsum()
+        self.t = atleast_1d(asarray(t, dtype=float))
+        self.states = states
+
+    def _sojourn(self, state, rng):
+        exits = self.exits[state]
+        safe = where(exits > 0, exits, 1)
+        return rng.exponential(1.0, len(state)) * where(exits > 0, 1 / safe,
+                                                        inf)
+
+    def __call__(self, n, rng):
+        r""" Draw `n` samples, as an array of shape `(n, len(t))`, or
+            `(n, len(t), n_states)` when every state is tracked.
+        """
+        u = rng.random(n) * self.initial[-1]
+        state = searchsorted(self.initial, u, side='right')
+        clock = self._sojourn(state, rng)
+        observed = zeros((n, len(self.t)), dtype=int)
+        for k in argsort(self.t):
+            while True:
+                moving = where(clock <= self.t[k])[0]
+                if not len(moving):
+                    break
+                current = state[moving]
+                u = rng.random(len(moving)) * self.exits[current]
+                state[moving] = (self.cumulative[current] <= u[:, None]).sum(1)
+                clock[moving] += self._sojourn(state[moving], rng)
+            observed[:, k] = state
+        if self.states is None:
+            return eye(len(self.exits))[observed]
+        return isin(observed, self.states)
+
 class Markovprocess(object):
     """ Initialize the markov process management of the system.
 
@@ -176,17 +235,76 @@ class Markovprocess(object):
             >>> process.value(1000, states=allbutfirststates)
             0.031471429479129759
         """
+        from scipy.linalg import expm
         v = self.initstates.dot(expm(t*self.matrix))
         if not statefunc:
             return v
         else:
-            try:
-                states = self._states[statefunc]
-            except KeyError:
-                states = self._computestates(statefunc)
-                self._states[statefunc] = states
+            return v[(self._trackedstates(statefunc), )].sum()
+
+    def _trackedstates(self, statefunc):
+        r""" Return the states described by `statefunc`, computed once """
+        try:
+            return self._states[statefunc]
+        except KeyError:
+            states = self._computestates(statefunc)
+            self._states[statefunc] = states
+            return states
+
+    def simulate(self, t, statefunc=None, n_samples=10000, seed=None,
+                 confidence=0.95, workers=1, batch_size=10000, rtol=None):
+        r""" Estimate the probability of being in some states by Monte
+            Carlo simulation
+
+            Parameters
+            ----------
+            t : float or array
+                when the probability must be estimated
+            statefunc : function, optional
+                a function defining the states you want to know the
+                probability (see :py:meth:`value`). If not given, the
+                probability of each state is estimated.
+            n_samples : int, optional
+                the (maximal) number of simulated histories
+            seed : int, optional
+                the seed of the random number generator, for reproducible
+                results
+            confidence : float, optional
+                the level of the confidence intervals
+            workers : int, optional
+                the number of processes used, all the processors being used
+                if `None`. The results do not depend on it.
+            batch_size : int, optional
+                the number of histories simulated at once
+            rtol : float, optional
+                if given, the simulation stops as soon as the relative
+                standard error of the estimations is lower than `rtol`
+
+            Returns
+            -------
+            out : Estimate
+                the estimated probability, its standard error and its
+                confidence interval (see
+                :py:class:`fiabilipy.montecarlo.Estimate`)
 
-            return v[(states, )].sum()
+            Examples
+            --------
+            >>> from fiabilipy import Component
+            >>> A, B = Component('A', 1e-3, 1e-2), Component('B', 1e-3, 1e-2)
+            >>> process = Markovprocess((A, B), {0:1})
+            >>> availablefunc = lambda x: x[0] or x[1]
+            >>> estimation = process.simulate(100, availablefunc, seed=1)
+            >>> exact = process.value(100, availablefunc)
+            >>> print(estimation.low < exact < estimation.high)
+            True
+        """
+        states = None
+        if statefunc:
+            states = self._trackedstates(statefunc)
+        sampler = _Gillespie(self.matrix, self.initstates, t, states)
+        result = montecarlo.run(sampler, n_samples, seed, batch_size, workers,
+                                rtol, confidence)
+        return montecarlo.reshape(result, asarray(t).shape)
 
     def draw(self, output=None):
         r""" Print the content of the dot file needed to draw the markov process
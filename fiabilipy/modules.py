@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Modularization of reliability diagrams
+
+A module of a reliability diagram is a part of it linked to the rest through
+a single entry node `u` and a single exit node `v`: every path going through
+the module comes from `u` and goes to `v`. The module only matters through
+the probability that one of its inner paths works, so it can be evaluated on
+its own and replaced by a single super-component. This is the counterpart,
+for diagrams, of the linear-time modularization of fault trees by Dutuit and
+Rauzy.
+
+The modules are found from the dominator tree (`u` is on every path from `E`
+to the module) and from the post-dominator tree (`v` is on every path from
+the module to `S`) of the diagram.
+
+"""
+__all__ = ['topologicalorder', 'dominators', 'findmodules']
+
+
+def _predecessors(successors):
+    r""" Reverse the diagram `successors` """
+    predecessors = dict((u, []) for u in successors)
+    for u, succ in successors.items():
+        for v in succ:
+            predecessors.setdefault(v, []).append(u)
+            predecessors.setdefault(u, [])
+    return predecessors
+
+
+def topologicalorder(successors, root):
+    r""" Sort the nodes reachable from `root` topologically
+
+        Parameters
+        ----------
+        successors : dict
+            `successors[u]` is the list of the successors of `u`
+        root : node
+            the node the search starts from
+
+        Returns
+        -------
+        out : list or None
+            the nodes reachable from `root`, each one being before its
+            successors, or `None` if they are not acyclic.
+
+        Examples
+        --------
+        >>> topologicalorder({'E': [0, 1], 0: [1], 1: ['S']}, 'E')
+        ['E', 0, 1, 'S']
+        >>> topologicalorder({'E': [0], 0: [1], 1: [0, 'S']}, 'E') is None
+        True
+    """
+    #iterative depth-first search, the nodes are listed in reverse postorder
+    order, state = [], {root: 0}
+    stack = [(root, iter(successors.get(root, ())))]
+    while stack:
+        u, succ = stack[-1]
+        for v in succ:
+            if v not in state:
+                state[v] = 0
+                stack.append((v, iter(successors.get(v, ()))))
+                break
+            if state[v] == 0: #`v` is being explored: there is a cycle
+                return None
+        else:
+            stack.pop()
+            state[u] = 1
+            order.append(u)
+    order.reverse()
+    return order
+
+
+def dominators(successors, root, order=None):
+    r""" Compute the immediate dominators of an acyclic diagram
+
+        A node `u` dominates `v` if every path from `root` to `v` goes
+        through `u`. As the diagram is acyclic, a single pass over the nodes
+        in topological order is enough (Cooper, Harvey and Kennedy).
+
+        Parameters
+        ----------
+        successors : dict
+            `successors[u]` is the list of the successors of `u`
+        root : node
+            the root of the dominator tree
+        order : list, optional
+            the nodes in topological order (see :py:func:`topologicalorder`)
+
+        Returns
+        -------
+        out : dict
+            `out[v]` is the immediate dominator of `v`, for every node
+            reachable from `root` (`root` being its own dominator).
+
+        Examples
+        --------
+        >>> idom = dominators({'E': [0, 1], 0: [2], 1: [2], 2: ['S']}, 'E')
+        >>> idom[2], idom['S']
+        ('E', 2)
+    """
+    if order is None:
+        order = topologicalorder(successors, root)
+    rank = dict((u, i) for i, u in enumerate(order))
+    predecessors = _predecessors(successors)
+    idom = {root: root}
+    for v in order[1:]:
+        new = None
+        for u in predecessors[v]:
+            if u not in idom:
+                continue
+            if new is None:
+                new = u
+                continue
+            #walk up the dominator tree until both branches meet
+            while u != new:
+                while rank[u] > rank[new]:
+                    u = idom[u]
+                while rank[new] > rank[u]:
+                    new = idom[new]
+        idom[v] = new
+    return idom
+
+
+def findmodules(successors):
+    r""" Find the largest modules of a reliability diagram
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram.
+
+        Returns
+        -------
+        out : list of tuples
+            the modules, as `(u, v, nodes)` triplets, `u` and `v` being the
+            entry and the exit nodes of the module, and `nodes` the frozenset
+            of its inner nodes. The modules are disjoint, only the ones with
+            at least two nodes are given (and not the whole diagram). No
+            module is found in a diagram with cycles.
+
+        Examples
+        --------
+        >>> findmodules({'E': [0, 1], 0: [2], 1: [2], 2: ['S']})
+        [('E', 2, frozenset({0, 1}))]
+    """
+    order = topologicalorder(successors, 'E')
+    if order is None or 'S' not in order:
+        return []
+    predecessors = _predecessors(successors)
+    backward = topologicalorder(predecessors, 'S')
+    idom = dominators(successors, 'E', order)
+    ipdom = dominators(predecessors, 'S', backward)
+
+    #(u, v) delimits a module if `u` dominates `v` and `v` post-dominates
+    #`u`. The outermost modules are looked for first, their entry being the
+    #highest in the dominator tree.
+    candidates = [(idom[v], v) for v in order
+                  if v in ipdom and idom[v] != v and ipdom.get(idom[v]) == v
+                  and (idom[v], v) != ('E', 'S')]
+    depth = {'E': 0}
+    for v in order[1:]:
+        depth[v] = depth[idom[v]] + 1
+    candidates.sort(key=lambda pair: depth[pair[0]])
+
+    modules, used = [], set()
+    for u, v in candidates:
+        if u in used:
+            continue
+        nodes, stack = set(), [w for w in successors.get(u, ()) if w != v]
+        while stack:
+            w = stack.pop()
+            if w not in nodes:
+                nodes.add(w)
+                stack.extend(x for x in successors.get(w, ()) if x != v)
+        #only the nodes leading to `v` belong to the module
+        reaching, stack = set(), [w for w in predecessors[v] if w in nodes]
+        while stack:
+            w = stack.pop()
+            if w not in reaching:
+                reaching.add(w)
+                stack.extend(x for x in predecessors[w] if x in nodes)
+        nodes = reaching
+        #the nodes which lead nowhere may be linked to the rest of the
+        #diagram, the module is only kept if it is closed.
+        closed = all(set(predecessors[w]) <= nodes | set([u]) and
+                     set(successors.get(w, ())) <= nodes | set([v])
+                     for w in nodes)
+        if len(nodes) < 2 or not closed or nodes & used:
+            continue
+        used |= nodes
+        modules.append((u, v, frozenset(nodes)))
+    return modules
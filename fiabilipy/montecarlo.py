@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Monte Carlo simulation
+
+This module samples the failure and repair times of components, so the
+metrics of a system can be estimated when the exact computation is out of
+reach. All the samples of a batch are drawn and evaluated at once with numpy.
+
+The samples are drawn by batches of fixed size, each batch having its own
+random stream spawned from the seed. The batches may be spread over several
+processes, and are reduced in order, so the results only depend on the seed,
+not on the number of processes.
+
+"""
+from builtins import range, object
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+
+from numpy import (asarray, zeros, ones, where, inf, sqrt, argsort,
+                   atleast_1d, empty, stack)
+from numpy.random import SeedSequence, default_rng
+
+from fiabilipy.bitset import indices
+
+__all__ = ['Estimate', 'METRICS', 'units', 'sampleunits', 'componentstates',
+           'PathsState', 'CompiledState', 'ModularState', 'SystemSampler',
+           'CutSampler', 'estimate', 'reshape', 'run']
+
+#The metrics which can be simulated
+METRICS = ('reliability', 'availability', 'maintainability')
+
+
+class Estimate(namedtuple('Estimate', ['value', 'stderr', 'low', 'high',
+                                       'samples'])):
+    r""" The result of a simulation
+
+        Attributes
+        ----------
+        value : float or array
+            the estimated value
+        stderr : float or array
+            the standard error of the estimation
+        low, high : float or array
+            the bounds of the confidence interval
+        samples : int
+            the number of samples actually drawn
+    """
+    __slots__ = ()
+
+    @property
+    def relativeerror(self):
+        r""" The standard error divided by the estimated value (null when
+            both are null)
+        """
+        value, stderr = asarray(self.value), asarray(self.stderr)
+        safe = where(value != 0, value, 1)
+        error = where(value != 0, stderr / abs(safe), where(stderr, inf, 0))
+        return error if error.shape else float(error)
+
+
+def units(components):
+    r""" List the elementary units to sample for a list of components
+
+        A component is a single unit. A voter is made of its own unit (with
+        the voter’s rates) and of `N` units of its replicated component.
+
+        Parameters
+        ----------
+        components : list
+            the components of a system
+
+        Returns
+        -------
+        lambdas, mus : arrays
+            the failure and maintainability rates of the units
+        initial : array
+            whether each unit is available at `t = 0`
+        groups : list
+            for each component, a `(unit, inner, M)` triplet: the index of
+            its own unit, and for a voter the indices of the units of its
+            replicated component and the minimal number of them which must
+            work (`inner` is empty for a component).
+    """
+    lambdas, mus, initial, groups = [], [], [], []
+
+    def add(component):
+        lambdas.append(float(component.lambda_))
+        mus.append(float(component.mu))
+        initial.append(bool(component.initialy_avaible))
+        return len(lambdas) - 1
+
+    for component in components:
+        unit = add(component)
+        inner = []
+        if hasattr(component, 'component'): #a voter
+            inner = [add(component.component) for _ in range(component.N)]
+        groups.append((unit, inner, getattr(component, 'M', 0)))
+    return asarray(lambdas), asarray(mus), asarray(initial, dtype=bool), groups
+
+
+def _scale(rates):
+    r""" The mean durations for the given rates, infinite for null rates """
+    safe = where(rates > 0, rates, 1)
+    return where(rates > 0, 1.0 / safe, inf)
+
+
+def sampleunits(metric, t, lambdas, mus, initial, nsamples, rng):
+    r""" Sample the state of the units at the times `t`
+
+        Parameters
+        ----------
+        metric : str
+            * 'reliability': a unit works until its first failure,
+            * 'maintainability': a failed unit works once repaired,
+            * 'availability': a unit alternately fails and gets repaired,
+              starting from its initial state.
+        t : array
+            the times when the states are observed
+        lambdas, mus, initial : arrays
+            the description of the units (see :py:func:`units`)
+        nsamples : int
+            the number of samples
+        rng : numpy.random.Generator
+            the random number generator
+
+        Returns
+        -------
+        out : array of booleans
+            an array of shape `(len(t), nsamples, n_units)`, true where the
+            unit works.
+    """
+    t = atleast_1d(asarray(t, dtype=float))
+    nunits = len(lambdas)
+    states = empty((len(t), nsamples, nunits), dtype=bool)
+    if metric not in METRICS:
+        msg = u'metric must be reliability, availability or maintainability'
+        raise ValueError(msg)
+    if metric == 'reliability':
+        failure = rng.exponential(1.0, (nsamples, nunits)) * _scale(lambdas)
+        for k, tk in enumerate(t):
+            states[k] = failure > tk
+    elif metric == 'maintainability':
+        repair = rng.exponential(1.0, (nsamples, nunits)) * _scale(mus)
+        for k, tk in enumerate(t):
+            states[k] = repair <= tk
+    else:
+        up = ones((nsamples, nunits), dtype=bool) & initial
+        uptime, downtime = _scale(lambdas), _scale(mus)
+        switch = rng.exponential(1.0, up.shape) * where(up, uptime, downtime)
+        #the times are visited in increasing order, so each trajectory is
+        #simulated only once.
+        for k in argsort(t):
+            while True:
+                change = switch <= t[k]
+                if not change.any():
+                    break
+                up = up ^ change
+                duration = where(up, uptime, downtime)
+                switch = where(change,
+                               switch + rng.exponential(1.0, up.shape)
+                               * duration, switch)
+            states[k] = up
+    return states
+
+
+def componentstates(unitstates, groups):
+    r""" Compute the state of the components from the state of the units
+
+        Parameters
+        ----------
+        unitstates : array of booleans
+            the states of the units, the last axis being the units
+        groups : list
+            the description of the components (see :py:func:`units`)
+
+        Returns
+        -------
+        out : array of booleans
+            the states of the components, the last axis being the components
+    """
+    states = zeros(unitstates.shape[:-1] + (len(groups),), dtype=bool)
+    for i, (unit, inner, M) in enumerate(groups):
+        states[..., i] = unitstates[..., unit]
+        if inner:
+            working = unitstates[..., inner].sum(axis=-1)
+            states[..., i] &= working >= M
+    return states
+
+
+class PathsState(object):
+    r""" The state of a system, which works when all the components of one
+        of its success paths work.
+
+        Parameters
+        ----------
+        paths : list of int
+            the success paths, as bitmasks (see :mod:`bitset`)
+    """
+
+    def __init__(self, paths):
+        self.paths = [indices(path) for path in paths]
+
+    def __call__(self, states):
+        r""" Compute the state of the system, given the boolean arrays
+            `states[..., i]` telling whether the `i`-th component works.
+        """
+        up = zeros(states.shape[:-1], dtype=bool)
+        for path in self.paths:
+            up |= states[..., path].all(axis=-1)
+        return up
+
+
+class CompiledState(object):
+    r""" The state of a system, given by a compiled structure function
+
+        The structure function is multilinear, so its value for working (1)
+        or failed (0) components is the state of the system.
+
+        Parameters
+        ----------
+        probability : callable
+            computes the probability of the system to work, given the list of
+            the probabilities of its components to work
+    """
+
+    def __init__(self, probability):
+        self.probability = probability
+
+    def __call__(self, states):
+        r""" Compute the state of the system, given the boolean arrays
+            `states[..., i]` telling whether the `i`-th component works.
+        """
+        values = [states[..., i].astype(float)
+                  for i in range(states.shape[-1])]
+        return (self.probability(values) + zeros(states.shape[:-1])) > 0.5
+
+
+class ModularState(object):
+    r""" The state of a system made of subsystems
+
+        Parameters
+        ----------
+        structure : callable
+            the state of the system, given the state of its components (see
+            :py:class:`PathsState` and :py:class:`CompiledState`)
+        parts : list
+            for each component of the system, either `(i, None)` if it is
+            the `i`-th elementary component, or `(indices, state)` if it is a
+            subsystem made of the elementary components `indices`, whose
+            state is given by the callable `state`.
+    """
+
+    def __init__(self, structure, parts):
+        self.structure = structure
+        self.parts = parts
+
+    def __call__(self, states):
+        r""" Compute the state of the system, given the boolean arrays
+            `states[..., i]` telling whether the `i`-th elementary component
+            works.
+        """
+        columns = [states[..., i] if state is None else state(states[..., i])
+                   for i, state in self.parts]
+        return self.structure(stack(columns, axis=-1))
+
+
+class SystemSampler(object):
+    r""" Draw samples of the state of a system at some times
+
+        Parameters
+        ----------
+        components : list
+            the components of the system
+        structure : callable
+            the state of the system, given the state of its components (see
+            :py:class:`PathsState` and :py:class:`CompiledState`)
+        metric : str
+            the simulated metric (see :py:func:`sampleunits`)
+        t : array
+            the times when the system is observed
+    """
+
+    def __init__(self, components, structure, metric, t):
+        if metric not in METRICS:
+            msg = u'metric must be reliability, availability or maintainability'
+            raise ValueError(msg)
+        self.units = units(components)
+        self.structure = structure
+        self.metric = metric
+        self.t = atleast_1d(asarray(t, dtype=float))
+
+    def __call__(self, n, rng):
+        r""" Draw `n` samples, as an array of shape `(n, len(t))` """
+        lambdas, mus, initial, groups = self.units
+        unitstates = sampleunits(self.metric, self.t, lambdas, mus, initial,
+                                 n, rng)
+        states = componentstates(unitstates, groups)
+        return self.structure(states).T
+
+
+class CutSampler(object):
+    r""" Draw samples of the failure of a system, biased towards its minimal
+        cuts
+
+        The system fails when all the components of one of its minimal cuts
+        fail. Let :math:`Q_k` be the probability of the cut `k` to fail and
+        :math:`Z = \sum_k Q_k`. A cut is picked with the probability
+        :math:`Q_k / Z`, its components are made to fail, and the other
+        components fail according to their own probability. If :math:`N` is
+        the number of cuts failing in this sample, :math:`Z / N` is an
+        unbiased estimation of the failure probability of the system, whose
+        relative error does not depend on how rare the failure is (this is
+        Karp and Luby’s estimator of the probability of a union).
+
+        Parameters
+        ----------
+        cuts : list of int
+            the minimal cuts of the system, as bitmasks (see :mod:`bitset`)
+        failures : array
+            `failures[k, i]` is the probability of the `i`-th component to
+            fail at the `k`-th time
+
+        Examples
+        --------
+        Two components in parallel, failing with the probability `1e-6`.
+
+        >>> sampler = CutSampler([3], [[1e-6, 1e-6]])
+        >>> sampler(2, default_rng(0))
+        array([[1.e-12],
+               [1.e-12]])
+    """
+
+    def __init__(self, cuts, failures):
+        failures = asarray(failures, dtype=float)
+        if failures.ndim == 1:
+            failures = failures[None, :]
+        ncomponents = failures.shape[1]
+        self.cuts = asarray([[bool(cut >> i & 1) for i in range(ncomponents)]
+                             for cut in cuts], dtype=bool)
+        self.cuts = self.cuts.reshape(len(cuts), ncomponents)
+        self.sizes = self.cuts.sum(axis=1)
+        self.failures = failures
+        self.weights = where(self.cuts[None, :, :], failures[:, None, :],
+                             1).prod(axis=2)
+        self.total = self.weights.sum(axis=1)
+
+    def __call__(self, n, rng):
+        r""" Draw `n` samples, as an array of shape `(n, len(t))` """
+        samples = zeros((n, len(self.failures)))
+        counter = self.cuts.T.astype(int)
+        for k, failures in enumerate(self.failures):
+            if not self.total[k]:
+                continue
+            chosen = rng.choice(len(self.cuts), n,
+                                p=self.weights[k] / self.total[k])
+            failed = (rng.random((n, len(failures))) < failures) \
+                     | self.cuts[chosen]
+            count = (failed.astype(int).dot(counter) == self.sizes).sum(1)
+            samples[:, k] = self.total[k] / count
+        return samples
+
+
+def estimate(n, mean, m2, confidence=0.95):
+    r""" Build an estimation from the statistics of some samples
+
+        Parameters
+        ----------
+        n : int
+            the number of samples
+        mean : float or array
+            the mean of the samples
+        m2 : float or array
+            the sum of the squared deviations of the samples from their mean
+        confidence : float, optional
+            the level of the confidence interval
+
+        Returns
+        -------
+        out : Estimate
+            the mean of the samples, its standard error and a normal
+            confidence interval
+
+        Examples
+        --------
+        >>> result = estimate(100, 0.5, 25.)
+        >>> print('%.3f < %.3f < %.3f' % (result.low, result.value,
+        ...                               result.high))
+        0.402 < 0.500 < 0.598
+    """
+    from scipy.special import ndtri
+    stderr = sqrt(m2 / max(n - 1, 1) / n)
+    z = ndtri(0.5 + confidence / 2.0)
+    return Estimate(mean, stderr, mean - z * stderr, mean + z * stderr, n)
+
+
+def reshape(result, shape):
+    r""" Give the shape of the times to an estimation made at `len(t)`
+        times, the estimated values being floats for a single time.
+    """
+    fields = []
+    for value in result[:-1]:
+        value = asarray(value)
+        value = value.reshape(tuple(shape) + value.shape[1:])
+        fields.append(value if value.shape else float(value))
+    return Estimate(*fields, samples=result.samples)
+
+
+def _combine(a, b):
+    r""" Merge the statistics `(n, mean, m2)` of two sets of samples """
+    na, meana, m2a = a
+    nb, meanb, m2b = b
+    n = na + nb
+    delta = meanb - meana
+    return n, meana + delta * nb / n, m2a + m2b + delta**2 * na * nb / n
+
+
+def _batch(sampler, n, seed):
+    r""" Draw a batch of samples and return its statistics `(n, mean, m2)` """
+    samples = asarray(sampler(n, default_rng(seed)), dtype=float)
+    mean = samples.mean(axis=0)
+    return n, mean, ((samples - mean)**2).sum(axis=0)
+
+
+_SAMPLER = None
+
+
+def _initworker(sampler):
+    global _SAMPLER
+    _SAMPLER = sampler
+
+
+def _workerbatch(task):
+    return _batch(_SAMPLER, *task)
+
+
+def run(sampler, n_samples, seed=None, batch_size=10000, workers=1,
+        rtol=None, confidence=0.95):
+    r""" Estimate the mean of some random samples
+
+        Parameters
+        ----------
+        sampler : callable
+            `sampler(n, rng)` draws `n` samples with the random generator
+            `rng`, as an array whose first axis is the samples. It must be
+            picklable to be used by several processes.
+        n_samples : int
+            the (maximal) number of samples
+        seed : int, optional
+            the seed from which the random stream of each batch is spawned
+        batch_size : int, optional
+            the number of samples drawn at once. The results depend on it.
+        workers : int, optional
+            the number of processes drawing the batches, all the processors
+            being used if `None`
+        rtol : float, optional
+            if given, the simulation stops as soon as the standard error of
+            every estimated value is lower than `rtol` times the value. The
+            values whose samples are all equal (an event never observed, or
+            always) have no standard error and are not checked, but at least
+            one value must have varied: if no event is observed, all the
+            `n_samples` samples are drawn.
+        confidence : float, optional
+            the level of the confidence intervals
+
+        Returns
+        -------
+        out : Estimate
+            the estimated mean
+
+        Examples
+        --------
+        >>> sampler = lambda n, rng: rng.random(n) < 0.25
+        >>> result = run(sampler, 100000, seed=0)
+        >>> print(result.low < 0.25 < result.high)
+        True
+        >>> run(sampler, 100000, seed=0, rtol=0.05).samples
+        10000
+        >>> never = lambda n, rng: rng.random(n) < 0.0
+        >>> run(never, 100000, seed=0, rtol=0.05).samples
+        100000
+    """
+    if n_samples < 1 or batch_size < 1:
+        raise ValueError(u'n_samples and batch_size must be positive')
+    nbatches = (n_samples + batch_size - 1) // batch_size
+    tasks = [(min(batch_size, n_samples - k * batch_size), seed)
+             for k, seed in enumerate(SeedSequence(seed).spawn(nbatches))]
+
+    if workers is None:
+        workers = cpu_count()
+    pool = None
+    if workers > 1 and nbatches > 1:
+        pool = Pool(min(workers, nbatches), _initworker, (sampler,))
+        batches = pool.imap(_workerbatch, tasks)
+    else:
+        batches = (_batch(sampler, n, seed) for n, seed in tasks)
+
+    stats = None
+    try:
+        #the batches are reduced in order, whatever the process which drew
+        #them, so the result is the same for any number of processes.
+        for batch in batches:
+            stats = batch if stats is None else _combine(stats, batch)
+            if rtol is not None:
+                current = estimate(*stats, confidence=confidence)
+                if (current.stderr > 0).any() and \
+                   (current.stderr <= rtol * abs(current.value)).all():
+                    break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return estimate(*stats, confidence=confidence)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Choice of the engine evaluating a reliability diagram
+
+The cost of each engine is estimated from statistics of the diagram which
+are cheap to compute (see :py:func:`statistics`): they take a time linear
+with the size of the diagram. The costs are:
+
+* inclusion-exclusion expands :math:`2^P` terms, :math:`P` being the number
+  of success paths, counted without enumerating them,
+* the binary decision diagram of the paths has about :math:`n 2^w` nodes,
+  :math:`w` being the largest number of links crossing a topological order
+  of the :math:`n` components,
+* the sum of disjoint products has about :math:`P^2` terms,
+* the series-parallel reduction is linear, and only its irreducible
+  remainder is compiled into a binary decision diagram,
+* factoring conditions on about half of the nodes of this remainder,
+* a Monte Carlo simulation of :math:`10^4` samples is linear with the size of
+  the diagram, but only gives an estimation.
+
+The estimated times and memory sizes are orders of magnitude, meant to
+compare the engines and to warn before an evaluation would not end.
+
+"""
+from __future__ import division
+
+from collections import namedtuple
+
+from fiabilipy.graph import Graph
+from fiabilipy.modules import topologicalorder
+from fiabilipy.reduction import reduce_graph
+
+__all__ = ['Plan', 'statistics', 'costs', 'plan']
+
+#The engines giving the exact probability, in order of preference
+EXACT = ('series-parallel', 'bdd', 'factoring', 'sdp', 'inclusion-exclusion')
+
+#The time of an elementary operation, in seconds, and the memory taken by a
+#term, a node, …, in bytes
+OPERATION = 1e-6
+UNIT = 100
+
+#The engines expected to take less time than this are as good as each other
+NEGLIGIBLE = 1e-3
+
+#The samples of the simulation the cost is estimated for
+SAMPLES = 10**4
+
+
+class Plan(namedtuple('Plan', ['engine', 'exact', 'time', 'memory', 'costs',
+                               'statistics'])):
+    r""" The engine chosen to evaluate a system
+
+        Attributes
+        ----------
+        engine : str
+            the chosen engine, `'montecarlo'` if no exact engine is expected
+            to end within the budget (see :py:meth:`System.simulate`)
+        exact : str
+            the exact engine expected to be the fastest
+        time : float
+            the estimated time taken by `engine`, in seconds
+        memory : float
+            the estimated memory used by `engine`, in bytes
+        costs : dict
+            `costs[engine]` is the `(time, memory)` estimated for each engine
+        statistics : dict
+            the statistics of the diagram (see :py:func:`statistics`)
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        lines = [u'engine: %s (%s, %s)' % (self.engine, _seconds(self.time),
+                                           _bytes(self.memory))]
+        for engine in sorted(self.costs, key=lambda e: self.costs[e]):
+            time, memory = self.costs[engine]
+            lines.append(u'  %-20s %10s %10s' % (engine, _seconds(time),
+                                                 _bytes(memory)))
+        return u'\n'.join(lines)
+
+
+def _seconds(time):
+    if time == float('inf'):
+        return u'never'
+    for unit, size in ((u'y', 3.15e7), (u'd', 86400), (u'h', 3600),
+                       (u'min', 60), (u's', 1)):
+        if time >= size:
+            return u'%.3g%s' % (time / size, unit)
+    return u'%.1gs' % time
+
+
+def _bytes(memory):
+    if memory == float('inf'):
+        return u'inf'
+    for unit, size in ((u'TB', 1e12), (u'GB', 1e9), (u'MB', 1e6),
+                       (u'kB', 1e3)):
+        if memory >= size:
+            return u'%.3g%s' % (memory / size, unit)
+    return u'%dB' % memory
+
+
+def _float(number):
+    r""" `number` as a float, infinite when too large or unknown """
+    try:
+        return float(number) if number is not None else float('inf')
+    except OverflowError:
+        return float('inf')
+
+
+def _pow2(exponent):
+    r""" :math:`2^x` as a float, infinite when too large """
+    return 2.0 ** exponent if exponent < 1000 else float('inf')
+
+
+def _countpaths(successors):
+    r""" Count the paths from `E` to `S` of a diagram (see
+        :py:meth:`fiabilipy.graph.Graph.countpaths`)
+    """
+    graph = Graph()
+    graph.add('E')
+    graph.add('S')
+    graph.addedges((u, v) for u in successors for v in successors[u])
+    return graph.countpaths('E', 'S')
+
+
+def _width(successors):
+    r""" The largest number of links crossing a topological order of the
+        diagram (or the depth-first order, if it has cycles)
+    """
+    order = topologicalorder(successors, 'E')
+    if order is None:
+        order, seen, stack = [], set(['E']), ['E']
+        while stack:
+            u = stack.pop()
+            order.append(u)
+            for v in successors.get(u, ()):
+                if v not in seen:
+                    seen.add(v)
+                    stack.append(v)
+    position = dict((u, i) for i, u in enumerate(order))
+    crossing = [0] * (len(order) + 1)
+    for u in order:
+        for v in successors.get(u, ()):
+            if v in position:
+                low, high = sorted((position[u], position[v]))
+                crossing[low] += 1
+                crossing[high] -= 1
+    width = current = 0
+    for delta in crossing:
+        current += delta
+        width = max(width, current)
+    return width
+
+
+def statistics(successors, paths=None):
+    r""" Compute cheap statistics of a reliability diagram
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram.
+        paths : int, optional
+            the number of success paths, if already known (see
+            :py:meth:`System.countpaths`)
+
+        Returns
+        -------
+        out : dict
+            * `'components'`, `'links'`: the size of the diagram,
+            * `'paths'`: the number of success paths (`None` if the diagram
+              has cycles),
+            * `'width'`: the largest number of links crossing a topological
+              order of the diagram,
+            * `'remainder'`: the number of blocks left by the series-parallel
+              reduction (1 if the diagram is series-parallel),
+            * `'remainderpaths'`, `'remainderwidth'`: the number of success
+              paths and the width of the remainder.
+
+        Examples
+        --------
+        >>> bridge = {'E': [0, 1], 0: [2, 4], 1: [3], 4: [3], 2: ['S'],
+        ...           3: ['S']}
+        >>> stats = statistics(bridge)
+        >>> stats['paths'], stats['remainder']
+        (3, 5)
+    """
+    nodes = set(successors)
+    for succ in successors.values():
+        nodes.update(succ)
+    components = len(nodes - set(['E', 'S']))
+    links = sum(len(succ) for succ in successors.values())
+
+    graph = dict((u, set(succ)) for u, succ in successors.items())
+    blocks = dict((u, ('var', u)) for u in nodes if u not in ('E', 'S'))
+    reduce_graph(graph, blocks)
+
+    if paths is None:
+        paths = _countpaths(successors)
+    if 'S' in graph.get('E', ()):
+        remainder, remainderpaths = 0, 1
+    elif not blocks:
+        remainder, remainderpaths = 0, 0
+    else:
+        remainder = len(blocks)
+        remainderpaths = _countpaths(graph)
+    return {'components': components, 'links': links, 'paths': paths,
+            'width': _width(successors),
+            'remainder': remainder,
+            'remainderpaths': remainderpaths,
+            'remainderwidth': _width(graph) if remainder > 1 else 0}
+
+
+def costs(stats):
+    r""" Estimate the time and the memory taken by each engine
+
+        Parameters
+        ----------
+        stats : dict
+            the statistics of the diagram (see :py:func:`statistics`)
+
+        Returns
+        -------
+        out : dict
+            `out[engine]` is the estimated `(time, memory)`, in seconds and
+            bytes, infinite if the engine can not evaluate the diagram in any
+            reasonable time
+    """
+    inf = float('inf')
+    n, links = max(stats['components'], 1), max(stats['links'], 1)
+    paths = _float(stats['paths'])
+    result = {}
+
+    terms = min(_pow2(paths), _pow2(n)) if paths < inf else inf
+    result['inclusion-exclusion'] = (_pow2(paths) * paths * OPERATION
+                                     if paths < inf else inf,
+                                     terms * UNIT)
+    result['sdp'] = (paths ** 2 * n * OPERATION, paths * n * UNIT)
+    size = min(n * _pow2(stats['width']), _pow2(n))
+    result['bdd'] = (paths * size * OPERATION, size * UNIT)
+
+    remainder = stats['remainder']
+    if remainder <= 1:
+        result['series-parallel'] = (10 * links * OPERATION, n * UNIT)
+        result['factoring'] = (10 * links * OPERATION, n * UNIT)
+    else:
+        rpaths = _float(stats['remainderpaths'])
+        size = min(remainder * _pow2(stats['remainderwidth']),
+                   _pow2(remainder))
+        result['series-parallel'] = ((10 * links + rpaths * size)
+                                     * OPERATION, (n + size) * UNIT)
+        pivots = _pow2(remainder / 2)
+        result['factoring'] = (10 * links * pivots * OPERATION,
+                               (n + pivots) * UNIT)
+
+    result['montecarlo'] = (SAMPLES * links * OPERATION / 100,
+                            SAMPLES * n * 8)
+    return result
+
+
+def plan(stats, budget=60):
+    r""" Choose the engine evaluating a diagram
+
+        Parameters
+        ----------
+        stats : dict
+            the statistics of the diagram (see :py:func:`statistics`)
+        budget : float, optional
+            the time, in seconds, an exact evaluation may take before a
+            simulation is preferred
+
+        Returns
+        -------
+        out : Plan
+            the chosen engine and its estimated costs
+
+        Examples
+        --------
+        >>> bridge = {'E': [0, 1], 0: [2, 4], 1: [3], 4: [3], 2: ['S'],
+        ...           3: ['S']}
+        >>> plan(statistics(bridge)).engine
+        'series-parallel'
+    """
+    estimated = costs(stats)
+    exact = min(EXACT, key=lambda e: (max(estimated[e][0], NEGLIGIBLE),
+                                      EXACT.index(e)))
+    engine = exact if estimated[exact][0] <= budget else 'montecarlo'
+    time, memory = estimated[engine]
+    return Plan(engine, exact, time, memory, estimated, stats)
@@ -0,0 +1,549 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Series-parallel reduction
+
+This module reduces a reliability diagram by collapsing its series chains and
+its parallel branches into composite blocks. The probability of a block is
+computed in a time linear with its size. What remains once nothing can be
+reduced anymore (bridges for instance) is handed over to a binary decision
+diagram.
+
+"""
+from builtins import object
+
+from fiabilipy.bdd import BDD, ordering
+from fiabilipy.bitset import tomask, indices, popcount, issubset
+
+__all__ = ['SeriesParallel', 'reduce_graph', 'blockprobability', 'blockcuts',
+           'minimaltransversals', 'minimalcuts', 'countcuts']
+
+
+def blockprobability(block, values):
+    r""" Compute the probability of a block to work
+
+        Parameters
+        ----------
+        block : tuple
+            either `('var', i)`, `('series', blocks)` or
+            `('parallel', blocks)`
+        values : list
+            `values[i]` is the probability of the variable `i` to be true.
+
+        Returns
+        -------
+        out : float, array or symbolic expression
+            the probability of the block to work
+
+        Examples
+        --------
+        >>> block = ('series', (('var', 0), ('parallel', (('var', 1),
+        ...                                              ('var', 2)))))
+        >>> blockprobability(block, [0.5, 0.5, 0.5])
+        0.375
+    """
+    kind, content = block
+    if kind == 'var':
+        return values[content]
+    prob = 1
+    if kind == 'series':
+        for sub in content:
+            prob = prob * blockprobability(sub, values)
+        return prob
+    for sub in content:
+        prob = prob * (1 - blockprobability(sub, values))
+    return 1 - prob
+
+
+def _unions(family, cuts, maxorder):
+    r""" The unions of a cut of `family` and of a cut of `cuts`, having at
+        most `maxorder` elements
+    """
+    return [a | b for a in family for b in cuts
+            if maxorder is None or popcount(a | b) <= maxorder]
+
+
+def blockcuts(block, maxorder=None):
+    r""" List the minimal cuts of a block
+
+        The minimal cuts of a series block are the ones of its parts, and
+        those of a parallel block the unions of a minimal cut of each part.
+
+        Parameters
+        ----------
+        block : tuple
+            either `('var', i)`, `('series', blocks)` or
+            `('parallel', blocks)`
+        maxorder : int, optional
+            if given, only the cuts of at most `maxorder` variables are listed
+
+        Returns
+        -------
+        out : list of int
+            the minimal cuts, as bitmasks
+
+        Examples
+        --------
+        >>> block = ('series', (('var', 0), ('parallel', (('var', 1),
+        ...                                              ('var', 2)))))
+        >>> blockcuts(block)
+        [1, 6]
+    """
+    kind, content = block
+    if kind == 'var':
+        return [1 << content] if maxorder is None or maxorder >= 1 else []
+    parts = [blockcuts(sub, maxorder) for sub in content]
+    if kind == 'series':
+        return [cut for cuts in parts for cut in cuts]
+    family = [0]
+    for cuts in parts:
+        family = _unions(family, cuts, maxorder)
+    return family
+
+
+def minimaltransversals(sets, maxsize=None, maxcount=None):
+    r""" Find the minimal transversals of a family of sets
+
+        A transversal is a set which intersects every set of the family. This
+        function uses Berge’s algorithm: the sets are added one at a time, and
+        the minimal transversals are updated at each step, so no
+        combinatorial enumeration of candidates is needed.
+
+        Parameters
+        ----------
+        sets : list of int
+            the family of sets, given as bitmasks (see :mod:`bitset`)
+        maxsize : int, optional
+            if given, only the transversals with at most `maxsize` elements
+            are looked for.
+        maxcount : int, optional
+            if given, the search gives up as soon as more than `maxcount`
+            transversals are kept at some step, since their number may grow
+            exponentially before the last set is added.
+
+        Returns
+        -------
+        out : list of int or None
+            the minimal transversals as bitmasks, sorted by size, or `None`
+            if the search gave up
+
+        Examples
+        --------
+        >>> minimaltransversals([0b101, 0b110])
+        [4, 3]
+    """
+    #transversals of a set are transversals of its supersets
+    sets = sorted(set(sets), key=popcount)
+    family = []
+    for e in sets:
+        if not any(issubset(f, e) for f in family):
+            family.append(e)
+
+    transversals = [0]
+    for e in family:
+        hit = [tr for tr in transversals if tr & e]
+        missed = [tr for tr in transversals if not tr & e]
+        #a new transversal `tr | {v}` is minimal unless it contains one of
+        #the transversals already hitting `e`, which must contain `v`.
+        byelement = {}
+        for tr in hit:
+            for v in indices(tr & e):
+                byelement.setdefault(v, []).append(tr)
+        transversals = hit
+        for tr in missed:
+            if maxsize is not None and popcount(tr) >= maxsize:
+                continue
+            for v in indices(e):
+                candidate = tr | (1 << v)
+                if not any(issubset(other, candidate)
+                           for other in byelement.get(v, ())):
+                    transversals.append(candidate)
+                    if maxcount is not None and len(transversals) > maxcount:
+                        return None
+    return sorted(transversals, key=lambda tr: (popcount(tr), indices(tr)))
+
+
+def _remaindercuts(successors, maxorder=None, maxcount=None):
+    r""" Reduce a diagram to series and parallel blocks, and list the
+        minimal cuts of the remainder
+
+        Returns the list of the blocks, and the minimal cuts of the remainder
+        as bitmasks, the bit `i` standing for the `i`-th block (`None` if
+        more than `maxcount` transversals were needed to find them).
+    """
+    graph = dict((u, set(succ)) for u, succ in successors.items())
+    blocks = {}
+    for u, succ in graph.items():
+        blocks.update((v, ('var', v)) for v in succ | set([u])
+                      if v not in ('E', 'S'))
+    reduce_graph(graph, blocks)
+
+    blockids = sorted(blocks)
+    index = dict((u, i) for i, u in enumerate(blockids))
+    paths = [tomask(index[u] for u in path)
+             for path in SeriesParallel._findpaths(graph)]
+    return ([blocks[u] for u in blockids],
+            minimaltransversals(paths, maxorder, maxcount))
+
+
+def minimalcuts(successors, maxorder=None):
+    r""" List the minimal cuts of a reliability diagram
+
+        The diagram is reduced to series and parallel blocks first. The
+        minimal cuts of the irreducible remainder, whose components are the
+        blocks, are the minimal transversals of its success paths. A minimal
+        cut of the diagram is then made of a minimal cut of each block of a
+        minimal cut of the remainder. So the success paths of the whole
+        diagram are never enumerated.
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram,
+            every other node is a variable (an int).
+        maxorder : int, optional
+            if given, only the cuts of at most `maxorder` variables are listed
+
+        Returns
+        -------
+        out : list of int
+            the minimal cuts, as bitmasks
+
+        Examples
+        --------
+        >>> bridge = {'E': [0, 1], 0: [2, 4], 1: [3], 4: [3], 2: ['S'],
+        ...           3: ['S']}
+        >>> sorted(minimalcuts(bridge))
+        [3, 9, 12, 22]
+    """
+    blocks, remaindercuts = _remaindercuts(successors, maxorder)
+    parts = [blockcuts(block, maxorder) for block in blocks]
+    cuts = set()
+    for cut in remaindercuts:
+        family = [0]
+        for i in indices(cut):
+            family = _unions(family, parts[i], maxorder)
+        cuts.update(family)
+    return list(cuts)
+
+
+def _blockcutcount(block):
+    r""" The number of minimal cuts of a block """
+    kind, content = block
+    if kind == 'var':
+        return 1
+    counts = [_blockcutcount(sub) for sub in content]
+    if kind == 'series':
+        return sum(counts)
+    count = 1
+    for c in counts:
+        count *= c
+    return count
+
+
+def countcuts(successors, maxcount=None):
+    r""" Count the minimal cuts of a reliability diagram
+
+        The cuts are counted as they are built by :py:func:`minimalcuts`,
+        but only the minimal cuts of the irreducible remainder are listed.
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram,
+            every other node is a variable (an int).
+        maxcount : int, optional
+            the budget of the search of the minimal cuts of the remainder
+            (see :py:func:`minimaltransversals`)
+
+        Returns
+        -------
+        out : int or None
+            the number of minimal cuts, or `None` if the search went over
+            its budget
+
+        Examples
+        --------
+        >>> bridge = {'E': [0, 1], 0: [2, 4], 1: [3], 4: [3], 2: ['S'],
+        ...           3: ['S']}
+        >>> countcuts(bridge)
+        4
+    """
+    blocks, remaindercuts = _remaindercuts(successors, maxcount=maxcount)
+    if remaindercuts is None:
+        return None
+    counts = [_blockcutcount(block) for block in blocks]
+    total = 0
+    for cut in remaindercuts:
+        product = 1
+        for i in indices(cut):
+            product *= counts[i]
+        total += product
+    return total
+
+
+def _merge(kind, *merged):
+    r""" Build the block `a kind b kind …`, flattening nested blocks of same
+        kind
+    """
+    content = []
+    for block in merged:
+        if block[0] == kind:
+            content.extend(block[1])
+        else:
+            content.append(block)
+    return (kind, tuple(content))
+
+
+def reduce_graph(successors, blocks):
+    r""" Apply series and parallel reductions until none is possible
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the set of the
+            successors of `u`. `'E'` and `'S'` are the start and the end of
+            the diagram. It is modified in place.
+        blocks : dict
+            `blocks[u]` is the block held by the node `u`. It is modified in
+            place.
+
+        Notes
+        -----
+        Four reductions are applied:
+
+        * the nodes which are not on a path from `E` to `S` are removed,
+        * series: `u` is the only predecessor of `v` and `v` is the only
+          successor of `u`,
+        * parallel: `u` and `v` have the same predecessors and the same
+          successors. The nodes are bucketed by their neighbours, so all the
+          branches of a parallel block are merged at once,
+        * bypass: every predecessor of `u` is directly linked to every
+          successor of `u`, so `u` is useless.
+
+        Each node is checked again only when one of its neighbours changes.
+    """
+    predecessors = dict((u, set()) for u in successors)
+    predecessors.setdefault('S', set())
+    successors.setdefault('S', set())
+    for u in list(successors):
+        successors[u].discard(u)
+        for v in successors[u]:
+            predecessors.setdefault(v, set()).add(u)
+            successors.setdefault(v, set())
+
+    def remove(u):
+        for v in successors.pop(u):
+            predecessors[v].discard(u)
+        for v in predecessors.pop(u):
+            successors[v].discard(u)
+        del blocks[u]
+
+    #remove the nodes that are not on a path from E to S
+    def reach(start, links):
+        seen, stack = set([start]), [start]
+        while stack:
+            for v in links.get(stack.pop(), ()):
+                if v not in seen:
+                    seen.add(v)
+                    stack.append(v)
+        return seen
+    useful = reach('E', successors) & reach('S', predecessors)
+    for u in [u for u in successors if u not in useful and u in blocks]:
+        remove(u)
+
+    queue = [u for u in successors if u in blocks]
+
+    #the nodes by their predecessors and successors, which may have changed
+    #since they were bucketed. The parallel branches are merged once no other
+    #reduction is possible, so each block is built at once.
+    def bucketkey(u):
+        return (frozenset(predecessors[u]), frozenset(successors[u]))
+    parallel, bucketed, ready = {}, {}, []
+    for u in queue:
+        bucketed[u] = bucketkey(u)
+        parallel.setdefault(bucketed[u], []).append(u)
+    ready.extend(key for key, bucket in parallel.items() if len(bucket) > 1)
+
+    while queue or ready:
+        if not queue:
+            for key in ready:
+                pred, succ = key
+                branches, seen = [], set()
+                for v in parallel.pop(key):
+                    if v in seen:
+                        continue
+                    if v in blocks and predecessors[v] == pred \
+                       and successors[v] == succ:
+                        branches.append(v)
+                        seen.add(v)
+                    elif bucketed.get(v) == key:
+                        #it is bucketed again when checked
+                        del bucketed[v]
+                parallel[key] = branches[:1]
+                if len(branches) < 2:
+                    continue
+                u = branches[0]
+                blocks[u] = _merge('parallel',
+                                   *[blocks[v] for v in branches])
+                for v in branches[1:]:
+                    remove(v)
+                queue.append(u)
+                queue.extend(w for w in pred | succ if w in blocks)
+            ready = []
+            continue
+
+        u = queue.pop()
+        if u not in blocks:
+            continue
+        succ, pred = successors[u], predecessors[u]
+
+        #bypass
+        if all(s in successors[p] for p in pred for s in succ):
+            neighbours = pred | succ
+            remove(u)
+            queue.extend(v for v in neighbours if v in blocks)
+            continue
+
+        #series
+        merged = None
+        if len(succ) == 1:
+            v = next(iter(succ))
+            if v in blocks and len(predecessors[v]) == 1:
+                merged = (u, v)
+        if merged is None and len(pred) == 1:
+            v = next(iter(pred))
+            if v in blocks and len(successors[v]) == 1:
+                merged = (v, u)
+        if merged is not None:
+            first, second = merged
+            blocks[first] = _merge('series', blocks[first], blocks[second])
+            newsucc = set(successors[second])
+            remove(second)
+            for s in newsucc - set([first]):
+                successors[first].add(s)
+                predecessors[s].add(first)
+            queue.append(first)
+            queue.extend(v for v in newsucc | predecessors[first]
+                         if v in blocks)
+            continue
+
+        #parallel
+        key = bucketkey(u)
+        if pred and bucketed.get(u) != key:
+            bucketed[u] = key
+            bucket = parallel.setdefault(key, [])
+            bucket.append(u)
+            if len(bucket) == 2:
+                ready.append(key)
+
+class SeriesParallel(object):
+    r""" The structure function of a diagram, reduced to series and parallel
+        blocks.
+
+        Parameters
+        ----------
+        successors : dict
+            the reliability diagram, `successors[u]` being the successors of
+            `u`. `'E'` and `'S'` are the start and the end of the diagram,
+            every other node is a variable (an int).
+
+        Attributes
+        ----------
+        blocks : dict
+            the blocks remaining once the diagram is reduced
+        paths : list
+            the success paths of the irreducible remainder, if any
+
+        Examples
+        --------
+        >>> sp = SeriesParallel({'E': [0, 1], 0: [2], 1: [2], 2: ['S']})
+        >>> len(sp.blocks)
+        1
+        >>> sp.probability([0.5, 0.5, 0.5])
+        0.375
+    """
+
+    def __init__(self, successors):
+        graph = dict((u, set(v)) for u, v in successors.items())
+        self.blocks = {}
+        for u, succ in graph.items():
+            self.blocks.update((v, ('var', v)) for v in set(succ) | set([u])
+                               if v not in ('E', 'S'))
+        reduce_graph(graph, self.blocks)
+
+        self.paths = []
+        self._bdd = None
+        if 'S' in graph.get('E', ()):
+            #the diagram always works
+            self._root = True
+        elif not self.blocks:
+            self._root = False
+        elif len(self.blocks) == 1:
+            self._root = next(iter(self.blocks))
+        else:
+            #the irreducible remainder goes to a binary decision diagram
+            self._root = None
+            self.paths = self._findpaths(graph)
+            blockids = sorted(self.blocks)
+            index = dict((u, i) for i, u in enumerate(blockids))
+            paths = [[index[u] for u in path] for path in self.paths]
+            self._bdd = BDD(ordering(paths))
+            self._bddroot = self._bdd.disjunction(self._bdd.conjunction(p)
+                                                  for p in paths)
+            self._blockids = blockids
+
+    @staticmethod
+    def _findpaths(graph):
+        r""" List the success paths (without `E` and `S`) of `graph` """
+        paths, stack = [], [('E', ['E'])]
+        while stack:
+            u, path = stack.pop()
+            for v in graph[u]:
+                if v == 'S':
+                    paths.append(path[1:])
+                elif v not in path:
+                    stack.append((v, path + [v]))
+        return paths
+
+    def probability(self, values):
+        r""" Compute the probability of the diagram to work
+
+            Parameters
+            ----------
+            values : list
+                `values[i]` is the probability of the variable `i` to be true.
+                It may be a float, a numpy array or a symbolic expression.
+
+            Returns
+            -------
+            out : float, array or symbolic expression
+                the probability of the diagram to work
+        """
+        if self._root is True:
+            return 1
+        if self._root is False:
+            return 0
+        if self._root is not None:
+            return blockprobability(self.blocks[self._root], values)
+        blockvalues = [blockprobability(self.blocks[u], values)
+                       for u in self._blockids]
+        return self._bdd.probability(self._bddroot, blockvalues)
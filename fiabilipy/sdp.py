@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r""" Sum of disjoint products
+
+This module turns a list of success paths into a sum of mutually disjoint
+products, so the probability of their union is just the sum of the
+probabilities of the products.
+
+"""
+from builtins import range
+from builtins import object
+
+import sys
+
+from numpy import asarray, ones, zeros, where
+
+from fiabilipy.bitset import tomask, indices, popcount, issubset
+
+__all__ = ['SDP']
+
+
+def _disjoint(sets):
+    r""" Expand `not (all of sets[0]) and not (all of sets[1]) and …` into
+        disjoint products, by single variable inversion (Abraham’s algorithm).
+
+        The sets are given as bitmasks, and each product is given as a
+        `(up, down)` pair of bitmasks.
+    """
+    terms = [(0, 0)]
+    for missing in sets:
+        newterms = []
+        for up, down in terms:
+            if down & missing: #this product is already disjoint from `missing`
+                newterms.append((up, down))
+                continue
+            #x1 … xk are the variables of `missing` not yet known to be up
+            #not (x1 and … and xk) = not x1 + x1 not x2 + … + x1 … not xk
+            for var in indices(missing & ~up):
+                newterms.append((up, down | (1 << var)))
+                up = up | (1 << var)
+        terms = newterms
+    return terms
+
+
+class SDP(object):
+    r""" A sum of disjoint products, built from a list of success paths.
+
+        The paths are sorted by length, then the `i`-th path is made disjoint
+        from all the previous ones. Only the minimal sets of variables missing
+        from the `i`-th path to complete a previous one are kept, so the
+        number of products stays far below the :math:`2^P` terms of the
+        inclusion-exclusion formula for usual diagrams.
+
+        Parameters
+        ----------
+        paths : list of lists of int
+            each path is given as the list of its variables
+
+        Attributes
+        ----------
+        terms : list of (int, int)
+            each product is given by the bitmasks of the variables that must
+            be up and of the ones that must be down.
+
+        Examples
+        --------
+        >>> sdp = SDP([[0], [1]])
+        >>> sdp.terms
+        [(1, 0), (2, 1)]
+        >>> sdp.probability([0.5, 0.5])
+        0.75
+    """
+
+    def __init__(self, paths):
+        paths = sorted(set(tomask(p) for p in paths),
+                       key=lambda p: (popcount(p), indices(p)))
+        self.terms = []
+        for i, path in enumerate(paths):
+            missing = [previous & ~path for previous in paths[:i]]
+            #`not (all of A)` implies `not (all of B)` if A is in B, so only
+            #the minimal sets are needed.
+            missing.sort(key=popcount)
+            minimal = []
+            for m in missing:
+                if not any(issubset(other, m) for other in minimal):
+                    minimal.append(m)
+            for up, down in _disjoint(minimal):
+                self.terms.append((path | up, down))
+        self._masks = None
+
+    def __len__(self):
+        return len(self.terms)
+
+    def probability(self, values):
+        r""" Compute the probability of the sum of disjoint products
+
+            Parameters
+            ----------
+            values : list
+                `values[i]` is the probability of the variable `i` to be true.
+                It may be a float, a numpy array or a symbolic expression.
+
+            Returns
+            -------
+            out : float, array or symbolic expression
+                the probability of the union of the paths
+
+            Notes
+            -----
+            When the values are numbers or arrays, all the products are
+            evaluated at once with numpy.
+        """
+        try:
+            values = asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            terms = []
+            for up, down in self.terms:
+                term = 1
+                for var in indices(up):
+                    term *= values[var]
+                for var in indices(down):
+                    term *= 1 - values[var]
+                terms.append(term)
+            #symbolic terms are added at once, sympy sorting the arguments of
+            #a sum each time it grows
+            sympy = sys.modules.get('sympy')
+            if sympy is not None and \
+               any(isinstance(term, sympy.Basic) for term in terms):
+                return sympy.Add(*terms)
+            return sum(terms, 0)
+
+        if self._masks is None:
+            nvars = max([0] + [(up | down).bit_length()
+                               for up, down in self.terms])
+            self._masks = (zeros((len(self.terms), nvars), dtype=bool),
+                           zeros((len(self.terms), nvars), dtype=bool))
+            for i, (up, down) in enumerate(self.terms):
+                self._masks[0][i, indices(up)] = True
+                self._masks[1][i, indices(down)] = True
+        isup, isdown = self._masks
+
+        #one factor per variable, for all the products at once
+        shape = (len(self.terms),) + (1,) * (values.ndim - 1)
+        products = ones((len(self.terms),) + values.shape[1:])
+        for var in range(isup.shape[1]):
+            products *= where(isup[:, var].reshape(shape), values[var],
+                              where(isdown[:, var].reshape(shape),
+                                    1 - values[var], 1))
+        prob = products.sum(axis=0)
+        return prob if prob.ndim else float(prob)
@@ -28,21 +28,45 @@ from __future__ import print_function
 from builtins import range
 from builtins import object
 
-from numpy import empty, ones, delete
-from sympy import exp, Symbol, oo
-from scipy.special import binom
-from itertools import combinations, chain
+from numpy import zeros, asarray, ndarray, atleast_1d, atleast_2d, errstate
+from itertools import combinations, chain, count
 from collections import Iterable
-import networkx as nx
 
 from fiabilipy import Component
-from functools import reduce
+from fiabilipy.component import _usenumpy
+from fiabilipy.bdd import BDD, ordering
+from fiabilipy.sdp import SDP
+from fiabilipy.reduction import SeriesParallel
+from fiabilipy.factoring import Factoring
+from fiabilipy.modules import findmodules
+from fiabilipy.canonical import canonicalorder, Relabeled
+from fiabilipy.graph import Graph
+from fiabilipy.bitset import tomask, indices, popcount
+from fiabilipy import montecarlo, cache, planner, bounds, reduction
+from fiabilipy.expsum import ExpSum
+from functools import reduce, partial
+from hashlib import sha1
+from time import time
+from warnings import warn
 
 __all__ = ['System']
 
 ALLSUBSETS = lambda n: (chain(*[combinations(list(range(n)), ni)
                         for ni in range(n+1)]))
 
+#The different ways of evaluating the probabilities of a system
+ENGINES = ('inclusion-exclusion', 'bdd', 'sdp', 'series-parallel',
+           'factoring', 'auto')
+
+#The importance measures of the components
+IMPORTANCES = ('birnbaum', 'criticality', 'fussell-vesely', 'raw', 'rrw')
+
+#Numbers the systems built without a name
+_NAMES = count()
+
+#Tells a structure is not in the persistent cache
+_MISSING = object()
+
 
 class System(object):
     r""" Describe a system with different components.
@@ -75,61 +99,180 @@ class System(object):
         So, you can use the `System` object as a simple python dictionnary
         where each key is a component and the value associated it the list
         of the component’s successors.
+
+        The probabilities (reliability, availability and maintainability) are
+        computed by an *engine*, given when the system is built:
+
+        * `'inclusion-exclusion'` (default) expands the union of the success
+          paths. Its cost grows as :math:`2^P`, :math:`P` being the number of
+          success paths.
+        * `'bdd'` compiles the structure function into a binary decision
+          diagram, and evaluates it in a single pass.
+        * `'sdp'` turns the success paths into a sum of disjoint products.
+        * `'series-parallel'` collapses the series and parallel blocks of the
+          diagram, without enumerating the success paths. Only the
+          irreducible remainder (bridges, …) is compiled into a binary
+          decision diagram.
+        * `'factoring'` conditions on a pivot component working or failing,
+          and reduces the resulting diagrams again. It is well suited to
+          meshed diagrams, which are not series-parallel.
+        * `'auto'` chooses the engine expected to be the fastest, from cheap
+          statistics of the diagram (see :py:meth:`plan`).
+
+        >>> S = System(engine='bdd')
+
+        A system can itself be used as a component of another system. It is
+        then evaluated on its own, and its results are cached separately.
+
+        >>> P = [Component('P{}'.format(i), 1e-4) for i in (0, 1)]
+        >>> valve = Component('V', 1e-5)
+        >>> pumps = System(name='pumps')
+        >>> pumps['E'] = [P[0], P[1]]
+        >>> pumps[P[0]] = pumps[P[1]] = 'S'
+        >>> plant = System()
+        >>> plant['E'] = [pumps]
+        >>> plant[pumps] = [valve]
+        >>> plant[valve] = 'S'
+        >>> plant.components
+        [System(pumps), Component(V)]
+
+        With `modular=True`, the independent modules of the diagram (the
+        parts linked to the rest through a single entry and a single exit
+        component, see :py:attr:`modules`) are found automatically and
+        evaluated as such subsystems, so the success paths of the whole
+        diagram are never enumerated.
+
+        In *numeric* mode (`System(numeric=True)`, or globally through
+        :py:func:`fiabilipy.component.setnumeric`), the metrics are computed
+        with numpy only, as floats or arrays. Sympy is then only used when a
+        symbolic expression is explicitly asked for.
     """
 
-    def __init__(self, graph=None):
-        self._graph = nx.DiGraph(graph)
+    def __init__(self, graph=None, engine='inclusion-exclusion', numeric=None,
+                 name=None, modular=False):
+        #the systems using this one as a component
+        self._systems = set()
+        self._graph = Graph()
+        if graph is not None:
+            for u in graph:
+                self._graph.add(u)
+            self._graph.addedges((u, v) for u in graph for v in graph[u])
         self._map = {'E':'E','S':'S'} #FIXME create map str -> component in case graph is non empty
+        #`_structure` only depends on the graph (paths, cuts, compiled
+        #structure functions, …), `_cache` depends on the components too.
+        self._structure = {}
+        self._cache = {}
+        self.engine = engine
+        self.numeric = numeric
+        self.modular = modular
+        if name is None:
+            name = u'system-%d' % next(_NAMES)
+        self.name = name
+
+    @property
+    def _t(self):
+        r""" The symbol of time used by the cached formulas """
+        #sympy caches its symbols, so the same one is given each time
+        from sympy import Symbol
+        return Symbol('t', positive=True)
+
+    @property
+    def engine(self):
+        r""" The name of the engine used to compute the probabilities """
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine):
+        if engine not in ENGINES:
+            msg = u'engine must be one of {}'.format(', '.join(ENGINES))
+            raise ValueError(msg)
+        self._engine = engine
+        #reset the cache
         self._cache = {}
-        self._t = Symbol('t', positive=True)
 
     def __getitem__(self, component):
-        return self._map[self._graph[component.__str__()]]
+        successors = self._graph.successors(component.__str__())
+        return [self._map[c] for c in successors]
 
     def __setitem__(self, component, successors):
         #Let’s do different checks before inserting the element
         if not isinstance(successors, Iterable):
-            if not isinstance(successors, Component):
+            if not isinstance(successors, (Component, System)):
                 msg = u'successors must be a list of components, a component '
                 raise ValueError(msg)
             successors = [successors]
+        successors = list(successors)
         if component != 'E' and 'E' not in self._graph:
             msg = u"'E' must be the first inserted component"
             raise ValueError(msg)
+        self._checkindependent([component] + successors)
         for successor in successors:
             if successor != 'S':
                 successor._systems.add(self)
-            self._graph.add_edge(component.__str__(), successor.__str__())
             self._map[component.__str__()]=component
             self._map[successor.__str__()]=successor #FIXME this may be optional
+        self._graph.addedges((component.__str__(), successor.__str__())
+                             for successor in successors)
 
         #reset the cache
-        self._cache = {}
+        self._dropstructure()
+        self._invalidate()
 
     def __delitem__(self, component):
-        for c in self._graph:
-            try:
-                self._graph.remove_edge(c, component.__str__())
-            except nx.NetworkXError: #i.e. edge(c, component) does not exist
-                pass
-            except AttributeError:
-                assert self._graph[c] == 'S'
-        self._graph.remove_node(component.__str__())
+        #the links from and to the component are removed too
+        self._graph.remove(component.__str__())
         if component not in self.components:
             component._systems.remove(self)
             del self._map[component.__str__()]
         #reset the cache
-        self._cache = {}
+        self._dropstructure()
+        self._invalidate()
 
     def __len__(self):
         return len(self._graph)
 
+    def _invalidate(self):
+        r""" Reset the values depending on the parameters of the components.
+
+            This is called when a component of the system is modified. What
+            only depends on the reliability diagram (success paths, minimal
+            cuts, compiled structure functions) is kept. The systems using
+            this one as a component are reset too.
+        """
+        self._cache = {}
+        for system in self._systems:
+            system._invalidate()
+
+    def _dropstructure(self):
+        r""" Reset the values depending on the reliability diagram. The
+            subsystems built for its modules stop following their components.
+        """
+        for key, hierarchy in self._structure.items():
+            if key.startswith('hierarchy-') and hierarchy:
+                top, parts = hierarchy
+                for system in [top] + [m for _, m in parts if m is not None]:
+                    system._detach()
+        self._structure = {}
+
+    def _detach(self):
+        r""" Stop following the components, the system being dropped """
+        self._dropstructure()
+        for c in self.components:
+            c._systems.discard(self)
+
     def __repr__(self):
-        return u'I\'m a system'
+        return u'System(%s)' % self.name
+
+    def __str__(self):
+        return self.name
 
     def copy(self):
         r""" Return a copy of the system.
 
+            The graph is copied at once, and what was computed from it
+            (success paths, minimal cuts, compiled structure functions) is
+            kept, so the cost is linear with the size of the diagram.
+
             Returns
             -------
             out: System
@@ -139,14 +282,206 @@ class System(object):
             -----
                 The components are the same (same reference).
                 Only the internal graph is new
+
+            Examples
+            --------
+            >>> C = [Component('C{}'.format(i), 1e-4) for i in range(2)]
+            >>> S = System()
+            >>> S['E'] = [C[0], C[1]]
+            >>> S[C[0]] = S[C[1]] = 'S'
+            >>> T = S.copy()
+            >>> del T[C[1]]
+            >>> T.components, S[C[1]]
+            ([Component(C0)], ['S'])
         """
-        _copy = System()
-        _copy['E'] = [] #'E' must be the first inserted component
-        for c in self._graph:
-            _copy[c] = self[c][:]
+        _copy = System(engine=self.engine, numeric=self.numeric,
+                       modular=self.modular)
+        _copy._graph = self._graph.copy()
         _copy._map = self._map.copy()
+        for c in _copy.components:
+            c._systems.add(_copy)
+        #the subsystems of the modules follow this system only
+        _copy._structure = dict((key, value)
+                                for key, value in self._structure.items()
+                                if not key.startswith('hierarchy-'))
         return _copy
 
+    @classmethod
+    def fromedges(cls, edges, components=None, **kwargs):
+        r""" Build a system from the links of its reliability diagram
+
+            The links are checked, then inserted all at once, which is much
+            faster than inserting the components one by one.
+
+            Parameters
+            ----------
+            edges : iterable
+                the links `(u, v)` of the diagram, `u` and `v` being `'E'`,
+                `'S'`, components or systems. If `components` is given, they
+                may also be keys (or indices) of `components`.
+            components : list or dict, optional
+                the components used by the links. If it is a list, the
+                components of the system are in the same order.
+            kwargs : dict, optional
+                given to :py:class:`System` (`engine`, `numeric`, `name`,
+                `modular`)
+
+            Returns
+            -------
+            out : System
+                the new system
+
+            Examples
+            --------
+            >>> C = [Component('C{}'.format(i), 1e-4) for i in range(3)]
+            >>> S = System.fromedges([('E', 0), ('E', 1), (0, 2), (1, 2),
+            ...                       (2, 'S')], C, engine='bdd')
+            >>> S.components
+            [Component(C0), Component(C1), Component(C2)]
+            >>> S[C[0]]
+            [Component(C2)]
+        """
+        edges = list(edges)
+        order = None
+        if components is not None:
+            if hasattr(components, 'items'):
+                lookup = dict(components.items())
+            else:
+                order = list(components)
+                lookup = dict(enumerate(order))
+            lookup.setdefault('E', 'E')
+            lookup.setdefault('S', 'S')
+            try:
+                edges = [(lookup.get(u, u), lookup.get(v, v))
+                         for u, v in edges]
+            except TypeError:
+                raise ValueError(u'edges must be pairs of components')
+        system = cls(**kwargs)
+        system._addedges(edges, order)
+        return system
+
+    @classmethod
+    def fromadjacency(cls, array, components, **kwargs):
+        r""" Build a system from the adjacency matrix of its reliability
+            diagram
+
+            Parameters
+            ----------
+            array : array
+                the adjacency matrix, of shape `(n + 2, n + 2)`: the row and
+                the column `0` stand for `'E'`, `i + 1` for the component
+                `components[i]` and `n + 1` for `'S'`. There is a link from
+                `u` to `v` if `array[u, v]` is not zero. It may also be a
+                scipy sparse matrix.
+            components : list
+                the `n` components of the system, in this order
+            kwargs : dict, optional
+                given to :py:class:`System` (`engine`, `numeric`, `name`,
+                `modular`)
+
+            Returns
+            -------
+            out : System
+                the new system
+
+            Examples
+            --------
+            >>> C = [Component('C{}'.format(i), 1e-4) for i in range(2)]
+            >>> S = System.fromadjacency([[0, 1, 1, 0],
+            ...                           [0, 0, 0, 1],
+            ...                           [0, 0, 0, 1],
+            ...                           [0, 0, 0, 0]], C)
+            >>> S.successpaths
+            [['E', Component(C0), 'S'], ['E', Component(C1), 'S']]
+        """
+        if not hasattr(array, 'nonzero'):
+            array = asarray(array)
+        nodes = ['E'] + list(components) + ['S']
+        if array.shape != (len(nodes), len(nodes)):
+            msg = u'array must be of shape ({0}, {0})'.format(len(nodes))
+            raise ValueError(msg)
+        rows, columns = array.nonzero()
+        return cls.fromedges(zip(rows.tolist(), columns.tolist()), nodes,
+                             **kwargs)
+
+    def _addedges(self, edges, order=None):
+        r""" Check the links `(u, v)` of `edges`, then insert them at once.
+            The new components are inserted in the order of `order`, if
+            given, then in the order of the links.
+        """
+        #each node is checked once
+        try:
+            nodes = set(chain.from_iterable(edges))
+        except TypeError:
+            raise ValueError(u'edges must be pairs of components')
+        name = {'E': 'E', 'S': 'S'}
+        names = {}
+        for c in nodes:
+            if c in name:
+                continue
+            if not isinstance(c, (Component, System)):
+                msg = u'{!r} is neither a component nor a system'
+                raise ValueError(msg.format(c))
+            name[c] = c.__str__()
+            if names.setdefault(name[c], self._map.get(name[c], c)) is not c:
+                raise ValueError(u'two components are named {}'.format(c))
+        links = [(name[u], name[v]) for u, v in edges]
+        if any(u == 'S' or v == 'E' for u, v in links):
+            raise ValueError(u"'E' must start and 'S' end the links")
+        self._checkindependent(names.values())
+
+        self._graph.add('E')
+        for c in order or ():
+            if c in name and name[c] in names:
+                self._graph.add(name[c])
+        self._graph.addedges(links)
+        self._map.update(names)
+        for c in names.values():
+            c._systems.add(self)
+
+        #reset the cache
+        self._dropstructure()
+        self._invalidate()
+
+    def _owners(self, component):
+        r""" The components of this system which `component` is part of,
+            through the systems used as components.
+        """
+        owners, seen, stack = set(), set(), [component]
+        while stack:
+            c = stack.pop()
+            for system in c._systems:
+                if system is self:
+                    owners.add(c)
+                elif isinstance(system, System) and system not in seen:
+                    seen.add(system)
+                    stack.append(system)
+        return owners
+
+    def _checkindependent(self, nodes):
+        r""" Check the components of the systems among `nodes` are not used
+            anywhere else in this system. The probabilities of the systems
+            used as components are multiplied as if they were independent,
+            so a shared component would give a wrong result.
+        """
+        owner = {}
+        def claim(leaf, node):
+            other = owner.setdefault(leaf, node)
+            if other is not node:
+                msg = u'{} is used by both {} and {}, which must be ' \
+                      u'independent'
+                raise ValueError(msg.format(leaf, other, node))
+        stack = [(c, c) for c in nodes if c not in ('E', 'S')]
+        while stack:
+            node, c = stack.pop()
+            if isinstance(c, System):
+                stack.extend((node, d) for d in c.components)
+            else:
+                claim(c, node)
+        for leaf in list(owner):
+            for node in self._owners(leaf):
+                claim(leaf, node)
+
     @property
     def components(self):
         r""" The list of the components used by the system
@@ -160,26 +495,1036 @@ class System(object):
         #FIXME Vincent it should be the component not its str
         return [self._map[comp] for comp in self._graph if comp not in ('E', 'S')]
 
+    def _indexedpaths(self):
+        r""" Return the success paths, each component being replaced by its
+            index in :py:attr:`components`.
+        """
+        index = dict((c, i) for i, c in enumerate(self.components))
+        return [[index[c] for c in path[1:-1]] for path in self.successpaths]
+
+    def _indexedgraph(self):
+        r""" Return the reliability diagram as a dictionnary, each component
+            being replaced by its index in :py:attr:`components`.
+        """
+        nodes = self._graph.nodes()
+        index, number = [None] * len(nodes), 0
+        for i, node in enumerate(nodes):
+            if node in ('E', 'S'):
+                index[i] = node
+            elif node is not None:
+                index[i], number = number, number + 1
+        indptr, succ = [a.tolist() for a in self._graph.csr()]
+        return dict((index[u], [index[v]
+                                for v in succ[indptr[u]:indptr[u + 1]]])
+                    for u, node in enumerate(nodes) if node is not None)
+
+    def _canonical(self):
+        r""" Return the canonical numbering of the components (see
+            :py:func:`fiabilipy.canonical.canonicalorder`), as the list of
+            their indices in :py:attr:`components`, and the canonical form.
+        """
+        try:
+            return self._structure['canonical']
+        except KeyError:
+            order, form = canonicalorder(self._indexedgraph())
+            self._structure['canonical'] = (order, form)
+            return order, form
+
+    @property
+    def canonicalform(self):
+        r""" The reliability diagram, whatever the names of the components
+            and the order they were inserted in
+
+            The components are numbered in a canonical order (see
+            :mod:`fiabilipy.canonical`), `E` being 0 and `S` the last number.
+
+            Returns
+            -------
+            out : tuple
+                the sorted tuple of the links `(u, v)` of the renumbered
+                diagram
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> S.canonicalform
+            ((0, 2), (0, 3), (1, 4), (2, 1), (3, 1))
+        """
+        return self._canonical()[1]
+
+    @property
+    def structuralhash(self):
+        r""" A digest of :py:attr:`canonicalform`, shared by the systems
+            having the same shape
+
+            The structures compiled from the reliability diagram (success
+            paths, minimal cuts, structure functions) are computed once for
+            all the systems having the same hash, in the same process if
+            they are shared (see :py:func:`fiabilipy.cache.setshared`), or in
+            any process using the same persistent cache (see
+            :py:func:`fiabilipy.setcache`).
+
+            Examples
+            --------
+            >>> A, B, C = [Component(name, 1e-4) for name in 'ABC']
+            >>> first, second = System(), System()
+            >>> first['E'] = [A, B]
+            >>> first[A] = first[B] = 'S'
+            >>> second['E'] = [C]
+            >>> second[C] = 'S'
+            >>> first.structuralhash == second.structuralhash
+            False
+            >>> second['E'] = [A, C]
+            >>> second[A] = 'S'
+            >>> first.structuralhash == second.structuralhash
+            True
+        """
+        try:
+            return self._structure['structuralhash']
+        except KeyError:
+            key = sha1(repr(self.canonicalform).encode('utf-8')).hexdigest()
+            self._structure['structuralhash'] = key
+            return key
+
+    def _numbering(self):
+        r""" Return the numbering the structures are computed in: the
+            canonical one (see :py:meth:`_canonical`) if they may be shared
+            with other systems, `None` for the order of
+            :py:attr:`components` otherwise.
+
+            It is chosen once for the diagram, so the canonical numbering,
+            which takes a time quadratic with the number of components, is
+            only computed when a cache is set (see :mod:`cache`).
+        """
+        try:
+            return self._structure['numbering']
+        except KeyError:
+            order = None
+            if cache.SHARED is not None or cache.CACHE is not None:
+                order = self._canonical()[0]
+            self._structure['numbering'] = order
+            return order
+
+    def _canonicalpaths(self):
+        r""" Return the success paths, each component being replaced by its
+            number (see :py:meth:`_numbering`).
+        """
+        order = self._numbering()
+        if order is None:
+            return self._indexedpaths()
+        position = dict((i, k) for k, i in enumerate(order))
+        return [[position[i] for i in path] for path in self._indexedpaths()]
+
+    def _canonicalgraph(self):
+        r""" Return the reliability diagram as a dictionnary, each component
+            being replaced by its number (see :py:meth:`_numbering`).
+        """
+        order = self._numbering()
+        if order is None:
+            return self._indexedgraph()
+        position = dict((i, k) for k, i in enumerate(order))
+        position['E'], position['S'] = 'E', 'S'
+        return dict((position[u], [position[v] for v in successors])
+                    for u, successors in self._indexedgraph().items())
+
+    def _relabeled(self, compiled):
+        r""" Return the compiled structure function `compiled` of the
+            renumbered diagram, taking the probabilities of the components in
+            the order of :py:attr:`components`.
+        """
+        order = self._numbering()
+        if order is None or order == list(range(len(order))):
+            return compiled
+        return Relabeled(compiled, order)
+
+    def _frommasks(self, masks):
+        r""" Convert bitmasks of canonical numbers to bitmasks of indices in
+            :py:attr:`components`.
+        """
+        relabeled = self._relabeled(None)
+        if relabeled is None:
+            return list(masks)
+        return [relabeled.mask(m) for m in masks]
+
+    def _shared(self, key, compute):
+        r""" Return the structure `key` of the renumbered diagram (see
+            :py:meth:`_numbering`), computed by `compute()` if no system
+            having the same shape computed it yet (see :mod:`cache`).
+        """
+        try:
+            return self._structure['shared-' + key]
+        except KeyError:
+            pass
+        if self._numbering() is None:
+            value = compute()
+            self._structure['shared-' + key] = value
+            return value
+        name = u'%s/%s/%d/%s' % (cache.VERSION, self.structuralhash,
+                                 _usenumpy(self), key)
+        stores = [store for store in (cache.SHARED, cache.CACHE)
+                  if store is not None]
+        for i, store in enumerate(stores):
+            value = store.get(name, _MISSING)
+            if value is not _MISSING:
+                for missing in stores[:i]:
+                    missing.put(name, value)
+                break
+        else:
+            value = compute()
+            for store in stores:
+                store.put(name, value)
+        self._structure['shared-' + key] = value
+        return value
+
+    def _stored(self, key, compute, view):
+        r""" Return the structure `key`, as given by `view(value)`, `value`
+            being the structure of the canonical diagram (see
+            :py:meth:`_shared`).
+        """
+        try:
+            return self._structure[key]
+        except KeyError:
+            value = view(self._shared(key, compute))
+            self._structure[key] = value
+            return value
+
+    def _bdd(self):
+        r""" Return the binary decision diagram of the structure function,
+            and its root.
+        """
+        def build():
+            paths = self._canonicalpaths()
+            bdd = BDD(ordering(paths))
+            return bdd, bdd.disjunction(bdd.conjunction(p) for p in paths)
+        return self._stored('bdd', build,
+                            lambda value: (self._relabeled(value[0]), value[1]))
+
+    def _sdp(self):
+        r""" Return the structure function as a sum of disjoint products """
+        return self._stored('sdp', lambda: SDP(self._canonicalpaths()),
+                            self._relabeled)
+
+    def _seriesparallel(self):
+        r""" Return the structure function reduced to series and parallel
+            blocks.
+        """
+        return self._stored('series-parallel',
+                            lambda: SeriesParallel(self._canonicalgraph()),
+                            self._relabeled)
+
+    def _factoring(self):
+        r""" Return the structure function compiled by factoring """
+        return self._stored('factoring',
+                            lambda: Factoring(self._canonicalgraph()),
+                            self._relabeled)
+
+    def _findpathmasks(self):
+        r""" Find the success paths of the canonical diagram, as bitmasks """
+        return [tomask(p) for p in self._canonicalpaths()]
+
+    def _canonicalpathmasks(self):
+        r""" Return the success paths of the canonical diagram, as bitmasks
+        """
+        return self._shared('pathmasks', self._findpathmasks)
+
+    def _polynomial(self):
+        r""" Return the structure function expanded by inclusion-exclusion,
+            as a dictionnary `{mask: coefficient}` of the products of the
+            probabilities of the components of each bitmask.
+        """
+        def expand():
+            #TODO : improve complexity ?
+            #   n
+            # P(U a_i) = sum     (-1)^{-1+|s|} P(^a_i)
+            #  i=1      s\in[1,n],              i\in s
+            #           s != {}
+            #
+            paths = self._canonicalpathmasks()
+            terms = {}
+            for S in ALLSUBSETS(len(paths)):
+                if not S:
+                    continue
+                comps = reduce(lambda x, y: x | paths[y], S, 0)
+                sign = -1 if len(S) % 2 == 0 else 1
+                terms[comps] = terms.get(comps, 0) + sign
+            return dict((m, c) for m, c in terms.items() if c)
+        def view(terms):
+            masks = sorted(terms)
+            return dict(zip(self._frommasks(masks),
+                            [terms[m] for m in masks]))
+        return self._stored('polynomial', expand, view)
+
+    def plan(self, budget=60):
+        r""" Choose the engine evaluating the system
+
+            The time and the memory taken by each engine are estimated from
+            statistics of the reliability diagram (the number of success
+            paths, the width of the diagram, what is left by the
+            series-parallel reduction, …), which are computed in linear time
+            without enumerating the paths (see :mod:`fiabilipy.planner`).
+            The estimations are orders of magnitude.
+
+            Parameters
+            ----------
+            budget : float, optional
+                the time, in seconds, an exact evaluation may take before a
+                simulation (see :py:meth:`simulate`) is preferred
+
+            Returns
+            -------
+            out : Plan
+                `engine` is the chosen engine, `'montecarlo'` if no exact
+                engine is expected to end within `budget`, and `exact` the
+                fastest exact engine. `costs` gives the estimated time and
+                memory of each engine, and `statistics` the statistics of
+                the diagram.
+
+            Examples
+            --------
+            >>> C = [Component('C{}'.format(i), 1e-4) for i in range(40)]
+            >>> S = System(engine='auto')
+            >>> S['E'] = [C[0], C[1]]
+            >>> for i in range(0, 38, 2):
+            ...     S[C[i]] = S[C[i + 1]] = [C[i + 2], C[i + 3]]
+            >>> S[C[38]] = S[C[39]] = 'S'
+            >>> S.plan().statistics['paths']
+            1048576
+            >>> S.plan().engine
+            'series-parallel'
+        """
+        try:
+            stats = self._structure['statistics']
+        except KeyError:
+            stats = planner.statistics(self._indexedgraph(),
+                                       self.countpaths())
+            self._structure['statistics'] = stats
+        return planner.plan(stats, budget)
+
+    def _enginename(self):
+        r""" Return the engine actually used, `'auto'` being replaced by the
+            exact engine chosen by :py:meth:`plan`
+        """
+        if self.engine != 'auto':
+            return self.engine
+        try:
+            return self._structure['engine']
+        except KeyError:
+            chosen = self.plan()
+            if chosen.engine == 'montecarlo':
+                seconds = chosen.costs[chosen.exact][0]
+                if seconds == float('inf'):
+                    expected = u'is not expected to end'
+                else:
+                    expected = u'is expected to take {}'.format(
+                        planner._seconds(seconds))
+                msg = (u'{} {} to evaluate {}, consider simulate()'
+                       .format(chosen.exact, expected, self.name))
+                warn(msg, RuntimeWarning)
+            self._structure['engine'] = chosen.exact
+            return chosen.exact
+
+    def _hierarchy(self):
+        r""" Return the diagram where each module is replaced by a subsystem
+
+            Returns
+            -------
+            out : tuple or None
+                `None` if the diagram has no module, otherwise `(top, parts)`:
+                `top` is the system linking the modules and the remaining
+                components, and `parts[k]` tells what the `k`-th component of
+                `top` is: `(i, None)` for the `i`-th component of
+                :py:attr:`components`, `(indices, module)` for a module made
+                of the components `indices`.
+        """
+        key = 'hierarchy-%s' % self.engine
+        try:
+            return self._structure[key]
+        except KeyError:
+            pass
+        components = self.components
+        graph = self._indexedgraph()
+        found = findmodules(graph)
+        if not found:
+            self._structure[key] = None
+            return None
+
+        name = lambda u: u if u in ('E', 'S') else components[u].__str__()
+        inside = {}
+        for u, v, nodes in found:
+            module = System(engine=self.engine, modular=True,
+                            name=u'{%s..%s}' % (name(u), name(v)))
+            inner = lambda w: 'S' if w == v else components[w]
+            module['E'] = [inner(w) for w in graph[u] if w in nodes]
+            for w in sorted(nodes):
+                if graph.get(w):
+                    module[components[w]] = [inner(x) for x in graph[w]]
+            inside.update((w, (module, v)) for w in nodes)
+
+        def node(u):
+            if u in ('E', 'S'):
+                return u
+            return inside[u][0] if u in inside else components[u]
+
+        top = System(engine=self.engine)
+        linked = set()
+        for u in ['E'] + [u for u in graph if u != 'E']:
+            #a module is linked to its exit, once
+            successors = [inside[u][1]] if u in inside else graph[u]
+            successors = [node(x) for x in successors]
+            successors = [x for i, x in enumerate(successors)
+                          if x not in successors[:i]]
+            if successors and node(u) not in linked:
+                linked.add(node(u))
+                top[node(u)] = successors
+
+        index = dict((c, i) for i, c in enumerate(components))
+        parts = [(index[c], None) if c in index else
+                 ([index[x] for x in c.components], c)
+                 for c in top.components]
+        self._structure[key] = (top, parts)
+        return self._structure[key]
+
+    @property
+    def modules(self):
+        r""" The independent modules of the reliability diagram
+
+            A module is a part of the diagram linked to the rest through a
+            single entry and a single exit component, so it only matters
+            through its own probability to work (see :mod:`modules`). With
+            `modular=True`, each module is evaluated once as a subsystem,
+            which is itself modularized.
+
+            Returns
+            -------
+            out : list of System
+                the largest modules, each one with at least two components
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System(modular=True)
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> S.modules
+            [System({E..M})]
+            >>> S.modules[0].components
+            [Component(P0), Component(P1)]
+        """
+        hierarchy = self._hierarchy()
+        if not hierarchy:
+            return []
+        return [module for _, module in hierarchy[1] if module is not None]
+
+    def _structureprobability(self, values):
+        r""" Compute the probability of the structure function with the
+            current engine, given the probability `values[i]` of each
+            component of :py:attr:`components` to work.
+        """
+        hierarchy = self._hierarchy() if self.modular else None
+        if hierarchy:
+            top, parts = hierarchy
+            values = [values[i] if module is None else
+                      module._structureprobability([values[j] for j in i])
+                      for i, module in parts]
+            return top._structureprobability(values)
+        engine = self._enginename()
+        if engine == 'bdd':
+            bdd, root = self._bdd()
+            return bdd.probability(root, values)
+        if engine == 'sdp':
+            return self._sdp().probability(values)
+        if engine == 'series-parallel':
+            return self._seriesparallel().probability(values)
+        if engine == 'factoring':
+            return self._factoring().probability(values)
+
+        #the union of the paths is expanded once, only the products of
+        #probabilities are computed again
+        R = 0.0
+        for comps, coefficient in sorted(self._polynomial().items()):
+            r = reduce(lambda x, y: x*values[y], indices(comps), 1)
+            R += coefficient * r
+        return R
+
+    @property
+    def probabilitysymbols(self):
+        r""" The symbols standing for the probability of each component to
+            work in :py:attr:`structurefunction`
+
+            Returns
+            -------
+            out : list of Symbol
+                the `i`-th symbol is the one of the `i`-th component of
+                :py:attr:`components`
+        """
+        try:
+            return self._structure['symbols']
+        except KeyError:
+            from sympy import Symbol
+            self._structure['symbols'] = [Symbol('p_%s' % c)
+                                          for c in self.components]
+            return self._structure['symbols']
+
+    @property
+    def structurefunction(self):
+        r""" The probability of the system to work, given the probability of
+            each component to work.
+
+            The structure function only depends on the reliability diagram,
+            so it is computed once and kept when the components change.
+
+            Returns
+            -------
+            out : symbolic expression
+                the probability of the system to work, as a function of the
+                :py:attr:`probabilitysymbols`
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> S.structurefunction
+            -p_M*p_P0*p_P1 + p_M*p_P0 + p_M*p_P1
+        """
+        key = 'structurefunction-%s' % self._enginename()
+        try:
+            return self._structure[key]
+        except KeyError:
+            from sympy import sympify
+            formula = sympify(self._structureprobability(self.probabilitysymbols))
+            self._structure[key] = formula
+            return self._structure[key]
+
     def _probabilitiescomputation(self, t, method):
         """ Given a system and a `method` (either availability or
             maintainability or reliability), this method evaluates the asking
             value by exploring the graph at time `t`.
+
+            The structure of the system is compiled once (see
+            :py:attr:`structurefunction`), only the probabilities of the
+            components are computed again when they change. The formulas of
+            the subsystems are their own cached ones.
         """
-        #TODO : improve complexity ?
-        #   n
-        # P(U a_i) = sum     (-1)^{-1+|s|} P(^a_i)
-        #  i=1      s\in[1,n],              i\in s
-        #           s != {}
-        #
-        paths = self.successpaths
-        R = 0.0
-        for S in ALLSUBSETS(len(paths)):
-            if not S:
-                continue
-            comps = set([c for i in S for c in paths[i][1:-1]])
-            r = reduce(lambda x, y:x*getattr(y, method)(t), comps, 1)
-            R += -r if len(S) % 2 == 0 else r
-        return R
+        hierarchy = self._hierarchy() if self.modular else None
+        if hierarchy:
+            return hierarchy[0]._formula(method)
+        values = [c._formula(method) if isinstance(c, System)
+                  else getattr(c, method)(t) for c in self.components]
+        if self._enginename() == 'inclusion-exclusion':
+            #the expansion of the union is only done once, symbolically
+            symbols = self.probabilitysymbols
+            return self.structurefunction.xreplace(dict(zip(symbols, values)))
+        #the other engines are compiled into structures evaluated in a
+        #single pass, which is as cheap as a substitution. A diagram which
+        #always works gives a constant.
+        from sympy import sympify
+        return sympify(self._structureprobability(values))
+
+    def _formula(self, method):
+        r""" Return the cached formula of the `method` (either availability
+            or maintainability or reliability) of the system
+        """
+        try:
+            return self._cache[method]
+        except KeyError:
+            formula = self._probabilitiescomputation(self._t, method)
+            self._cache[method] = formula
+            return formula
+
+    def _numeric(self, method, t):
+        r""" Compute the `method` (either availability or maintainability or
+            reliability) of the system at `t` with numpy only. A float is
+            returned for a single time.
+        """
+        times = asarray(t, dtype=float)
+        values = [c._numeric(method, times) for c in self.components]
+        value = self._structureprobability(values) + zeros(times.shape)
+        return value if value.shape else float(value)
+
+    def _numericfailure(self, method, t):
+        r""" Compute one minus the `method` of the system at `t` with numpy
+            only, when the system is used as a component. The probability of
+            the system to work is computed first, so a tiny probability of
+            failure loses its precision.
+        """
+        value = 1 - asarray(self._numeric(method, t))
+        return value if value.shape else float(value)
+
+    def _evaluate(self, method, t):
+        r""" Evaluate the `method` (either availability or maintainability or
+            reliability) of the system at `t`.
+
+            The formula is computed once and cached. When `t` is an array,
+            the formula is compiled into a numpy function (cached as well) and
+            evaluated in a single vectorized call.
+
+            In numeric mode, the probabilities of the components are computed
+            with numpy and given to the engine, no formula is built.
+        """
+        if _usenumpy(self, t):
+            return self._numeric(method, t)
+
+        from sympy import Symbol, lambdify
+        formula = self._formula(method)
+
+        if isinstance(t, Symbol):
+            return formula.nsimplify()
+        elif isinstance(t, (ndarray, list, tuple)):
+            key = '%s-numpy' % method
+            try:
+                func = self._cache[key]
+            except KeyError:
+                func = lambdify(self._t, formula, 'numpy')
+                self._cache[key] = func
+            t = asarray(t, dtype=float)
+            #a constant formula gives a scalar, whatever `t` is
+            return func(t) + zeros(t.shape)
+        else:
+            return formula.subs(self._t, t).evalf()
+
+    def evaluatebatch(self, metric, t, params):
+        r""" Evaluate a metric of the system for many sets of parameters
+
+            The components are not modified: the parameters of each scenario
+            are given as arrays, and all the scenarios are evaluated at once
+            with numpy, through the compiled structure function.
+
+            Parameters
+            ----------
+            metric : str
+                either 'reliability', 'availability' or 'maintainability'
+            t : float or array
+                the times when the metric is evaluated
+            params : array or dict
+                either an array of shape `(n_scenarios, n_components)` giving
+                the failure rate of each component (in the order of
+                :py:attr:`components`) for each scenario, or a dictionnary
+                with the keys `lambda_` and/or `mu` giving such arrays. A
+                single scenario may be given as an array of shape
+                `(n_components,)`. The rates which are not given are the ones
+                of the components. For
+                a voter, the rates are the ones of its replicated component.
+                The systems used as components are not handled.
+
+            Returns
+            -------
+            out : array
+                an array of shape `(n_scenarios, n_times)`
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> power = Component('P', 1e-6, 2e-4)
+            >>> S = System()
+            >>> S['E'] = [power]
+            >>> S[power] = [motor]
+            >>> S[motor] = 'S'
+            >>> S.evaluatebatch('reliability', [0, 1000],
+            ...                 [[1e-6, 1e-4], [1e-5, 1e-4]])
+            array([[1.        , 0.90393303],
+                   [1.        , 0.89583414]])
+        """
+        if metric not in ('reliability', 'availability', 'maintainability'):
+            msg = u'metric must be reliability, availability or maintainability'
+            raise ValueError(msg)
+        if not isinstance(params, dict):
+            params = {'lambda_': params}
+
+        components = self.components
+        if any(isinstance(c, System) for c in components):
+            raise ValueError(u'the components must not be systems')
+        rates = {}
+        for name in ('lambda_', 'mu'):
+            default = [getattr(getattr(c, 'component', c), name)
+                       for c in components]
+            rates[name] = atleast_2d(asarray(params.get(name, default),
+                                             dtype=float))
+            if rates[name].ndim != 2 or \
+               rates[name].shape[1] != len(components):
+                msg = u'{} must have the shape (n_scenarios, {}), not {}'
+                raise ValueError(msg.format(name, len(components),
+                                            rates[name].shape))
+        nscenarios = max(len(rates['lambda_']), len(rates['mu']))
+        if min(len(rates['lambda_']), len(rates['mu'])) not in (1, nscenarios):
+            raise ValueError(u'lambda_ and mu must have as many scenarios')
+        t = atleast_1d(asarray(t, dtype=float))
+
+        values = [c._vectorized(metric, t[None, :],
+                                rates['lambda_'][:, i, None],
+                                rates['mu'][:, i, None])
+                  for i, c in enumerate(components)]
+        return self._structureprobability(values) + zeros((nscenarios, len(t)))
+
+    def _statefunction(self):
+        r""" Return a picklable function computing the state of the system,
+            given the boolean arrays `states[..., i]` telling whether the
+            `i`-th component of :py:attr:`components` works.
+        """
+        hierarchy = self._hierarchy() if self.modular else None
+        if hierarchy:
+            return hierarchy[0]._statefunction()
+        engine = self._enginename()
+        if engine == 'inclusion-exclusion':
+            state = montecarlo.PathsState(self.pathmasks)
+        elif engine == 'bdd':
+            bdd, root = self._bdd()
+            state = montecarlo.CompiledState(partial(bdd.probability, root))
+        else:
+            compiled = {'sdp': self._sdp,
+                        'series-parallel': self._seriesparallel,
+                        'factoring': self._factoring}[engine]()
+            state = montecarlo.CompiledState(compiled.probability)
+
+        components = self.components
+        if not any(isinstance(c, System) for c in components):
+            return state
+        #the state of a subsystem is computed from its own components, given
+        #after each other by :py:meth:`_leaves`.
+        parts, start = [], 0
+        for c in components:
+            if isinstance(c, System):
+                size = len(c._leaves())
+                parts.append((list(range(start, start + size)),
+                              c._statefunction()))
+                start += size
+            else:
+                parts.append((start, None))
+                start += 1
+        return montecarlo.ModularState(state, parts)
+
+    def _leaves(self):
+        r""" The components whose states are given to :py:meth:`_statefunction`,
+            the systems used as components being replaced by their own ones.
+        """
+        hierarchy = self._hierarchy() if self.modular else None
+        if hierarchy:
+            return hierarchy[0]._leaves()
+        leaves = []
+        for c in self.components:
+            leaves.extend(c._leaves() if isinstance(c, System) else [c])
+        return leaves
+
+    def simulate(self, t, n_samples=10000, seed=None, metric='reliability',
+                 confidence=0.95, workers=1, batch_size=10000, rtol=None):
+        r""" Estimate a metric of the system by Monte Carlo simulation
+
+            The failure and repair times of every component are sampled from
+            exponential laws of rates `lambda_` and `mu`, and the state of the
+            system is computed for a whole batch of samples at once. This is
+            meant for the diagrams too large to be evaluated exactly.
+
+            Parameters
+            ----------
+            t : float or array
+                the times when the metric is estimated
+            n_samples : int, optional
+                the (maximal) number of simulated histories
+            seed : int, optional
+                the seed of the random number generator, for reproducible
+                results
+            metric : str, optional
+                either 'reliability', 'availability' or 'maintainability'
+            confidence : float, optional
+                the level of the confidence intervals
+            workers : int, optional
+                the number of processes used, all the processors being used
+                if `None`. The results do not depend on it.
+            batch_size : int, optional
+                the number of histories simulated at once
+            rtol : float, optional
+                if given, the simulation stops as soon as the relative
+                standard error of the estimations is lower than `rtol`
+
+            Returns
+            -------
+            out : Estimate
+                the estimated metric, its standard error and its confidence
+                interval (see :py:class:`fiabilipy.montecarlo.Estimate`),
+                each having the shape of `t`
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> power = Component('P', 1e-6, 2e-4)
+            >>> S = System()
+            >>> S['E'] = [power]
+            >>> S[power] = [motor]
+            >>> S[motor] = 'S'
+            >>> estimation = S.simulate(1000, n_samples=100000, seed=0)
+            >>> estimation.low < S.reliability(1000) < estimation.high
+            True
+        """
+        sampler = montecarlo.SystemSampler(self._leaves(),
+                                           self._statefunction(), metric, t)
+        result = montecarlo.run(sampler, n_samples, seed, batch_size, workers,
+                                rtol, confidence)
+        return montecarlo.reshape(result, asarray(t).shape)
+
+    def _componentvalues(self, metric, times):
+        r""" Compute the `metric` of each component of :py:attr:`components`
+            at the array of `times`, with numpy.
+        """
+        return [c._numeric(metric, times) + zeros(times.shape)
+                for c in self.components]
+
+    def _componentfailures(self, metric, times):
+        r""" Compute one minus the `metric` of each component of
+            :py:attr:`components` at the array of `times`, with numpy and
+            without subtracting from one.
+        """
+        return [c._numericfailure(metric, times) + zeros(times.shape)
+                for c in self.components]
+
+    def simulatefailure(self, t, n_samples=10000, seed=None,
+                        metric='reliability', confidence=0.95, workers=1,
+                        batch_size=10000, rtol=None):
+        r""" Estimate the probability of the system to fail by importance
+            sampling
+
+            The failure of a highly reliable system is too rare to be seen by
+            :py:meth:`simulate`. Here, the samples are drawn in the failure
+            domain, given by the minimal cuts (see
+            :py:class:`fiabilipy.montecarlo.CutSampler`), so the relative
+            error does not depend on how rare the failure is.
+
+            Parameters
+            ----------
+            t : float or array
+                the times when the probability is estimated
+            n_samples : int, optional
+                the (maximal) number of samples
+            seed : int, optional
+                the seed of the random number generator, for reproducible
+                results
+            metric : str, optional
+                the estimated probability is one minus this metric, either
+                'reliability' (unreliability) or 'availability'
+                (unavailability)
+            confidence : float, optional
+                the level of the confidence intervals
+            workers : int, optional
+                the number of processes used, all the processors being used
+                if `None`. The results do not depend on it.
+            batch_size : int, optional
+                the number of samples drawn at once
+            rtol : float, optional
+                if given, the simulation stops as soon as the relative
+                standard error of the estimations is lower than `rtol`
+
+            Returns
+            -------
+            out : Estimate
+                the estimated probability of failure, its standard error and
+                its confidence interval, each having the shape of `t`. The
+                relative error is given by its `relativeerror` attribute.
+
+            Examples
+            --------
+            >>> A, B, C = [Component(i, 1e-9) for i in 'ABC']
+            >>> S = System()
+            >>> S['E'] = [A, B, C]
+            >>> S[A] = S[B] = S[C] = 'S'
+            >>> estimation = S.simulatefailure(1000, seed=0)
+            >>> print('%.3g' % estimation.value)
+            1e-18
+        """
+        if metric not in ('reliability', 'availability'):
+            raise ValueError(u'metric must be reliability or availability')
+        times = atleast_1d(asarray(t, dtype=float))
+        failures = self._componentfailures(metric, times)
+        failures = asarray(failures).reshape(-1, len(times)).T
+        sampler = montecarlo.CutSampler(self.cutmasks(None), failures)
+        result = montecarlo.run(sampler, n_samples, seed, batch_size, workers,
+                                rtol, confidence)
+        return montecarlo.reshape(result, asarray(t).shape)
+
+    def bounds(self, t, method='esary-proschan', metric='reliability',
+               order=2, failure=False):
+        r""" Bound a metric of the system from its success paths and its
+            minimal cuts
+
+            The bounds only need the probability of the components of each
+            path to all work and of each cut to all fail, computed for all
+            the times at once (see :mod:`fiabilipy.bounds`). They are meant
+            for the systems too large to be evaluated exactly, but whose
+            paths and cuts can be listed: the cost is the one of listing the
+            minimal cuts (see :py:meth:`cutmasks`), and the success paths for
+            the Esary-Proschan bounds. Both are kept with the structure of
+            the system.
+
+            Parameters
+            ----------
+            t : float or array
+                the times when the metric is bounded
+            method : str, optional
+                * `'esary-proschan'`: the Esary-Proschan bounds, from the
+                  success paths and the minimal cuts,
+                * `'mincut'`: the bounds given by the minimal cuts only, the
+                  bound on the failure being the min-cut upper bound,
+                * `'rare-event'`: the rare-event approximation, the sum of the
+                  probabilities of the minimal cuts, which bounds the failure
+                  as well,
+                * `'bonferroni'`: the inclusion-exclusion expansion of the
+                  union of the minimal cuts, truncated after `order` terms.
+            metric : str, optional
+                either 'reliability' or 'availability'
+            order : int, optional
+                the order of the Bonferroni bounds
+            failure : bool, optional
+                if `True`, the bounds of the probability of failure (one minus
+                the metric) are given. They are computed without cancellation,
+                so they stay accurate for highly reliable systems.
+
+            Returns
+            -------
+            out : Bounds
+                the approximated metric (`value`), its guaranteed lower and
+                upper bounds (`low` and `high`), and the guaranteed `error`
+                of the approximation, each having the shape of `t`
+
+            Examples
+            --------
+            >>> A, B, C = [Component(i, 1e-6) for i in 'ABC']
+            >>> S = System()
+            >>> S['E'] = [A, B]
+            >>> S[A] = S[B] = [C]
+            >>> S[C] = 'S'
+            >>> result = S.bounds(1000)
+            >>> result.low <= S.reliability(1000) <= result.high
+            True
+            >>> result = S.bounds(1000, 'rare-event', failure=True)
+            >>> print('%.4e (error %.1e)' % (result.value, result.error))
+            1.0005e-03 (error 1.0e-06)
+        """
+        if method not in bounds.METHODS:
+            msg = u'method must be one of {}'.format(', '.join(bounds.METHODS))
+            raise ValueError(msg)
+        if metric not in ('reliability', 'availability'):
+            raise ValueError(u'metric must be reliability or availability')
+
+        times = atleast_1d(asarray(t, dtype=float))
+        q = asarray(self._componentfailures(metric, times)).reshape(
+                                                            -1, len(times))
+        cuts = self.cutmasks(None)
+        if method == 'esary-proschan':
+            result = bounds.esaryproschan(self.pathmasks, cuts, q)
+        elif method == 'mincut':
+            result = bounds.mincut(cuts, q)
+        elif method == 'rare-event':
+            result = bounds.rareevent(cuts, q)
+        else:
+            result = bounds.bonferroni(cuts, q, order)
+        if not failure:
+            result = result.complement()
+
+        shape = asarray(t).shape
+        def reshape(value):
+            value = (value + zeros(times.shape)).reshape(shape)
+            return value if value.shape else float(value)
+        return bounds.Bounds(*[reshape(value) for value in result])
+
+    def importance(self, t, measures=None, metric='reliability'):
+        r""" Compute the importance measures of the components
+
+            All the measures of all the components are computed from the
+            probability of the system and its derivatives with respect to
+            the probability of each component, obtained in a single
+            traversal of the binary decision diagram of the structure
+            function, whatever the engine of the system. The components are
+            not modified.
+
+            Let :math:`R` be the probability of the system to work,
+            :math:`Q = 1 - R`, and :math:`p_i`, :math:`q_i = 1 - p_i` the
+            probabilities of the component `i` to work and to fail. The
+            measures are:
+
+            * `'birnbaum'`: :math:`I_B = \partial R / \partial p_i`,
+            * `'criticality'`: :math:`I_B q_i / Q`, the probability that the
+              component caused the failure of the system,
+            * `'fussell-vesely'`: :math:`(Q - Q_{|q_i = 0}) / Q`, the part of
+              the unreliability removed when the component is perfect. For
+              the coherent systems described by reliability diagrams, it is
+              equal to the criticality,
+            * `'raw'` (risk achievement worth): :math:`Q_{|q_i = 1} / Q`,
+            * `'rrw'` (risk reduction worth): :math:`Q / Q_{|q_i = 0}`,
+
+            with :math:`R_{|p_i = 1} = R + q_i I_B` and
+            :math:`R_{|p_i = 0} = R - p_i I_B`.
+
+            Parameters
+            ----------
+            t : float or array
+                the times when the measures are computed
+            measures : list, optional
+                the measures to compute, all of them if not given
+            metric : str, optional
+                either 'reliability' or 'availability'
+
+            Returns
+            -------
+            out : dict
+                `out[measure][component]` is the value of the measure for the
+                component, having the shape of `t`
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> birnbaum = S.importance(1000, ['birnbaum'])['birnbaum']
+            >>> print('%.6f' % birnbaum[motor])
+            0.999999
+        """
+        if measures is None:
+            measures = IMPORTANCES
+        for measure in measures:
+            if measure not in IMPORTANCES:
+                msg = u'measures must be among {}'.format(', '.join(IMPORTANCES))
+                raise ValueError(msg)
+        if metric not in ('reliability', 'availability'):
+            raise ValueError(u'metric must be reliability or availability')
+
+        times = atleast_1d(asarray(t, dtype=float))
+        values = self._componentvalues(metric, times)
+        bdd, root = self._bdd()
+        R, derivatives = bdd.derivatives(root, values)
+        Q = 1 - (R + zeros(times.shape))
+
+        shape = asarray(t).shape
+        def reshape(value):
+            value = (value + zeros(times.shape)).reshape(shape)
+            return value if value.shape else float(value)
+
+        result = dict((measure, {}) for measure in measures)
+        with errstate(divide='ignore', invalid='ignore'):
+            for i, c in enumerate(self.components):
+                p = values[i]
+                birnbaum = derivatives.get(i, 0) + zeros(times.shape)
+                improved = Q - (1 - p) * birnbaum #Q when c is perfect
+                computed = {
+                    'birnbaum': birnbaum,
+                    'criticality': birnbaum * (1 - p) / Q,
+                    'fussell-vesely': (Q - improved) / Q,
+                    'raw': (Q + p * birnbaum) / Q,
+                    'rrw': Q / improved,
+                }
+                for measure in measures:
+                    result[measure][c] = reshape(computed[measure])
+        return result
 
     def availability(self, t):
         r""" Compute the availability of the whole system
@@ -188,17 +1533,18 @@ class System(object):
 
             Parameters
             ----------
-            t : float or Symbol
+            t : float, array or Symbol
 
             Returns
             -------
-            out : float or symbolic expression
+            out : float, array or symbolic expression
                 The availability calculated for the given `t`
 
             Examples
             --------
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> power = Component('P', 1e-6, 2e-4)
+            >>> from sympy import Symbol
             >>> t = Symbol('t', positive=True)
             >>> S = System()
             >>> S['E'] = [power]
@@ -210,16 +1556,7 @@ class System(object):
             >>> S.availability(1000)
             0.995774842225189
         """
-        try:
-            formula = self._cache['availability']
-        except KeyError:
-            formula = self._probabilitiescomputation(self._t, 'availability')
-            self._cache['availability'] = formula
-
-        if isinstance(t, Symbol):
-            return formula.nsimplify()
-        else:
-            return formula.subs(self._t, t).evalf()
+        return self._evaluate('availability', t)
 
     def reliability(self, t):
         r""" Compute the reliability of the whole system
@@ -228,17 +1565,18 @@ class System(object):
 
             Parameters
             ----------
-            t : float or Symbol
+            t : float, array or Symbol
 
             Returns
             -------
-            out : float or symbolic expression
+            out : float, array or symbolic expression
                 The reliability calculated for the given `t`
 
             Examples
             --------
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> power = Component('P', 1e-6, 2e-4)
+            >>> from sympy import Symbol
             >>> t = Symbol('t', positive=True)
             >>> S = System()
             >>> S['E'] = [power]
@@ -248,17 +1586,10 @@ class System(object):
             exp(-101*t/1000000)
             >>> S.reliability(1000)
             0.903933032885864
+            >>> S.reliability([0, 1000]) #doctest: +NORMALIZE_WHITESPACE
+            array([1.        , 0.90393303])
         """
-        try:
-            formula = self._cache['reliability']
-        except KeyError:
-            formula = self._probabilitiescomputation(self._t, 'reliability')
-            self._cache['reliability'] = formula
-
-        if isinstance(t, Symbol):
-            return formula.nsimplify()
-        else:
-            return formula.subs(self._t, t).evalf()
+        return self._evaluate('reliability', t)
 
     def maintainability(self, t):
         r""" Compute the maintainability of the whole system
@@ -267,17 +1598,18 @@ class System(object):
 
             Parameters
             ----------
-            t : float or Symbol
+            t : float, array or Symbol
 
             Returns
             -------
-            out : float or symbolic expression
+            out : float, array or symbolic expression
                 The maintainability calculated for the given `t`
 
             Examples
             --------
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> power = Component('P', 1e-6, 2e-4)
+            >>> from sympy import Symbol
             >>> t = Symbol('t', positive=True)
             >>> S = System()
             >>> S['E'] = [power]
@@ -288,16 +1620,16 @@ class System(object):
             >>> S.maintainability(1000)
             0.181269246922001
         """
-        try:
-            formula = self._cache['maintainability']
-        except KeyError:
-            formula = self._probabilitiescomputation(self._t, 'maintainability')
-            self._cache['maintainability'] = formula
+        return self._evaluate('maintainability', t)
 
-        if isinstance(t, Symbol):
-            return formula.nsimplify()
-        else:
-            return formula.subs(self._t, t).evalf()
+    def _expsum(self, method, exact=True):
+        r""" Return the `method` (either availability or maintainability or
+            reliability) of the system as a sum of exponentials (see
+            :py:class:`fiabilipy.expsum.ExpSum`), computed by the engine of
+            the system. The sum is made of floats if `exact` is false.
+        """
+        values = [c._expsum(method, exact) for c in self.components]
+        return ExpSum.coerce(self._structureprobability(values), exact)
 
     @property
     def mttf(self):
@@ -322,12 +1654,14 @@ class System(object):
             >>> S.mttf
             1000000/101
         """
+        exact = not _usenumpy(self)
+        key = 'mttf' if exact else 'mttf-numeric'
         try:
-            return self._cache['mttf']
+            return self._cache[key]
         except KeyError:
-            t = Symbol('t', positive=True)
-            self._cache['mttf'] = self.reliability(t).integrate((t, 0, oo))
-            return self._cache['mttf']
+            reliability = self._expsum('reliability', exact)
+            self._cache[key] = reliability.integral()
+            return self._cache[key]
 
     @property
     def mttr(self):
@@ -352,20 +1686,23 @@ class System(object):
             >>> S.mttr
             2265100/453
         """
+        exact = not _usenumpy(self)
+        key = 'mttr' if exact else 'mttr-numeric'
         try:
-            return self._cache['mttr']
+            return self._cache[key]
         except KeyError:
-            t = Symbol('t', positive=True)
-            mttr = (1 - self.maintainability(t)).integrate((t, 0, oo))
-            self._cache['mttr'] = mttr
-            return self._cache['mttr']
+            mttr = (1 - self._expsum('maintainability', exact)).integral()
+            self._cache[key] = mttr
+            return self._cache[key]
 
 
     @property
     def successpaths(self):
         r""" Return all the success paths of the reliability diagram
 
-            A success path is defined as a path from 'E' to 'S'.
+            A success path is defined as a path from 'E' to 'S'. All of them
+            are kept in memory: :py:meth:`countpaths` tells how many they
+            are, and :py:meth:`iterpaths` enumerates them one by one.
 
             Returns
             -------
@@ -386,10 +1723,39 @@ class System(object):
              ['E', Component(P1), Component(M), 'S']]
         """
         try:
-            return self._cache['successpaths']
+            return self._structure['successpaths']
         except KeyError:
-            self._cache['successpaths'] = list(self.findallpaths('E', 'S'))
-            return self._cache['successpaths']
+            self._structure['successpaths'] = list(self.findallpaths('E', 'S'))
+            return self._structure['successpaths']
+
+    @property
+    def pathmasks(self):
+        r""" Return all the success paths of the reliability diagram, as
+            bitmasks
+
+            The bit `i` of a path is set if the `i`-th component of
+            :py:attr:`components` belongs to the path.
+
+            Returns
+            -------
+            out : list of int
+                the success paths, sorted
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> S.pathmasks
+            [5, 6]
+        """
+        #the paths may have been found by another system of the same shape,
+        #their order would depend on it
+        return self._stored('pathmasks', self._findpathmasks,
+                            lambda masks: sorted(self._frommasks(masks)))
 
     def findallpaths(self, start='E', end='S'):
         r""" Find all paths between two components in the reliability diagram
@@ -417,7 +1783,98 @@ class System(object):
             >>> list(S.findallpaths(start=powers[0])) #doctest: +NORMALIZE_WHITESPACE
             [[Component(P0), Component(M), 'S']]
         """
-        return [[self._map[x] for x in l] for l in nx.all_simple_paths(self._graph, start.__str__(), end.__str__())]
+        return [[self._map[x] for x in l] for l in self._graph.paths(start.__str__(), end.__str__())]
+
+    def iterpaths(self, start='E', end='S', max_paths=None, max_length=None,
+                  timeout=None):
+        r""" Iterate over the paths between two components, without keeping
+            them in memory
+
+            The enumeration stops as soon as a limit is reached, so fewer
+            paths than :py:meth:`countpaths` may be given.
+
+            Parameters
+            ----------
+            start : Component, optional
+                find paths from this component
+            end : Component, optional
+                find paths to this component
+            max_paths : int, optional
+                the maximal number of paths given
+            max_length : int, optional
+                only the paths made of at most `max_length` components
+                (besides `start` and `end`) are given
+            timeout : float, optional
+                the enumeration stops after `timeout` seconds
+
+            Returns
+            -------
+            out : iterator
+                an iterator on the paths from `start` to `end`, in the order
+                of :py:meth:`findallpaths`
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> list(S.iterpaths(max_paths=1)) #doctest: +NORMALIZE_WHITESPACE
+            [['E', Component(P0), Component(M), 'S']]
+            >>> list(S.iterpaths(max_length=1))
+            []
+        """
+        if max_paths is not None and max_paths < 0:
+            raise ValueError(u'max_paths must not be negative')
+        deadline = time() + timeout if timeout is not None else None
+        paths = self._graph.paths(start.__str__(), end.__str__(),
+                                  max_length, deadline)
+
+        #the arguments are checked when called, not on the first path
+        def generate():
+            for n, path in enumerate(paths):
+                if n == max_paths:
+                    break
+                if deadline is not None and time() >= deadline:
+                    break
+                yield [self._map[x] for x in path]
+        return generate()
+
+    def countpaths(self, start='E', end='S'):
+        r""" Count the paths between two components, without enumerating
+            them
+
+            The cost is linear with the size of the diagram, so the number
+            of success paths can be known before enumerating them (see
+            :py:meth:`iterpaths`).
+
+            Parameters
+            ----------
+            start : Component, optional
+                count paths from this component
+            end : Component, optional
+                count paths to this component
+
+            Returns
+            -------
+            out : int or None
+                the number of paths, or `None` if the diagram has a cycle
+                reachable from `start`
+
+            Examples
+            --------
+            >>> C = [Component('C{}'.format(i), 1e-4) for i in range(40)]
+            >>> S = System()
+            >>> S['E'] = [C[0], C[1]]
+            >>> for i in range(0, 38, 2):
+            ...     S[C[i]] = S[C[i + 1]] = [C[i + 2], C[i + 3]]
+            >>> S[C[38]] = S[C[39]] = 'S'
+            >>> S.countpaths()
+            1048576
+        """
+        return self._graph.countpaths(start.__str__(), end.__str__())
 
     def minimalcuts(self, order=1):
         r""" List the minimal cuts of the system of order <= `order`
@@ -426,12 +1883,18 @@ class System(object):
             such as if there all unavailable, the whole system is unavailable.
 
             This function aims to find out every minimal cuts of order inferior
-            to `order`.
+            to `order`. The diagram is reduced to series and parallel blocks,
+            whose minimal cuts are combined, and only the minimal cuts of the
+            irreducible remainder are found as the minimal transversals of its
+            success paths, by Berge’s algorithm (see
+            :py:func:`fiabilipy.reduction.minimalcuts`). The success paths of
+            the whole diagram are not enumerated.
 
             Parameters
             ----------
-            order : int, optional
-                The maximal order to look for.
+            order : int or None, optional
+                The maximal order to look for. If `None`, all the minimal cuts
+                are given.
 
             Returns
             -------
@@ -451,56 +1914,51 @@ class System(object):
             [frozenset(...)]
             >>> S.minimalcuts(order=2) #doctest: +ELLIPSIS
             [frozenset(...), frozenset(...)]
+            >>> S.minimalcuts(order=None) #doctest: +ELLIPSIS
+            [frozenset(...), frozenset(...)]
         """
-        paths = self.successpaths
-        incidence = empty((len(paths), len(self.components)))
-
-        for path in range(len(paths)):
-            for comp in range(len(self.components)):
-                if self.components[comp] in paths[path]:
-                    incidence[path, comp] = 1
-                else:
-                    incidence[path, comp] = 0
+        components = self.components
+        return [frozenset(components[i] for i in indices(cut))
+                for cut in self.cutmasks(order)]
 
-        pairs = list(self.components)
-        minimal = []
+    def cutmasks(self, order=1):
+        r""" List the minimal cuts of the system of order <= `order`, as
+            bitmasks
 
-        for k in range(1, order+1):
-            if incidence.shape[1] == 0: #No more minimalcuts
-                break
-            #Let’s looking for column of ones
-            vones = ones(len(paths))
-            indicetodelete = []
-            for comp in range(len(pairs)):
-                if (incidence[:, comp] == vones).all():
-                    if isinstance(pairs[comp], frozenset):
-                        minimal.append(pairs[comp])
-                    else:
-                        minimal.append(frozenset([pairs[comp]]))
-                    indicetodelete.append(comp)
-
-            if k >= order:
-                #so it’s useless to compute newpairs and the new incidence
-                #matrix because they won’t be used anymore.
-                continue
+            The bit `i` of a cut is set if the `i`-th component of
+            :py:attr:`components` belongs to the cut.
 
-            incidence = delete(incidence, indicetodelete, axis=1)
-            pairs = [p for i, p in enumerate(pairs) if i not in indicetodelete]
-            newpairs = list(combinations(list(range(len(pairs))), k+1))
-            incidence_ = empty((len(paths), len(newpairs)))
-            for x in range(incidence_.shape[0]):
-                for y in range(incidence_.shape[1]):
-                    value = 0
-                    for comp in newpairs[y]:
-                        if incidence[x, comp]:
-                            value = 1
-                            break
-                    incidence_[x, y] = value
+            Parameters
+            ----------
+            order : int or None, optional
+                The maximal order to look for. If `None`, all the minimal cuts
+                are given.
 
-            incidence = incidence_
-            pairs = [frozenset([pairs[x] for x in p]) for p in newpairs]
+            Returns
+            -------
+            out : list of int
+                the minimal cuts, sorted by order
 
-        return minimal
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> S.components
+            [Component(P0), Component(P1), Component(M)]
+            >>> S.cutmasks(order=2)
+            [4, 3]
+        """
+        def compute():
+            return reduction.minimalcuts(self._canonicalgraph(), order)
+        def view(cuts):
+            #the order of the cuts of the same order depends on the numbering
+            cuts = self._frommasks(cuts)
+            return sorted(cuts, key=lambda cut: (popcount(cut), indices(cut)))
+        return self._stored('minimalcuts-%s' % order, compute, view)
 
     def faulttreeanalysis(self, output=None, order=2):
         r""" Build the fault tree analysis of the system
@@ -563,4 +2021,27 @@ class System(object):
             >>> p.show()
 
         """
-        nx.draw_graphviz(self._graph)
+        import networkx as nx
+        nx.draw_graphviz(self.tonetworkx())
+
+    def tonetworkx(self):
+        r""" Return the reliability diagram as a networkx graph
+
+            Returns
+            -------
+            out : networkx.DiGraph
+                the diagram, the nodes being the names of the components,
+                `'E'` and `'S'`
+
+            Examples
+            --------
+            >>> motor = Component('M', 1e-4, 3e-2)
+            >>> powers = [Component('P{}'.format(i), 1e-6, 2e-4) for i in (0,1)]
+            >>> S = System()
+            >>> S['E'] = [powers[0], powers[1]]
+            >>> S[powers[0]] = S[powers[1]] = [motor]
+            >>> S[motor] = 'S'
+            >>> sorted(S.tonetworkx().edges()) #doctest: +NORMALIZE_WHITESPACE
+            [('E', 'P0'), ('E', 'P1'), ('M', 'S'), ('P0', 'M'), ('P1', 'M')]
+        """
+        return self._graph.tonetworkx()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#Copyright (C) 2013 Chabot Simon, Sadaoui Akim
+
+#This program is free software; you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation; either version 2 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License along
+#with this program; if not, write to the Free Software Foundation, Inc.,
+#51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import print_function, absolute_import
+import unittest2
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from fiabilipy import Component, System, setcache
+from fiabilipy.cache import DiskCache, setshared
+from fiabilipy.system import ENGINES
+from fiabilipy import cache
+
+class TestCache(unittest2.TestCase):
+    """ Test the persistent cache.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        setcache(None)
+        setshared(0)
+        shutil.rmtree(self.directory)
+
+    def test_diskcache(self):
+        """ Check the values are stored, and the least recently used ones
+            removed when the cache is full.
+        """
+        store = DiskCache(self.path, maxsize=3000)
+        store.put('a', b'a' * 900)
+        store.put('b', [1, 2, 3])
+        self.assertEqual(store.get('a'), b'a' * 900)
+        self.assertEqual(store.get('b'), [1, 2, 3])
+        self.assertIn('b', store)
+        self.assertIsNone(store.get('c'))
+        self.assertEqual(store.get('c', 0), 0)
+        store.discard('b')
+        self.assertEqual(len(store), 1)
+
+        for key in 'bcd':
+            time.sleep(0.01)
+            store.put(key, b'x' * 900)
+        time.sleep(0.01)
+        store.get('b')
+        time.sleep(0.01)
+        store.put('e', b'x' * 900) #`a` and `c` are the least recently used
+        self.assertEqual(sorted(k for k in 'abcde' if k in store),
+                         ['b', 'd', 'e'])
+        self.assertLessEqual(store.size, 3000)
+        store.put('f', b'x' * 4000) #too large to be stored
+        self.assertNotIn('f', store)
+
+        #another connection (or process) sees the same values
+        other = pickle.loads(pickle.dumps(store))
+        self.assertEqual(other.get('b'), b'x' * 900)
+        other.clear()
+        self.assertEqual(len(store), 0)
+
+    def test_systems(self):
+        """ Check the structures of a diagram are loaded from the cache by
+            another system with the same diagram.
+        """
+        def build(prefix, engine):
+            C = [Component('{}{}'.format(prefix, i), (i + 1) * 1e-4)
+                 for i in range(5)]
+            system = System(engine=engine)
+            system['E'] = [C[0], C[1]]
+            system[C[0]] = [C[2], C[4]]
+            system[C[4]] = [C[3]]
+            system[C[1]] = [C[3]]
+            system[C[2]] = system[C[3]] = 'S'
+            return system
+
+        setcache(self.path)
+        for engine in ENGINES:
+            first, second = build('A', engine), build('B', engine)
+            value = float(first.reliability(1000))
+            cuts = first.cutmasks(None)
+            self.assertAlmostEqual(float(second.reliability(1000)), value)
+            self.assertEqual(second.cutmasks(None), cuts)
+            #the success paths were not searched again
+            self.assertNotIn('successpaths', second._structure)
+
+        #an entry which can not be read is computed again
+        store = cache.CACHE
+        for key in [k for k, in store._connect().execute(
+                                'SELECT key FROM entries')]:
+            store._connect().execute('UPDATE entries SET value = ? '
+                                     'WHERE key = ?', (b'garbage', key))
+        third = build('C', 'bdd')
+        self.assertAlmostEqual(float(third.reliability(1000)), value)
+        self.assertIn('successpaths', third._structure)
+
+        setcache(None)
+        fourth = build('D', 'bdd')
+        fourth.reliability(1000)
+        self.assertIn('successpaths', fourth._structure)
+
+    def test_shared(self):
+        """ Check the systems having the same shape share their structures,
+            whatever the names and the insertion order of their components.
+        """
+        def build(prefix, engine, reverse=False):
+            C = [Component('{}{}'.format(prefix, i), (i + 1) * 1e-4,
+                           (i + 2) * 1e-3) for i in range(6)]
+            links = [('E', [C[0], C[1]]), (C[0], [C[2], C[4]]),
+                     (C[4], [C[3]]), (C[1], [C[3], C[5]]),
+                     (C[2], 'S'), (C[3], 'S'), (C[5], 'S')]
+            if reverse: #another insertion order, and other rates
+                links = links[:1] + links[:0:-1]
+                C.reverse()
+                links[0] = ('E', [C[-2], C[-1]])
+            system = System(engine=engine)
+            for component, successors in links:
+                system[component] = successors
+            return system
+
+        t = [100, 1000, 5000]
+        for engine in ENGINES:
+            setshared(0)
+            alone = build('A', engine, reverse=True)
+            values = alone.availability(t)
+            importance = alone.importance(t)
+            cuts = alone.cutmasks(None)
+            paths = alone.pathmasks
+            #without any cache, the canonical numbering is not computed
+            self.assertNotIn('canonical', alone._structure)
+
+            setshared()
+            first = build('B', engine)
+            second = build('A', engine, reverse=True)
+            self.assertEqual(first.structuralhash, second.structuralhash)
+            self.assertEqual(first.canonicalform, second.canonicalform)
+            first.availability(t)
+            first.importance(t)
+            first.minimalcuts(None)
+            first.pathmasks #the cuts are found without the paths
+            for value, expected in zip(second.availability(t), values):
+                self.assertAlmostEqual(value, expected)
+            self.assertEqual(second.cutmasks(None), cuts)
+            self.assertEqual(second.pathmasks, paths)
+            for measure, components in second.importance(t).items():
+                expected = importance[measure]
+                for c, d in zip(second.components, alone.components):
+                    for v, e in zip(components[c], expected[d]):
+                        self.assertAlmostEqual(v, e)
+            #the success paths were not searched again
+            self.assertNotIn('successpaths', second._structure)
+
+if __name__ == '__main__':
+    unittest2.main()
@@ -91,5 +91,27 @@ class TestMarkov(unittest2.TestCase):
                 self.assertAlmostEqual(self.process.value(t, states),
                                        self.systems[name].availability(t))
 
+    def test_simulate(self):
+        #The Monte Carlo estimations must agree with the exact values, and
+        #must not depend on the number of processes used.
+        times = [1000, 5000, 20000]
+        for name, states in self.states.items():
+            estimation = self.process.simulate(times, states, 20000, seed=1,
+                                               batch_size=5000)
+            for t, value, err in zip(times, estimation.value,
+                                     estimation.stderr):
+                self.assertLessEqual(abs(self.process.value(t, states) - value),
+                                     4 * err + 1e-6)
+            parallel = self.process.simulate(times, states, 20000, seed=1,
+                                             batch_size=5000, workers=2)
+            self.assertEqual(estimation.value.tolist(),
+                             parallel.value.tolist())
+            self.assertEqual(estimation.stderr.tolist(),
+                             parallel.stderr.tolist())
+
+        estimation = self.process.simulate(1000, n_samples=1000, seed=1)
+        self.assertEqual(estimation.value.shape, (16,))
+        self.assertAlmostEqual(estimation.value.sum(), 1)
+
 if __name__ == '__main__':
     unittest2.main()
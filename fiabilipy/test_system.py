@@ -19,11 +19,35 @@
 
 from __future__ import print_function, absolute_import
 import unittest2
+import subprocess
+import sys
 
-from sympy import symbols, exp
-from networkx import DiGraph, is_isomorphic
+from sympy import symbols, exp, oo
+from networkx import DiGraph, is_isomorphic, all_simple_paths
+from numpy import linspace, expm1
 
-from fiabilipy import Component, Voter, System
+from fiabilipy import Component, Voter, System, setnumeric
+from fiabilipy.system import ENGINES
+from fiabilipy.bitset import indices
+
+def plant(scale=1):
+    """ Build the plant shared by the numeric tests: three power supplies
+        and a 2-out-of-3 voter feeding a motor, which is not series-parallel.
+        The failure rates are multiplied by `scale`.
+
+        Returns the system, the power supplies, the motor and the voter.
+    """
+    alim = [Component('A{}'.format(i), scale * 1e-4, 1e-2) for i in (0, 1, 2)]
+    motor = Component('M', scale * 2e-4, 5e-3)
+    voter = Voter(Component('V', scale * 1e-4, 2e-3), 2, 3, scale * 1e-5, 1e-3)
+    system = System()
+    system['E'] = [alim[0], alim[1], voter]
+    system[alim[0]] = [motor, alim[2]]
+    system[alim[1]] = [alim[2]]
+    system[voter] = [motor]
+    system[alim[2]] = 'S'
+    system[motor] = 'S'
+    return system, alim, motor, voter
 
 class TestComponent(unittest2.TestCase):
     """ Test the Component class.
@@ -193,6 +217,32 @@ class TestSystem(unittest2.TestCase):
                     cuts[order][name].remove(cut)
                 self.assertEqual(cuts[order][name], set([]))
 
+    def test_allminimalcuts(self):
+        """ Check all the minimal cuts are found when the order is not given.
+        """
+        alim, motors = self.alim, self.motors
+        cuts = set([frozenset([motors[0], motors[1]]),
+                    frozenset([alim[0], alim[1], motors[1]]),
+                    frozenset([motors[0], alim[1], alim[2]]),
+                    frozenset([alim[0], alim[1], alim[2]])])
+        self.assertEqual(set(self.systems['complex'].minimalcuts(None)), cuts)
+        self.assertEqual(set(self.systems['complex'].minimalcuts(2)),
+                         set([frozenset([motors[0], motors[1]])]))
+
+    def test_masks(self):
+        """ Check the bitmasks describe the same paths and cuts as the lists
+            of components.
+        """
+        for S in self.systems.values():
+            components = S.components
+            paths = set(frozenset(path[1:-1]) for path in S.successpaths)
+            self.assertEqual(len(S.pathmasks), len(paths))
+            self.assertEqual(set(frozenset(components[i] for i in indices(m))
+                                 for m in S.pathmasks), paths)
+            for cut, mask in zip(S.minimalcuts(2), S.cutmasks(2)):
+                self.assertEqual(cut,
+                                 set(components[i] for i in indices(mask)))
+
     def test_mttfvalues(self):
         r""" Check if the calculated MTTF values are correct.
              Testing MTTF values is interesting because there are computed by
@@ -223,6 +273,177 @@ class TestSystem(unittest2.TestCase):
             diff = values - self.systems[name].mttf
             self.assertEqual(diff.simplify(), 0)
 
+    def test_mttfintegral(self):
+        """ Check the closed-form MTTF and MTTR against a symbolic
+            integration, for every engine.
+        """
+        t = symbols('t', positive=True)
+        voter = Voter(Component('V', 1e-4, 2e-2), 2, 3, 1e-5, 1e-3)
+        alim = [Component('A{}'.format(i), 1e-4, 1e-2) for i in (0, 1)]
+        motor = Component('M', 2e-4, 5e-2)
+        system = System()
+        system['E'] = [alim[0], voter]
+        system[alim[0]] = [motor, alim[1]]
+        system[voter] = [motor]
+        system[alim[1]] = 'S'
+        system[motor] = 'S'
+
+        self.assertAlmostEqual(
+            float(voter.mttf), float(voter.reliability(t).integrate((t, 0, oo))))
+        self.assertAlmostEqual(
+            float(voter.mttr),
+            float((1 - voter.maintainability(t)).integrate((t, 0, oo))))
+
+        mttf = float(system.reliability(t).integrate((t, 0, oo)))
+        mttr = float((1 - system.maintainability(t)).integrate((t, 0, oo)))
+        for engine in ENGINES:
+            system.engine = engine
+            self.assertAlmostEqual(float(system.mttf) / mttf, 1)
+            self.assertAlmostEqual(float(system.mttr) / mttr, 1)
+
+    def test_numeric(self):
+        """ Check the numeric mode gives the same values as the symbolic one,
+            as floats and arrays, without building any formula.
+        """
+        t = symbols('t', positive=True)
+        voter = Voter(Component('V', 1e-4, 2e-2), 2, 3, 1e-5, 1e-3)
+        alim = [Component('A{}'.format(i), 1e-4, 1e-2) for i in (0, 1)]
+        motor = Component('M', 2e-4, 5e-2, initialy_avaible=False)
+        system, numeric = System(), System(numeric=True)
+        for S in (system, numeric):
+            S['E'] = [alim[0], voter]
+            S[alim[0]] = [motor, alim[1]]
+            S[voter] = [motor]
+            S[alim[1]] = 'S'
+            S[motor] = 'S'
+
+        times = linspace(0, 5000, 4)
+        for engine in ENGINES:
+            system.engine = numeric.engine = engine
+            for metric in ('reliability', 'availability', 'maintainability'):
+                value = getattr(numeric, metric)(1000)
+                self.assertIsInstance(value, float)
+                self.assertAlmostEqual(value,
+                                       float(getattr(system, metric)(1000)))
+                values = getattr(numeric, metric)(times)
+                for a, b in zip(values, getattr(system, metric)(times)):
+                    self.assertAlmostEqual(a, b)
+            self.assertAlmostEqual(numeric.mttf / float(system.mttf), 1)
+            self.assertAlmostEqual(numeric.mttr / float(system.mttr), 1)
+            self.assertIsInstance(numeric.mttf, float)
+        self.assertEqual(set(numeric._cache), set(['mttf-numeric',
+                                                   'mttr-numeric']))
+        #the symbolic expressions are still available
+        self.assertEqual(numeric.reliability(t), system.reliability(t))
+
+        components = [voter, voter.component, motor]
+        try:
+            setnumeric()
+            for c in components:
+                for metric in ('reliability', 'availability',
+                               'maintainability'):
+                    value = getattr(c, metric)(1000)
+                    self.assertIsInstance(value, float)
+                    c.numeric = False
+                    self.assertAlmostEqual(value,
+                                           float(getattr(c, metric)(1000)))
+                    c.numeric = None
+            self.assertIsInstance(voter.mttf, float)
+        finally:
+            setnumeric(False)
+        self.assertNotIsInstance(voter.mttf, float)
+
+    def test_lazyimports(self):
+        """ Check the heavy dependencies are only loaded when needed: not at
+            all by `import fiabilipy`, and sympy is not needed in numeric
+            mode.
+        """
+        probe = ('import sys; print(" ".join(m for m in '
+                 '("sympy", "scipy", "networkx") if m in sys.modules))')
+        def loaded(statement):
+            output = subprocess.check_output([sys.executable, '-c',
+                                              statement + '; ' + probe])
+            return output.decode().split()
+
+        self.assertEqual(loaded('import fiabilipy'), [])
+        self.assertEqual(loaded('from fiabilipy import System'), [])
+        statement = ('from fiabilipy import Component, System; '
+                     'S = System(numeric=True); a = Component("A", 1e-4); '
+                     'S["E"] = [a]; S[a] = "S"; S.reliability(10); S.mttf')
+        self.assertNotIn('sympy', loaded(statement))
+        #the diagrams are stored without networkx
+        self.assertNotIn('networkx', loaded(statement))
+
+    def test_engines(self):
+        """ Check every engine gives the same probabilities as the
+            inclusion-exclusion one.
+        """
+        #the bridge is the simplest system which is not series-parallel
+        bridge = System()
+        bridge['E'] = [self.alim[0], self.alim[1]]
+        bridge[self.alim[0]] = [self.motors[0], self.alim[2]]
+        bridge[self.alim[1]] = [self.motors[1]]
+        bridge[self.alim[2]] = [self.motors[1]]
+        bridge[self.motors[0]] = 'S'
+        bridge[self.motors[1]] = 'S'
+        #a direct link always works, whatever its components
+        direct = System()
+        direct['E'] = [self.alim[0], 'S']
+        direct[self.alim[0]] = 'S'
+        systems = dict(self.systems, bridge=bridge, direct=direct)
+
+        t = symbols('t', positive=True)
+        values = {self.lambdas['alim']: 1e-4, self.lambdas['motor']: 2e-5,
+                  self.mus['alim']: 5e-4, self.mus['motor']: 2e-3, t: 1000}
+        for (name, S) in systems.items():
+            for method in ('reliability', 'availability', 'maintainability'):
+                wanted = getattr(S, method)(t).subs(values)
+                for engine in ENGINES:
+                    S.engine = engine
+                    value = getattr(S, method)(t).subs(values)
+                    self.assertAlmostEqual(float(wanted), float(value))
+                    value = getattr(S, method)(values[t]).subs(values)
+                    self.assertAlmostEqual(float(wanted), float(value))
+                S.engine = 'inclusion-exclusion'
+
+        #the binary decision diagram of long chains is built without
+        #recursion
+        C = [Component('C{}'.format(i), 1e-6) for i in range(1600)]
+        edges = [('E', C[0]), ('E', C[800]), (C[799], 'S'), (C[1599], 'S')]
+        edges += [(C[i], C[i + 1]) for i in range(1599) if i != 799]
+        chains = System.fromedges(edges, engine='bdd', numeric=True)
+        self.assertAlmostEqual(chains.reliability(300),
+                               1 - float(1 - exp(-0.24))**2)
+
+        #the series-parallel reduction is linear, even for wide blocks
+        C = [Component('C{}'.format(i), 1e-3) for i in range(8000)]
+        edges = [('E', C[i]) for i in range(0, 8000, 2)]
+        edges += [(C[i], C[i + 1]) for i in range(0, 8000, 2)]
+        edges += [(C[i + 1], 'S') for i in range(0, 8000, 2)]
+        wide = System.fromedges(edges, engine='series-parallel', numeric=True)
+        self.assertAlmostEqual(wide.reliability(2000),
+                               1 - (1 - exp(-4.0))**4000)
+        #reduced to a single block, without enumerating the paths
+        self.assertEqual(len(wide._seriesparallel().blocks), 1)
+        self.assertNotIn('successpaths', wide._structure)
+
+    def test_vectorized(self):
+        """ Check the evaluation over an array of times gives the same values
+            as the evaluation at each time.
+        """
+        components = [Component('C{}'.format(i), 1e-3, 2e-2) for i in (0, 1)]
+        system = System()
+        system['E'] = [components[0], components[1]]
+        system[components[0]] = 'S'
+        system[components[1]] = 'S'
+
+        times = linspace(0, 5000, 11)
+        for method in ('reliability', 'availability', 'maintainability'):
+            values = getattr(system, method)(times)
+            self.assertEqual(values.shape, times.shape)
+            for t, value in zip(times, values):
+                self.assertAlmostEqual(float(getattr(system, method)(t)), value)
+
     def test_graphmanagement(self):
         """ Check if the constructing a system by its graph works as intended.
         """
@@ -238,14 +459,404 @@ class TestSystem(unittest2.TestCase):
         system['E'] = [component[0], component[1]]
         system[component[0]] = 'S'
         wanted = DiGraph({'E':[component[0].__str__(), component[1].__str__()], component[0].__str__():['S']})
-        self.assertTrue(is_isomorphic(system._graph, wanted))
+        self.assertTrue(is_isomorphic(system.tonetworkx(), wanted))
 
         del system[component[0]] #This component isn’t used anymore
         #from a single element
         system['E'] = component[1]
         system[component[1]] = 'S'
         wanted = DiGraph({'E':[component[1].__str__()], component[1].__str__():'S'})
-        self.assertTrue(is_isomorphic(system._graph, wanted))
+        self.assertTrue(is_isomorphic(system.tonetworkx(), wanted))
+
+        #the paths are the ones found by networkx, in the same order
+        for S in self.systems.values():
+            paths = all_simple_paths(S.tonetworkx(), 'E', 'S')
+            self.assertEqual([[str(c) for c in path] for path in S.successpaths],
+                             list(paths))
+
+    def test_pathenumeration(self):
+        """ Check the paths are counted without being enumerated, and
+            enumerated within the given limits.
+        """
+        for S in self.systems.values():
+            self.assertEqual(S.countpaths(), len(S.successpaths))
+            self.assertEqual(list(S.iterpaths()), S.successpaths)
+            self.assertEqual(list(S.iterpaths(max_paths=2)),
+                             S.successpaths[:2])
+            self.assertEqual(list(S.iterpaths(max_length=1)),
+                             [p for p in S.successpaths if len(p) <= 3])
+        self.assertEqual(list(self.systems['complex'].iterpaths(max_paths=0)),
+                         [])
+        with self.assertRaises(ValueError): #raised before any iteration
+            self.systems['complex'].iterpaths(max_paths=-1)
+
+        #a ladder of 42 stages has 2**42 paths, which are never all
+        #enumerated
+        C = [Component('C{}'.format(i), 1e-4) for i in range(84)]
+        ladder = System()
+        ladder['E'] = [C[0], C[1]]
+        for i in range(0, 82, 2):
+            ladder[C[i]] = ladder[C[i + 1]] = [C[i + 2], C[i + 3]]
+        ladder[C[82]] = ladder[C[83]] = 'S'
+        self.assertEqual(ladder.countpaths(), 2**42)
+        self.assertEqual(ladder.countpaths(C[78]), 4)
+        self.assertEqual(len(list(ladder.iterpaths(max_paths=5))), 5)
+        self.assertEqual(list(ladder.iterpaths(timeout=0)), [])
+        self.assertNotIn('successpaths', ladder._structure)
+
+        #the simple paths of a diagram with a cycle are not counted
+        a, b = C[:2]
+        cycle = System()
+        cycle['E'] = [a]
+        cycle[a] = [b]
+        cycle[b] = [a, 'S']
+        self.assertIsNone(cycle.countpaths())
+        self.assertEqual(list(cycle.iterpaths()), [['E', a, b, 'S']])
+
+    def test_plan(self):
+        """ Check the engine is chosen from the statistics of the diagram,
+            and the automatic engine gives the same values as the others.
+        """
+        for S in self.systems.values():
+            plan = S.plan()
+            self.assertEqual(plan.statistics['paths'], len(S.successpaths))
+            self.assertEqual(plan.statistics['components'],
+                             len(S.components))
+            self.assertIn(plan.exact, ENGINES)
+            self.assertEqual(plan.engine, plan.exact)
+            self.assertEqual(plan.costs[plan.engine], (plan.time, plan.memory))
+
+            auto = S.copy()
+            auto.engine = 'auto'
+            self.assertEqual(auto._enginename(), plan.exact)
+
+        #a chain of 40 bridges has 3**40 paths and is not series-parallel
+        C = [Component('C{}'.format(i), 1e-4) for i in range(200)]
+        chain = System(engine='auto')
+        chain['E'] = [C[0], C[1]]
+        for i in range(0, 200, 5):
+            a, b, c, d, e = C[i:i + 5]
+            chain[a] = [c, e]
+            chain[b] = chain[e] = [d]
+            chain[c] = chain[d] = C[i + 5:i + 7] if i + 5 < 200 else 'S'
+        self.assertEqual(chain.countpaths(), 3**40)
+        self.assertEqual(chain.plan().engine, 'montecarlo')
+        self.assertEqual(chain.plan(budget=float('inf')).engine,
+                         chain.plan().exact)
+        with self.assertWarns(RuntimeWarning):
+            self.assertEqual(chain._enginename(), chain.plan().exact)
+
+        #a mesh of 6 layers of 10 components has only 320 paths, and is
+        #planned without enumerating them
+        C = [Component('C{}'.format(i), 1e-4) for i in range(60)]
+        edges = [('E', c) for c in C[:10]] + [(c, 'S') for c in C[50:]]
+        edges += [(C[i], C[i - i % 10 + 10 + j % 10]) for i in range(50)
+                  for j in (i, i + 1)]
+        mesh = System.fromedges(edges, engine='auto')
+        plan = mesh.plan()
+        self.assertEqual(plan.statistics['paths'], 320)
+        self.assertEqual(plan.statistics['remainder'], 60)
+        self.assertEqual(plan.engine, 'sdp')
+        self.assertNotIn('successpaths', mesh._structure)
+
+    def test_bulkconstruction(self):
+        """ Check the systems built from edges, from an adjacency matrix or
+            by copy have the same diagram as the ones built component by
+            component.
+        """
+        alim, motors = self.alim, self.motors
+        complex_ = self.systems['complex']
+        components = alim + motors
+        edges = [('E', 0), ('E', 1), ('E', 2), (0, 3), (1, 3), (1, 4),
+                 (2, 4), (3, 'S'), (4, 'S')]
+        fromedges = System.fromedges(edges, components)
+        self.assertEqual(fromedges.components, components)
+        self.assertEqual(fromedges[alim[1]], [motors[0], motors[1]])
+        self.assertEqual(fromedges.canonicalform, complex_.canonicalform)
+        named = System.fromedges(complex_.tonetworkx().edges(),
+                                 dict((str(c), c) for c in components))
+        self.assertEqual(named.canonicalform, complex_.canonicalform)
+
+        array = [[0] * 7 for _ in range(7)]
+        for u, v in edges:
+            array[0 if u == 'E' else u + 1][6 if v == 'S' else v + 1] = 1
+        fromadjacency = System.fromadjacency(array, components)
+        self.assertTrue(is_isomorphic(fromadjacency.tonetworkx(),
+                                     complex_.tonetworkx()))
+        self.assertEqual(fromadjacency.components, components)
+
+        for S in (fromedges, fromadjacency):
+            self.assertEqual(S.reliability(self.lambdas['alim']),
+                             complex_.reliability(self.lambdas['alim']))
+            #the components follow the new systems
+            self.assertIn(S, alim[0]._systems)
+
+        copy = complex_.copy()
+        self.assertTrue(is_isomorphic(copy.tonetworkx(), complex_.tonetworkx()))
+        del copy[alim[0]]
+        self.assertIn(alim[0], complex_.components)
+        self.assertEqual(complex_[alim[0]], [motors[0]])
+
+        with self.assertRaises(ValueError): #'E' has no predecessor
+            System.fromedges([(alim[0], 'E')])
+        with self.assertRaises(ValueError): #not a component
+            System.fromedges([('E', 'C0'), ('C0', 'S')])
+        with self.assertRaises(ValueError): #two components named Alim_A
+            System.fromedges([('E', alim[0]), ('E', Component('Alim_A', 1)),
+                              (alim[0], 'S')])
+        with self.assertRaises(ValueError): #the matrix is too small
+            System.fromadjacency([[0, 1], [0, 0]], components)
+
+    def test_evaluatebatch(self):
+        """ Check the batch evaluation gives the same values as setting the
+            rates of the components one scenario at a time.
+        """
+        system, alim, motor, voter = plant()
+
+        times = linspace(0, 3000, 4)
+        lambdas = [[1e-4, 2e-4, 3e-4, 1e-5, 5e-4],
+                   [5e-4, 1e-5, 1e-4, 2e-4, 1e-4]]
+        mus = [[1e-2, 2e-2, 3e-2, 1e-3, 5e-2],
+               [5e-2, 1e-3, 1e-2, 2e-2, 1e-2]]
+        for engine in ENGINES:
+            system.engine = engine
+            for metric in ('reliability', 'availability', 'maintainability'):
+                values = system.evaluatebatch(metric, times,
+                                              {'lambda_': lambdas, 'mu': mus})
+                self.assertEqual(values.shape, (2, 4))
+                for k in range(2):
+                    for i, c in enumerate(system.components):
+                        target = getattr(c, 'component', c)
+                        target.lambda_, target.mu = lambdas[k][i], mus[k][i]
+                    wanted = getattr(system, metric)(times)
+                    for a, b in zip(wanted, values[k]):
+                        self.assertAlmostEqual(a, b)
+                    #a single scenario
+                    single = system.evaluatebatch(metric, times,
+                                                  {'lambda_': lambdas[k],
+                                                   'mu': mus[k]})
+                    self.assertEqual(single.shape, (1, 4))
+                    for a, b in zip(wanted, single[0]):
+                        self.assertAlmostEqual(a, b)
+
+        for params in ([1e-4, 2e-4], [[[1e-4] * 5]],
+                       {'lambda_': lambdas, 'mu': mus + mus}):
+            with self.assertRaises(ValueError):
+                system.evaluatebatch('reliability', times, params)
+
+    def test_simulate(self):
+        """ Check the Monte Carlo estimations agree with the exact values """
+        system, alim, motor, voter = plant()
+
+        times = linspace(0, 5000, 4)
+        for engine in ('inclusion-exclusion', 'bdd'):
+            system.engine = engine
+            for metric in ('reliability', 'availability', 'maintainability'):
+                estimation = system.simulate(times, 20000, seed=1,
+                                             metric=metric)
+                self.assertEqual(estimation.value.shape, (4,))
+                wanted = getattr(system, metric)(times)
+                for a, b, err in zip(wanted, estimation.value,
+                                     estimation.stderr):
+                    self.assertLessEqual(abs(a - b), 4 * err + 1e-6)
+
+        #the same seed gives the same results
+        a = system.simulate(1000, 1000, seed=2)
+        b = system.simulate(1000, 1000, seed=2)
+        self.assertEqual(a, b)
+        self.assertLessEqual(a.low, a.value)
+        self.assertLessEqual(a.value, a.high)
+
+        #the results do not depend on the number of processes
+        for engine in ENGINES:
+            system.engine = engine
+            a = system.simulate(times, 4000, seed=3, metric='availability',
+                                batch_size=1000)
+            b = system.simulate(times, 4000, seed=3, metric='availability',
+                                batch_size=1000, workers=3)
+            self.assertEqual(a.value.tolist(), b.value.tolist())
+            self.assertEqual(a.stderr.tolist(), b.stderr.tolist())
+
+        #the simulation stops once the wanted precision is reached
+        a = system.simulate(1000, 10**6, seed=2, batch_size=1000, rtol=0.01)
+        self.assertLess(a.samples, 10**6)
+        self.assertLessEqual(a.stderr, 0.01 * a.value)
+
+        #no failure observed is not a precise estimation
+        a = system.simulate(1e-3, 10**5, seed=2, batch_size=1000, rtol=0.01)
+        self.assertEqual((a.value, a.stderr), (1, 0))
+        self.assertEqual(a.samples, 10**5)
+
+    def test_simulatefailure(self):
+        """ Check the importance sampling estimates rare failures with a small
+            relative error.
+        """
+        system, alim, motor, voter = plant(scale=1e-3)
+
+        times = linspace(1000, 10000, 3)
+        for metric in ('reliability', 'availability'):
+            estimation = system.simulatefailure(times, 20000, seed=1,
+                                                metric=metric)
+            wanted = 1 - getattr(system, metric)(times)
+            for a, b, err in zip(wanted, estimation.value,
+                                 estimation.relativeerror):
+                self.assertLess(err, 0.01)
+                self.assertLessEqual(abs(a - b), (4 * err + 1e-4) * b)
+
+        #three components in parallel
+        system = System()
+        system['E'] = alim
+        for c in alim:
+            system[c] = 'S'
+        estimation = system.simulatefailure(1000, 1000, seed=1)
+        self.assertAlmostEqual(estimation.value / float(1 - exp(-1e-4))**3, 1)
+        self.assertAlmostEqual(estimation.relativeerror, 0)
+        #the probabilities of failure are not computed from the reliability
+        for c in alim:
+            c.lambda_ = 1e-19
+        estimation = system.simulatefailure(1000, 1000, seed=1)
+        self.assertAlmostEqual(estimation.value / float(expm1(-1e-16))**3, -1)
+        self.assertRaises(ValueError, system.simulatefailure, 1000,
+                          metric='maintainability')
+
+    def test_importance(self):
+        """ Check the importance measures against the structure function
+            evaluated with each component forced to work or to fail.
+        """
+        system, alim, motor, voter = plant()
+
+        times = linspace(500, 5000, 3)
+        symbols = system.probabilitysymbols
+        for metric in ('reliability', 'availability'):
+            measures = system.importance(times, metric=metric)
+            for k, t in enumerate(times):
+                values = dict((s, getattr(c, metric)(t))
+                              for s, c in zip(symbols, system.components))
+                Q = 1 - float(system.structurefunction.subs(values))
+                for s, c in zip(symbols, system.components):
+                    works = dict(values)
+                    works[s] = 1
+                    fails = dict(values)
+                    fails[s] = 0
+                    Q1 = 1 - float(system.structurefunction.subs(works))
+                    Q0 = 1 - float(system.structurefunction.subs(fails))
+                    q = 1 - float(values[s])
+                    wanted = {'birnbaum': Q0 - Q1,
+                              'criticality': (Q0 - Q1) * q / Q,
+                              'fussell-vesely': (Q - Q1) / Q,
+                              'raw': Q0 / Q,
+                              'rrw': Q / Q1}
+                    for name, value in wanted.items():
+                        self.assertAlmostEqual(measures[name][c][k] / value, 1)
+
+        measures = system.importance(1000, ['raw'])
+        self.assertEqual(list(measures), ['raw'])
+        self.assertIsInstance(measures['raw'][motor], float)
+        self.assertRaises(ValueError, system.importance, 1000, ['foo'])
+
+        #the binary decision diagram of long chains is built whatever the
+        #engine evaluating the system
+        C = [Component('C{}'.format(i), 1e-6) for i in range(1200)]
+        edges = [('E', C[0]), ('E', C[600]), (C[599], 'S'), (C[1199], 'S')]
+        edges += [(C[i], C[i + 1]) for i in range(1199) if i != 599]
+        chains = System.fromedges(edges, engine='series-parallel',
+                                  numeric=True)
+        birnbaum = chains.importance(300, ['birnbaum'])['birnbaum']
+        self.assertAlmostEqual(birnbaum[C[0]],
+                               float(-expm1(-0.18) * exp(-599 * 3e-4)))
+
+    def test_bounds(self):
+        """ Check the bounds computed from the paths and the cuts contain
+            the exact metric, and Bonferroni bounds are exact once all the
+            cuts are expanded.
+        """
+        system, alim, motor, voter = plant()
+
+        times = linspace(0, 5000, 4)
+        ncuts = len(system.cutmasks(None))
+        for metric in ('reliability', 'availability'):
+            exact = getattr(system, metric)(times)
+            for method in ('esary-proschan', 'mincut', 'rare-event',
+                           'bonferroni'):
+                for order in (1, 2):
+                    result = system.bounds(times, method, metric, order)
+                    self.assertEqual(result.low.shape, times.shape)
+                    for low, value, high, wanted in zip(result.low,
+                                                        result.value,
+                                                        result.high, exact):
+                        self.assertLessEqual(low, wanted + 1e-12)
+                        self.assertLessEqual(wanted, high + 1e-12)
+                        self.assertLessEqual(abs(value - wanted),
+                                             result.error.max() + 1e-12)
+            result = system.bounds(times, 'bonferroni', metric, ncuts)
+            for low, high, wanted in zip(result.low, result.high, exact):
+                self.assertAlmostEqual(low, wanted)
+                self.assertAlmostEqual(high, wanted)
+
+        #the failure is bounded without cancellation
+        system = System()
+        system['E'] = alim
+        for c in alim:
+            system[c] = 'S'
+        result = system.bounds(1000, 'mincut', failure=True)
+        self.assertIsInstance(result.value, float)
+        self.assertAlmostEqual(result.value / float(1 - exp(-1e-1))**3, 1)
+        #a single cut: only the rounding errors are left
+        self.assertLess(result.error, 1e-9 * result.value)
+        with self.assertRaises(ValueError):
+            system.bounds(1000, 'markov')
+        with self.assertRaises(ValueError):
+            system.bounds(1000, metric='maintainability')
+
+        #the bounds hold for tiny probabilities of failure
+        for lambda_ in (1e-15, 1e-9):
+            a, b = Component('a', lambda_), Component('b', lambda_)
+            voter = Voter(Component('v', lambda_), 2, 3)
+            system = System()
+            system['E'] = [voter]
+            system[voter] = [a, b]
+            system[a] = system[b] = 'S'
+            q = -expm1(-lambda_)
+            #the voter fails if two of its components fail
+            wanted = q**2 + 3 * q**2 - 2 * q**3
+            for method in ('esary-proschan', 'mincut', 'rare-event',
+                           'bonferroni'):
+                result = system.bounds(1.0, method, failure=True)
+                self.assertLessEqual(result.low, wanted)
+                self.assertLessEqual(wanted, result.high)
+                self.assertGreater(result.high, 0)
+
+        #the cuts of a ladder of 12 stages are found without its 4096 paths
+        C = [Component('C{}'.format(i), 1e-5) for i in range(24)]
+        ladder = System()
+        ladder['E'] = [C[0], C[1]]
+        for i in range(0, 22, 2):
+            ladder[C[i]] = ladder[C[i + 1]] = [C[i + 2], C[i + 3]]
+        ladder[C[22]] = ladder[C[23]] = 'S'
+        result = ladder.bounds([10, 100], 'mincut')
+        self.assertNotIn('successpaths', ladder._structure)
+        self.assertEqual(ladder.cutmasks(None),
+                         [3 << i for i in range(0, 24, 2)])
+        self.assertTrue(all(result.low <= result.high))
+
+    def test_structurefunction(self):
+        """ Check the structure function is kept when the rates change.
+        """
+        components = [Component('C{}'.format(i), 1e-3) for i in (0, 1)]
+        system = System()
+        system['E'] = [components[0], components[1]]
+        system[components[0]] = 'S'
+        system[components[1]] = 'S'
+
+        p0, p1 = system.probabilitysymbols
+        self.assertEqual(system.structurefunction, p0 + p1 - p0*p1)
+        structure = system.structurefunction
+        for lambda_ in (1e-4, 2e-3):
+            components[0].lambda_ = lambda_
+            self.assertIs(system.structurefunction, structure)
+            wanted = 1 - (1 - exp(-lambda_ * 100)) * (1 - exp(-0.1))
+            self.assertAlmostEqual(float(system.reliability(100)),
+                                   float(wanted))
 
     def test_cache(self):
         """ Perfom some tests on the cache
@@ -269,6 +880,8 @@ class TestSystem(unittest2.TestCase):
 
         components[0].lambda_ = 0.05 #Let’s change the failure rate
         self.assertEqual(system._cache, dict()) #The cache is now empty
+        #but the structure of the system has not changed
+        self.assertIn('successpaths', system._structure)
         self.assertAlmostEqual(system.mttf, 331750/663.)
         self.assertIn('mttf', system._cache) #The mttf is cached
 
@@ -282,5 +895,175 @@ class TestSystem(unittest2.TestCase):
         self.assertAlmostEqual(othersystem.mttf, 5000)
         self.assertAlmostEqual(system.mttf, 29000/33.)
 
+        #a change of the structure resets everything
+        system[components[2]] = [components[1], 'S']
+        self.assertEqual(system._structure, dict())
+        self.assertEqual(system._cache, dict())
+
+        #the component of a voter is tracked through the voter
+        voter = Voter(components[0], 1, 2)
+        votersystem = System()
+        votersystem['E'] = voter
+        votersystem[voter] = 'S'
+        self.assertAlmostEqual(votersystem.mttf, 7500)
+        components[0].lambda_ = 1e-4
+        self.assertEqual(votersystem._cache, dict())
+        self.assertAlmostEqual(votersystem.mttf, 15000)
+
+    def test_subsystems(self):
+        """ Check a system used as a component gives the same results as
+            the flat system, and is cached on its own.
+        """
+        t = symbols('t', positive=True)
+        for engine in ENGINES:
+            C = [Component('C{}'.format(i), (i + 1) * 1e-4, 1e-2)
+                 for i in range(5)]
+            voter = Voter(Component('V', 1e-4, 2e-2), 2, 3)
+
+            #      +-- C0 --+-- C2 --+
+            # E ---|        |        |
+            #      +-- C1 --+- voter-+-- C4 -- S
+            #      +-- C3 -----------+
+            pumps = System(engine=engine, name='pumps')
+            pumps['E'] = [C[0], C[1]]
+            pumps[C[0]] = [C[2]]
+            pumps[C[1]] = [C[2], voter]
+            pumps[C[2]] = pumps[voter] = 'S'
+            plant = System(engine=engine)
+            plant['E'] = [pumps, C[3]]
+            plant[pumps] = plant[C[3]] = [C[4]]
+            plant[C[4]] = 'S'
+            flat = System(engine=engine)
+            flat['E'] = [C[0], C[1], C[3]]
+            flat[C[0]] = [C[2]]
+            flat[C[1]] = [C[2], voter]
+            flat[C[2]] = flat[voter] = flat[C[3]] = [C[4]]
+            flat[C[4]] = 'S'
+
+            self.assertEqual(plant.components, [pumps, C[3], C[4]])
+            for metric in ('reliability', 'availability', 'maintainability'):
+                self.assertAlmostEqual(float(getattr(plant, metric)(1000)),
+                                       float(getattr(flat, metric)(1000)))
+            self.assertAlmostEqual(float(plant.reliability(t).subs(t, 500)),
+                                   float(flat.reliability(t).subs(t, 500)))
+            self.assertAlmostEqual(float(plant.mttf), float(flat.mttf))
+            numeric = System(engine=engine, numeric=True)
+            numeric['E'] = [pumps]
+            numeric[pumps] = 'S'
+            self.assertAlmostEqual(numeric.availability(1000),
+                                   float(pumps.availability(1000)))
+            estimation = plant.simulate(1000, n_samples=20000, seed=0)
+            self.assertLess(abs(estimation.value - plant.reliability(1000)),
+                            4 * estimation.stderr)
+
+            #the subsystem has its own cache, which resets the plant’s one
+            self.assertIn('reliability', pumps._cache)
+            C[3].lambda_ = 1e-3
+            self.assertEqual(plant._cache, dict())
+            self.assertIn('reliability', pumps._cache)
+            plant.reliability(1000)
+            C[0].lambda_ = 1e-3
+            self.assertEqual(pumps._cache, dict())
+            self.assertEqual(plant._cache, dict())
+            self.assertAlmostEqual(float(plant.reliability(1000)),
+                                   float(flat.reliability(1000)))
+
+        #a component can not be used by a subsystem and elsewhere, as their
+        #probabilities would be multiplied as if they were independent
+        shared = System()
+        with self.assertRaises(ValueError):
+            shared['E'] = [pumps, C[0]]
+        shared['E'] = [pumps, C[3]]
+        with self.assertRaises(ValueError):
+            shared[pumps] = [C[2]]
+        self.assertEqual(shared.components, [pumps, C[3]])
+        other = System(name='other')
+        other['E'] = [C[2]]
+        other[C[2]] = 'S'
+        with self.assertRaises(ValueError):
+            System.fromedges([('E', pumps), ('E', other), (pumps, 'S'),
+                              (other, 'S')])
+        nested = System(name='nested')
+        nested['E'] = [other]
+        nested[other] = 'S'
+        with self.assertRaises(ValueError):
+            System.fromedges([('E', pumps), ('E', nested), (pumps, 'S'),
+                              (nested, 'S')])
+        plant = System()
+        plant['E'] = [pumps, C[3]]
+        with self.assertRaises(ValueError):
+            plant[C[3]] = [nested]
+
+    def test_modular(self):
+        """ Check the modules are found, and evaluated on their own.
+        """
+        #three identical trains in parallel, each one being a valve followed
+        #by a bridge of pumps and by another valve
+        valves = [[Component('{}{}'.format(x, i), 1e-4, 1e-2) for x in 'ab']
+                  for i in range(3)]
+        pumps = [[Component('p{}{}'.format(i, j), 3e-4, 2e-2)
+                  for j in range(5)] for i in range(3)]
+        def build(system):
+            system['E'] = [a for a, _ in valves]
+            for (a, b), p in zip(valves, pumps):
+                system[a] = [p[0], p[1]]
+                system[p[0]] = [p[2], p[4]]
+                system[p[4]] = [p[3]]
+                system[p[1]] = [p[3]]
+                system[p[2]] = system[p[3]] = [b]
+                system[b] = 'S'
+            return system
+
+        times = linspace(0, 5000, 5)
+        #the flat diagram is only evaluated by one engine, the others being
+        #checked against it elsewhere
+        system = build(System(engine='bdd'))
+        for engine in ENGINES:
+            modular = build(System(engine=engine, modular=True))
+            self.assertEqual(len(modular.modules), 3)
+            self.assertEqual([len(m.components) for m in modular.modules],
+                             [5] * 3)
+            for metric in ('reliability', 'availability', 'maintainability'):
+                self.assertAlmostEqual(float(getattr(modular, metric)(1000)),
+                                       float(getattr(system, metric)(1000)))
+                values = modular._numeric(metric, times)
+                for a, b in zip(values, system._numeric(metric, times)):
+                    self.assertAlmostEqual(a, b)
+            self.assertAlmostEqual(float(modular.mttf), float(system.mttf))
+            #the success paths of the whole diagram are not needed
+            self.assertNotIn('successpaths', modular._structure)
+            estimation = modular.simulate(1000, n_samples=20000, seed=0)
+            self.assertLess(abs(estimation.value - system.reliability(1000)),
+                            4 * estimation.stderr)
+
+            #only the module of the changed component is reset
+            component = modular.modules[0].components[0]
+            component.lambda_ *= 2
+            caches = [bool(m._cache) for m in modular.modules]
+            self.assertEqual(caches, [False, True, True])
+            self.assertAlmostEqual(float(modular.reliability(1000)),
+                                   float(system.reliability(1000)))
+
+        #a change of the diagram builds new modules
+        modules = modular.modules
+        modular[modules[0].components[0]] = 'S'
+        self.assertEqual(len(modular.modules), 2)
+        self.assertNotIn(modules[0], component._systems)
+
+        #a branch leading nowhere is not a module
+        A, B, C, D, X, Y = [Component(name, 1e-4) for name in 'ABCDXY']
+        for modular in (True, False):
+            system = System(modular=modular)
+            system['E'] = [A, B]
+            system[A] = [X]
+            system[X] = [Y]
+            system[Y] = 'S'
+            system[B] = [C, D]
+            system[C] = system[D] = 'S'
+            del system[Y]
+            self.assertEqual([m.components for m in system.modules], [[C, D]])
+            self.assertAlmostEqual(float(system.reliability(100.0)),
+                                   0.989951813065)
+
 if __name__ == '__main__':
     unittest2.main()
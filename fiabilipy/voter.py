@@ -25,14 +25,17 @@ reliability, the availability, the Mean-Time-To-Failure, and so on.
 """
 from builtins import range
 
-from sympy import exp, Symbol, oo
-from scipy.special import binom
 from itertools import combinations, chain
 
-from fiabilipy.component import Component
+from fiabilipy.component import Component, _usenumpy
 
 __all__ = ['Voter']
 
+def binom(n, k):
+    r""" The binomial coefficient, scipy being imported on first use """
+    from scipy.special import binom
+    return binom(n, k)
+
 ALLSUBSETS = lambda n: (chain(*[combinations(list(range(n)), ni)
                         for ni in range(n+1)]))
 
@@ -56,6 +59,9 @@ class Voter(Component):
             the constant maintainability rate of the voter
         initialy_avaible: boolean, optional
             whether the component is avaible at t=0 or not
+        numeric : boolean, optional
+            whether the metrics are computed with numpy only (see
+            :py:func:`fiabilipy.component.setnumeric`)
 
         Examples
         --------
@@ -65,13 +71,17 @@ class Voter(Component):
         8333.33333333333
     """
 
-    def __init__(self, component, M, N, lambda_=0, mu=0, initialy_avaible=True):
+    def __init__(self, component, M, N, lambda_=0, mu=0, initialy_avaible=True,
+                 numeric=None):
         name = '{} out-of {} − {}'.format(M, N, component.name)
         super(Voter, self).__init__(name=name, lambda_=lambda_, mu=mu,
-                                    initialy_avaible=initialy_avaible)
+                                    initialy_avaible=initialy_avaible,
+                                    numeric=numeric)
         self.component = component
         self.M = M
         self.N = N
+        #the voter depends on its component’s parameters
+        component._systems.add(self)
 
     def __repr__(self):
         return u'Voter(%s out-of %s)' % (self.M, self.N)
@@ -88,6 +98,51 @@ class Voter(Component):
             prob += binom(self.N, k) * a * b
         return prob
 
+    def _vectorized(self, method, t, lambda_, mu):
+        r""" Compute the `method` (reliability, availability or
+            maintainability) of the voter with numpy, the replicated component
+            having the failure rates `lambda_` and the maintainability rates
+            `mu`. The voter’s own rates are kept.
+        """
+        p = self.component._vectorized(method, t, lambda_, mu)
+        prob = 0
+        for k in range(self.M, self.N+1):
+            prob = prob + binom(self.N, k) * p**k * (1 - p)**(self.N-k)
+        own = super(Voter, self)._vectorized(method, t,
+                                             float(self.lambda_),
+                                             float(self.mu))
+        return own * prob
+
+    def _vectorizedfailure(self, method, t, lambda_, mu):
+        r""" Compute one minus the `method` (reliability, availability or
+            maintainability) of the voter with numpy, without subtracting
+            from one: the voter fails if it fails itself, or if fewer than
+            `M` components work.
+        """
+        q = self.component._vectorizedfailure(method, t, lambda_, mu)
+        prob = 0
+        for k in range(self.M):
+            prob = prob + binom(self.N, k) * (1 - q)**k * q**(self.N-k)
+        own = super(Voter, self)._vectorizedfailure(method, t,
+                                                    float(self.lambda_),
+                                                    float(self.mu))
+        return own + (1 - own) * prob
+
+    def _expsum(self, method, exact=True):
+        r""" Return the `method` (reliability, availability or
+            maintainability) of the voter as a sum of exponentials (see
+            :py:class:`fiabilipy.expsum.ExpSum`), exact or made of floats.
+        """
+        p = self.component._expsum(method, exact)
+        prob = 0
+        for k in range(self.M, self.N+1):
+            prob = prob + binom(self.N, k) * p**k * (1 - p)**(self.N-k)
+        return super(Voter, self)._expsum(method, exact) * prob
+
+    def _rates(self):
+        r""" Return the rates of the replicated component, as floats """
+        return self.component._rates()
+
     def reliability(self, t):
         r""" Compute the reliability of the voter at `t`
 
@@ -106,12 +161,15 @@ class Voter(Component):
             --------
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> voter = Voter(motor, 2, 3)
+            >>> from sympy import Symbol
             >>> t = Symbol('t', positive=True)
             >>> voter.reliability(t)
             3.0*(-exp(-0.0001*t) + 1)*exp(-0.0002*t) + 1.0*exp(-0.0003*t)
             >>> voter.reliability(1000)
             0.974555817870510
         """
+        if _usenumpy(self, t):
+            return self._numeric('reliability', t)
         ownrel = super(Voter, self).reliability(t)
         return ownrel * self._probabilitiescomputation(t, 'reliability')
 
@@ -133,6 +191,7 @@ class Voter(Component):
             --------
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> voter = Voter(motor, 2, 3, mu=1e-3)
+            >>> from sympy import Symbol
             >>> t = Symbol('t', positive=True)
             >>> voter.maintainability(t) #doctest: +NORMALIZE_WHITESPACE
             (1.0*(-exp(-0.03*t) + 1.0)**3 + 3.0*(-exp(-0.03*t)
@@ -140,6 +199,8 @@ class Voter(Component):
             >>> voter.maintainability(1000)
             0.632120558828558
         """
+        if _usenumpy(self, t):
+            return self._numeric('maintainability', t)
         ownrel = super(Voter, self).maintainability(t)
         return ownrel * self._probabilitiescomputation(t, 'maintainability')
 
@@ -161,6 +222,7 @@ class Voter(Component):
             --------
             >>> motor = Component('M', 1e-4, 3e-2)
             >>> voter = Voter(motor, 2, 3, mu=1e-3)
+            >>> from sympy import Symbol
             >>> t = Symbol('t', positive=True)
             >>> voter.availability(t) #doctest: +NORMALIZE_WHITESPACE
             3.0*(-0.00332225913621263*exp(-0.0301*t) +
@@ -170,6 +232,8 @@ class Voter(Component):
             >>> voter.availability(1000)
             0.999966961120940
         """
+        if _usenumpy(self, t):
+            return self._numeric('availability', t)
         ownavail = super(Voter, self).availability(t)
         return ownavail * self._probabilitiescomputation(t, 'availability')
 
@@ -192,8 +256,8 @@ class Voter(Component):
             >>> voter.mttf
             8333.33333333333
         """
-        t = Symbol('t', positive=True)
-        return self.reliability(t).integrate((t, 0, oo))
+        exact = not _usenumpy(self)
+        return self._expsum('reliability', exact).integral()
 
     @property
     def mttr(self):
@@ -214,5 +278,5 @@ class Voter(Component):
             >>> voter.mttr
             1000.57547188695
         """
-        t = Symbol('t', positive=True)
-        return (1 - self.maintainability(t)).integrate((t, 0, oo))
+        exact = not _usenumpy(self)
+        return (1 - self._expsum('maintainability', exact)).integral()